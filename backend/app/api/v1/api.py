@@ -7,7 +7,9 @@ from app.api.v1.endpoints import (
     teams,
     projects,
     metrics,
-    chat
+    chat,
+    jobs,
+    realtime
 )
 
 # 创建API路由器
@@ -54,4 +56,16 @@ api_router.include_router(
     chat.router,
     prefix="/chat",
     tags=["chat"]
-)
\ No newline at end of file
+)
+
+api_router.include_router(
+    jobs.router,
+    prefix="/jobs",
+    tags=["jobs"]
+)
+
+api_router.include_router(
+    realtime.router,
+    prefix="/realtime",
+    tags=["realtime"]
+)
@@ -1,8 +1,10 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 from loguru import logger
 
+from app.core.http_cache import http_response_cache
+from app.core.responses import api_response
 from app.schemas.schemas import APIResponse
 from app.services.ai_service import AIService
 from app.services.data_collector import DataCollector
@@ -144,7 +146,7 @@ async def get_dora_analytics(
             ]
         }
         
-        return APIResponse(
+        return api_response(
             success=True,
             message="DORA指标分析获取成功",
             data=dora_analytics
@@ -293,7 +295,7 @@ async def get_flow_analytics(
             ]
         }
         
-        return APIResponse(
+        return api_response(
             success=True,
             message="流动效率分析获取成功",
             data=flow_analytics
@@ -446,7 +448,7 @@ async def get_team_analytics(
             }
         }
         
-        return APIResponse(
+        return api_response(
             success=True,
             message="团队效能分析获取成功",
             data=team_analytics
@@ -459,11 +461,16 @@ async def get_team_analytics(
 
 @router.get("/trends", response_model=APIResponse)
 async def get_trend_analysis(
+    request: Request,
     metric_type: str = Query(..., regex="^(dora|flow|team|quality)$"),
     period: str = Query(default="30d", regex="^(7d|30d|90d|1y)$"),
     team_id: Optional[int] = None
 ):
     """获取趋势分析"""
+    cached = http_response_cache.get(request)
+    if cached is not None:
+        return cached
+    
     try:
         # 模拟趋势分析数据
         trend_analysis = {
@@ -560,11 +567,12 @@ async def get_trend_analysis(
             }
         }
         
-        return APIResponse(
+        response = api_response(
             success=True,
             message="趋势分析获取成功",
             data=trend_analysis
         )
+        return http_response_cache.store(request, response)
         
     except Exception as e:
         logger.error(f"获取趋势分析失败: {e}")
@@ -703,7 +711,7 @@ async def get_benchmark_analysis(
             }
         }
         
-        return APIResponse(
+        return api_response(
             success=True,
             message="基准对比分析获取成功",
             data=benchmark_analysis
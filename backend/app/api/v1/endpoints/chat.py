@@ -1,12 +1,18 @@
-from fastapi import APIRouter, HTTPException, Depends
+import asyncio
+from fastapi import APIRouter, HTTPException, Depends, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 from loguru import logger
 
 from app.schemas.schemas import (
-    AIChatRequest, AIChatResponse, APIResponse
+    AIChatRequest, AIChatResponse, APIResponse, ChatMessage
 )
+from app.core.config import settings
 from app.services.ai_service import AIService
+from app.services.chat_history import chat_history_store
+from app.services.chat_stream import chat_stream_events, format_sse
+from app.services.dashboard_snapshot import dashboard_snapshots, overview_metric_values
 from app.services.data_collector import DataCollector
 
 router = APIRouter()
@@ -19,6 +25,41 @@ def get_data_collector() -> DataCollector:
     return DataCollector()
 
 
+async def _save_exchange(
+    user_id: Optional[int],
+    conversation_id: Optional[int],
+    message: ChatMessage,
+    reply: str,
+    suggestions: Optional[List[str]] = None
+) -> Optional[int]:
+    """保存一问一答到聊天历史，未提供用户时不保存；保存失败不影响回复"""
+    if user_id is None:
+        return conversation_id
+    try:
+        return await asyncio.to_thread(
+            chat_history_store.record_exchange,
+            user_id, message.message, reply, suggestions, conversation_id, message.context
+        )
+    except Exception as e:
+        logger.error(f"保存聊天记录失败: {e}")
+        return conversation_id
+
+
+async def _chat_events(
+    ai_service: AIService,
+    message: ChatMessage,
+    user_id: Optional[int] = None,
+    conversation_id: Optional[int] = None
+):
+    """流式聊天事件，回复完成时保存到聊天历史并在 done 事件中附带会话ID"""
+    async for event in chat_stream_events(ai_service, message):
+        if event["type"] == "done":
+            event["conversation_id"] = await _save_exchange(
+                user_id, conversation_id, message, event["message"], event["suggestions"]
+            )
+        yield event
+
+
 @router.post("/message", response_model=APIResponse)
 async def send_chat_message(
     request: AIChatRequest,
@@ -28,19 +69,20 @@ async def send_chat_message(
     """发送聊天消息并获取AI回复"""
     try:
         # 获取AI回复
-        ai_response = await ai_service.chat_with_ai(
-            message=request.message,
-            context=request.context,
-            user_id=request.user_id
+        message = ChatMessage(message=request.message, context=request.context)
+        ai_response = await ai_service.chat_with_ai(message)
+        conversation_id = await _save_exchange(
+            request.user_id, request.conversation_id, message, ai_response.response, ai_response.suggestions
         )
         
         # 构建响应
         chat_response = AIChatResponse(
-            message=ai_response["message"],
-            suggestions=ai_response.get("suggestions", []),
-            data_insights=ai_response.get("data_insights", {}),
-            follow_up_questions=ai_response.get("follow_up_questions", []),
-            timestamp=datetime.now().isoformat()
+            message=ai_response.response,
+            suggestions=ai_response.suggestions or [],
+            data_insights={},
+            follow_up_questions=[],
+            timestamp=ai_response.timestamp.isoformat(),
+            conversation_id=conversation_id
         )
         
         return APIResponse(
@@ -54,6 +96,136 @@ async def send_chat_message(
         raise HTTPException(status_code=500, detail="AI聊天服务暂时不可用")
 
 
+def _sse_response(
+    ai_service: AIService,
+    message: ChatMessage,
+    user_id: Optional[int] = None,
+    conversation_id: Optional[int] = None
+) -> StreamingResponse:
+    """流式聊天SSE响应，客户端断开时Starlette取消生成器并关闭上游LLM连接"""
+    async def event_source():
+        async for event in _chat_events(ai_service, message, user_id, conversation_id):
+            yield format_sse(event)
+    
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/stream")
+async def stream_chat_message(
+    request: AIChatRequest,
+    ai_service: AIService = Depends(get_ai_service)
+):
+    """流式发送聊天消息(Server-Sent Events)"""
+    return _sse_response(
+        ai_service,
+        ChatMessage(message=request.message, context=request.context),
+        request.user_id,
+        request.conversation_id
+    )
+
+
+@router.get("/stream")
+async def stream_chat_message_get(
+    message: str,
+    user_id: Optional[int] = None,
+    conversation_id: Optional[int] = None,
+    ai_service: AIService = Depends(get_ai_service)
+):
+    """流式发送聊天消息(Server-Sent Events，供浏览器 EventSource 使用)"""
+    return _sse_response(ai_service, ChatMessage(message=message), user_id, conversation_id)
+
+
+@router.websocket("/ws")
+async def chat_websocket(
+    websocket: WebSocket,
+    ai_service: AIService = Depends(get_ai_service)
+):
+    """流式聊天WebSocket
+    
+    客户端发送 {"message": ..., "context": ..., "user_id": ..., "conversation_id": ...} 开始提问，回复过程中发送 {"type": "cancel"} 取消；
+    服务端推送 start/token/done/error 事件，空闲时每 WS_HEARTBEAT_INTERVAL 秒推送 ping。
+    """
+    await websocket.accept()
+    
+    # 独立读取客户端消息，回复过程中也能及时收到取消和断开
+    incoming: asyncio.Queue = asyncio.Queue()
+    
+    async def read_messages():
+        try:
+            while True:
+                try:
+                    payload = await websocket.receive_json()
+                except (ValueError, TypeError, KeyError):
+                    payload = {"type": "invalid"}
+                await incoming.put(payload)
+        except (WebSocketDisconnect, RuntimeError):
+            await incoming.put(None)
+    
+    async def send_events(message: ChatMessage, user_id: Optional[int], conversation_id: Optional[int]):
+        async for event in _chat_events(ai_service, message, user_id, conversation_id):
+            await websocket.send_json(event)
+    
+    reader = asyncio.create_task(read_messages())
+    try:
+        while True:
+            try:
+                payload = await asyncio.wait_for(incoming.get(), timeout=settings.WS_HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                await websocket.send_json({"type": "ping"})
+                continue
+            
+            if payload is None:
+                break
+            if not isinstance(payload, dict) or not payload.get("message"):
+                if isinstance(payload, dict) and payload.get("type") in ("cancel", "pong"):
+                    continue
+                await websocket.send_json({"type": "error", "message": "消息格式错误或内容为空"})
+                continue
+            
+            sender = asyncio.create_task(send_events(
+                ChatMessage(message=payload["message"], context=payload.get("context")),
+                payload.get("user_id"),
+                payload.get("conversation_id")
+            ))
+            
+            # 回复过程中等待取消或断开
+            while True:
+                getter = asyncio.create_task(incoming.get())
+                done, _ = await asyncio.wait({sender, getter}, return_when=asyncio.FIRST_COMPLETED)
+                if sender in done:
+                    if getter in done:
+                        incoming.put_nowait(getter.result())
+                    else:
+                        getter.cancel()
+                    break
+                
+                control = getter.result()
+                if control is None or (isinstance(control, dict) and control.get("type") == "cancel"):
+                    sender.cancel()
+                    await asyncio.gather(sender, return_exceptions=True)
+                    if control is None:
+                        return
+                    await websocket.send_json({"type": "cancelled"})
+                    break
+                if isinstance(control, dict) and control.get("type") != "pong":
+                    await websocket.send_json({"type": "error", "message": "上一条回复尚未完成"})
+            
+            if not sender.cancelled() and sender.exception() is not None:
+                raise sender.exception()
+    
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.error(f"聊天WebSocket异常: {e}")
+    finally:
+        reader.cancel()
+        await asyncio.gather(reader, return_exceptions=True)
+
+
 @router.get("/suggestions", response_model=APIResponse)
 async def get_chat_suggestions(
     context: Optional[str] = None,
@@ -123,63 +295,12 @@ async def get_chat_suggestions(
 @router.get("/history", response_model=APIResponse)
 async def get_chat_history(
     user_id: int,
-    limit: int = 50,
-    offset: int = 0
+    limit: int = Query(settings.CHAT_HISTORY_PAGE_SIZE, ge=1, le=100),
+    cursor: Optional[str] = None
 ):
-    """获取聊天历史记录"""
+    """获取聊天历史记录(按最近更新时间倒序，使用上一页返回的 next_cursor 翻页)"""
     try:
-        # 模拟聊天历史数据
-        chat_history = {
-            "total_count": 125,
-            "conversations": [
-                {
-                    "id": 1,
-                    "timestamp": "2024-01-29T10:30:00Z",
-                    "user_message": "我们团队的DORA指标表现如何？",
-                    "ai_response": "根据最新数据分析，您的团队DORA指标整体表现良好。部署频率为1.2次/天，处于行业中等水平；变更前置时间为2.5天，有改进空间；变更失败率为8.5%，表现不错；服务恢复时间为1.8小时，符合预期。建议重点优化变更前置时间。",
-                    "context": "dashboard",
-                    "insights_provided": True
-                },
-                {
-                    "id": 2,
-                    "timestamp": "2024-01-29T09:15:00Z",
-                    "user_message": "最近代码质量有什么变化？",
-                    "ai_response": "代码质量呈现积极趋势！测试覆盖率从75%提升到82.5%，技术债务比率从15.2%降低到12.5%，代码复杂度得分改善了8.5%。主要改进来自于加强的代码审查流程和自动化测试。建议继续保持这个势头。",
-                    "context": "quality_analysis",
-                    "insights_provided": True
-                },
-                {
-                    "id": 3,
-                    "timestamp": "2024-01-28T16:45:00Z",
-                    "user_message": "团队协作效率如何提升？",
-                    "ai_response": "基于数据分析，建议从以下几个方面提升团队协作：1) 优化会议效率，当前会议效率得分72分；2) 减少响应时间，目前平均2.3小时；3) 加强知识分享，得分68分有提升空间；4) 改进文档质量，当前75分。可以考虑引入协作工具和建立更好的沟通机制。",
-                    "context": "team_analysis",
-                    "insights_provided": True
-                },
-                {
-                    "id": 4,
-                    "timestamp": "2024-01-28T14:20:00Z",
-                    "user_message": "预测下个月的效能表现",
-                    "ai_response": "基于历史趋势和当前改进措施，预测下个月效能表现：整体效能得分预计从82.5提升到85.2（置信度82%）。主要驱动因素包括持续改进措施、团队技能提升和工具优化。建议重点关注流动效率的提升，这是最大的增长潜力点。",
-                    "context": "prediction",
-                    "insights_provided": True
-                },
-                {
-                    "id": 5,
-                    "timestamp": "2024-01-28T11:30:00Z",
-                    "user_message": "如何减少部署风险？",
-                    "ai_response": "减少部署风险的建议：1) 增强自动化测试，当前覆盖率82.5%可提升到90%+；2) 实施蓝绿部署或金丝雀发布；3) 加强监控和告警机制；4) 建立快速回滚流程；5) 进行更频繁的小批量部署。当前变更失败率8.5%已经不错，通过这些措施可以进一步降低到5%以下。",
-                    "context": "deployment",
-                    "insights_provided": True
-                }
-            ],
-            "pagination": {
-                "current_page": offset // limit + 1,
-                "total_pages": (125 + limit - 1) // limit,
-                "has_next": offset + limit < 125,
-                "has_previous": offset > 0
-            }
-        }
+        chat_history = await asyncio.to_thread(chat_history_store.list_conversations, user_id, limit, cursor)
         
         return APIResponse(
             success=True,
@@ -187,11 +308,40 @@ async def get_chat_history(
             data=chat_history
         )
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"获取聊天历史失败: {e}")
         raise HTTPException(status_code=500, detail="获取聊天历史失败")
 
 
+@router.get("/history/{conversation_id}", response_model=APIResponse)
+async def get_conversation_messages(
+    conversation_id: int,
+    user_id: int,
+    limit: int = Query(settings.CHAT_HISTORY_PAGE_SIZE, ge=1, le=100),
+    cursor: Optional[str] = None
+):
+    """获取对话消息(从最新消息开始，使用 next_cursor 加载更早的消息)"""
+    try:
+        messages = await asyncio.to_thread(chat_history_store.list_messages, conversation_id, user_id, limit, cursor)
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"获取对话消息失败: {e}")
+        raise HTTPException(status_code=500, detail="获取对话消息失败")
+    
+    if messages is None:
+        raise HTTPException(status_code=404, detail="对话不存在")
+    
+    return APIResponse(
+        success=True,
+        message="对话消息获取成功",
+        data=messages
+    )
+
+
 @router.delete("/history/{conversation_id}", response_model=APIResponse)
 async def delete_conversation(
     conversation_id: int,
@@ -199,22 +349,24 @@ async def delete_conversation(
 ):
     """删除特定对话"""
     try:
-        # 模拟删除操作
-        result = {
-            "deleted_conversation_id": conversation_id,
-            "user_id": user_id,
-            "deleted_at": datetime.now().isoformat()
-        }
-        
-        return APIResponse(
-            success=True,
-            message="对话删除成功",
-            data=result
-        )
+        deleted = await asyncio.to_thread(chat_history_store.delete_conversation, conversation_id, user_id)
         
     except Exception as e:
         logger.error(f"删除对话失败: {e}")
         raise HTTPException(status_code=500, detail="删除对话失败")
+    
+    if not deleted:
+        raise HTTPException(status_code=404, detail="对话不存在")
+    
+    return APIResponse(
+        success=True,
+        message="对话删除成功",
+        data={
+            "deleted_conversation_id": conversation_id,
+            "user_id": user_id,
+            "deleted_at": datetime.now().isoformat()
+        }
+    )
 
 
 @router.post("/analyze", response_model=APIResponse)
@@ -229,56 +381,24 @@ async def analyze_with_ai(
 ):
     """使用AI分析特定数据"""
     try:
-        # 根据数据类型获取相关数据
+        # 指标表中没有历史记录时，使用最新仪表盘快照中的全组织指标值
+        snapshot = await asyncio.to_thread(dashboard_snapshots.latest)
         analysis_data = {}
-        
-        if data_type == "dora":
-            # 获取DORA指标数据进行分析
-            analysis_data = {
-                "deployment_frequency": 1.2,
-                "lead_time": 2.5,
-                "change_failure_rate": 8.5,
-                "recovery_time": 1.8,
-                "trends": {
-                    "deployment_frequency": "improving",
-                    "lead_time": "stable",
-                    "change_failure_rate": "improving",
-                    "recovery_time": "stable"
-                }
-            }
-        elif data_type == "flow":
-            # 获取流动效率数据
-            analysis_data = {
-                "flow_efficiency": 28.5,
-                "cycle_time": 8.2,
-                "throughput": 12.5,
-                "wip": 15,
-                "bottlenecks": ["testing", "development"]
-            }
-        elif data_type == "team":
-            # 获取团队效能数据
-            analysis_data = {
-                "productivity_score": 78.5,
-                "collaboration_score": 82.1,
-                "satisfaction_score": 75.2,
-                "skill_growth_rate": 12.5,
-                "team_health": "good"
-            }
-        elif data_type == "quality":
-            # 获取质量指标数据
+        if snapshot is not None:
             analysis_data = {
-                "quality_score": 85.2,
-                "defect_density": 0.8,
-                "test_coverage": 82.5,
-                "technical_debt_ratio": 12.5,
-                "code_quality_trend": "improving"
+                **overview_metric_values(snapshot.data),
+                "snapshot_version": snapshot.version,
+                "generated_at": snapshot.created_at.isoformat()
             }
         
         # 使用AI服务进行分析
         ai_analysis = await ai_service.analyze_data_with_query(
             query=query,
             data=analysis_data,
-            data_type=data_type
+            data_type=data_type,
+            team_id=team_id,
+            project_id=project_id,
+            time_range=time_range
         )
         
         # 构建分析结果
@@ -356,6 +476,8 @@ async def explain_metric(
             data=explanation_result
         )
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"指标解释失败: {e}")
         raise HTTPException(status_code=500, detail="指标解释服务暂时不可用")
@@ -1,10 +1,15 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import Dict, Any, List
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
+import asyncio
 from loguru import logger
 
+from app.core.responses import api_response
 from app.schemas.schemas import APIResponse, DashboardData
+from app.services.activity_store import EVENT_TYPES, activity_store
 from app.services.data_collector import DataCollector
+from app.services.dashboard_snapshot import dashboard_snapshots
+from app.services.team_rankings import RANKING_METRICS, attach_team_details, team_rankings
 
 router = APIRouter()
 
@@ -12,127 +17,41 @@ router = APIRouter()
 def get_data_collector() -> DataCollector:
     return DataCollector()
 
+def get_shared_data_collector(request: Request) -> DataCollector:
+    """应用启动时创建的数据采集器(负责后台采集和快照发布)"""
+    return request.app.state.data_collector
+
 
 @router.get("/overview", response_model=APIResponse)
 async def get_dashboard_overview(
-    data_collector: DataCollector = Depends(get_data_collector)
+    refresh: bool = False,
+    data_collector: DataCollector = Depends(get_shared_data_collector)
 ):
-    """获取仪表盘概览数据"""
+    """获取仪表盘概览数据
+    
+    直接返回最新的仪表盘快照；refresh=true 时在后台触发一次采集，不等待采集完成。
+    """
     try:
-        # 获取最新的指标数据
-        metrics_data = await data_collector.collect_all_metrics()
+        snapshot = await asyncio.to_thread(dashboard_snapshots.latest)
+        
+        refresh_enqueued = False
+        if snapshot is None:
+            # 尚无快照(冷启动)，同步采集一次
+            snapshot = await data_collector.collect_and_publish()
+        elif refresh:
+            refresh_enqueued = data_collector.request_refresh()
         
-        # 构建仪表盘数据
         dashboard_data = {
-            "dora_metrics": {
-                "deployment_frequency": metrics_data.get('dora', {}).get('deployment_frequency', 0.5),
-                "lead_time_for_changes": metrics_data.get('dora', {}).get('lead_time_for_changes', 48),
-                "change_failure_rate": metrics_data.get('dora', {}).get('change_failure_rate', 10),
-                "time_to_restore_service": metrics_data.get('dora', {}).get('time_to_restore_service', 4),
-                "trend": {
-                    "deployment_frequency": "up",
-                    "lead_time_for_changes": "down",
-                    "change_failure_rate": "down",
-                    "time_to_restore_service": "stable"
-                }
-            },
-            "flow_metrics": {
-                "flow_efficiency": metrics_data.get('flow', {}).get('flow_efficiency', 25),
-                "work_in_progress": metrics_data.get('flow', {}).get('work_in_progress', 8),
-                "cycle_time": metrics_data.get('flow', {}).get('cycle_time', 7),
-                "throughput": metrics_data.get('flow', {}).get('throughput', 3),
-                "trend": {
-                    "flow_efficiency": "up",
-                    "work_in_progress": "down",
-                    "cycle_time": "down",
-                    "throughput": "up"
-                }
-            },
-            "team_rankings": [
-                {
-                    "id": 1,
-                    "name": "前端团队",
-                    "score": 85,
-                    "trend": "up",
-                    "change": 5,
-                    "members": 6
-                },
-                {
-                    "id": 2,
-                    "name": "后端团队",
-                    "score": 82,
-                    "trend": "stable",
-                    "change": 1,
-                    "members": 8
-                },
-                {
-                    "id": 3,
-                    "name": "移动端团队",
-                    "score": 78,
-                    "trend": "up",
-                    "change": 3,
-                    "members": 4
-                }
-            ],
-            "recent_activities": [
-                {
-                    "id": 1,
-                    "type": "deployment",
-                    "title": "生产环境部署",
-                    "description": "v2.1.0 版本成功部署到生产环境",
-                    "team": "前端团队",
-                    "status": "success",
-                    "timestamp": (datetime.now() - timedelta(minutes=30)).isoformat()
-                },
-                {
-                    "id": 2,
-                    "type": "commit",
-                    "title": "功能开发",
-                    "description": "完成用户权限管理模块开发",
-                    "team": "后端团队",
-                    "status": "completed",
-                    "timestamp": (datetime.now() - timedelta(hours=1)).isoformat()
-                },
-                {
-                    "id": 3,
-                    "type": "incident",
-                    "title": "性能问题",
-                    "description": "API响应时间异常，已修复",
-                    "team": "后端团队",
-                    "status": "resolved",
-                    "timestamp": (datetime.now() - timedelta(hours=2)).isoformat()
-                },
-                {
-                    "id": 4,
-                    "type": "review",
-                    "title": "代码审查",
-                    "description": "完成支付模块代码审查",
-                    "team": "前端团队",
-                    "status": "approved",
-                    "timestamp": (datetime.now() - timedelta(hours=3)).isoformat()
-                }
-            ],
-            "alerts": [
-                {
-                    "id": 1,
-                    "type": "warning",
-                    "title": "部署频率偏低",
-                    "message": "本周部署频率低于目标值，建议关注",
-                    "severity": "medium",
-                    "timestamp": (datetime.now() - timedelta(hours=1)).isoformat()
-                },
-                {
-                    "id": 2,
-                    "type": "info",
-                    "title": "代码质量提升",
-                    "message": "本月代码审查通过率达到95%",
-                    "severity": "low",
-                    "timestamp": (datetime.now() - timedelta(hours=6)).isoformat()
-                }
-            ]
+            **snapshot.data,
+            "snapshot": {
+                "version": snapshot.version,
+                "generated_at": snapshot.created_at.isoformat(),
+                "age_seconds": round(snapshot.age_seconds, 1),
+                "refresh_enqueued": refresh_enqueued
+            }
         }
         
-        return APIResponse(
+        return api_response(
             success=True,
             message="仪表盘数据获取成功",
             data=dashboard_data
@@ -164,7 +83,7 @@ async def get_dora_metrics(
                 "time_to_restore_service": 6 - (i * 0.05)
             })
         
-        return APIResponse(
+        return api_response(
             success=True,
             message="DORA指标历史数据获取成功",
             data={
@@ -205,7 +124,7 @@ async def get_flow_metrics(
                 "throughput": 2 + (i * 0.05)
             })
         
-        return APIResponse(
+        return api_response(
             success=True,
             message="流动效率指标历史数据获取成功",
             data={
@@ -227,81 +146,34 @@ async def get_flow_metrics(
 
 @router.get("/team-rankings", response_model=APIResponse)
 async def get_team_rankings(
-    data_collector: DataCollector = Depends(get_data_collector)
+    metric: str = Query("overall_score", pattern=f"^({'|'.join(RANKING_METRICS)})$"),
+    limit: int = Query(10, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    team_id: Optional[int] = None
 ):
-    """获取团队效能排行"""
+    """获取团队效能排行
+    
+    排行来自团队排行索引(各团队最新一次效能指标)，team_id 指定时同时返回该团队的排名。
+    """
     try:
-        # 模拟团队排行数据
-        team_rankings = [
-            {
-                "id": 1,
-                "name": "前端团队",
-                "score": 85,
-                "trend": "up",
-                "change": 5,
-                "members": 6,
-                "metrics": {
-                    "efficiency": 88,
-                    "velocity": 82,
-                    "satisfaction": 85,
-                    "collaboration": 90
-                },
-                "recent_achievements": [
-                    "完成移动端适配",
-                    "性能优化提升30%",
-                    "零缺陷发布"
-                ]
-            },
-            {
-                "id": 2,
-                "name": "后端团队",
-                "score": 82,
-                "trend": "stable",
-                "change": 1,
-                "members": 8,
-                "metrics": {
-                    "efficiency": 85,
-                    "velocity": 80,
-                    "satisfaction": 82,
-                    "collaboration": 85
-                },
-                "recent_achievements": [
-                    "API性能优化",
-                    "微服务架构升级",
-                    "监控体系完善"
-                ]
-            },
-            {
-                "id": 3,
-                "name": "移动端团队",
-                "score": 78,
-                "trend": "up",
-                "change": 3,
-                "members": 4,
-                "metrics": {
-                    "efficiency": 80,
-                    "velocity": 75,
-                    "satisfaction": 78,
-                    "collaboration": 82
-                },
-                "recent_achievements": [
-                    "新版本发布",
-                    "用户体验优化",
-                    "崩溃率降低50%"
-                ]
+        rankings = await asyncio.to_thread(team_rankings.top, metric, limit, offset)
+        if team_id is not None:
+            comparison = await asyncio.to_thread(team_rankings.compare, [team_id], [metric])
+            rankings["team_rank"] = {
+                "id": team_id,
+                "rank": comparison["teams"][0]["ranks"][metric],
+                "score": comparison["teams"][0]["scores"][metric]
             }
-        ]
+        await asyncio.to_thread(attach_team_details, rankings["rankings"])
         
-        return APIResponse(
+        return api_response(
             success=True,
             message="团队效能排行获取成功",
-            data={
-                "rankings": team_rankings,
-                "total_teams": len(team_rankings),
-                "avg_score": sum(team["score"] for team in team_rankings) / len(team_rankings)
-            }
+            data=rankings
         )
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"获取团队效能排行失败: {e}")
         raise HTTPException(status_code=500, detail="获取团队效能排行失败")
@@ -309,109 +181,29 @@ async def get_team_rankings(
 
 @router.get("/activities", response_model=APIResponse)
 async def get_recent_activities(
-    limit: int = 20,
-    activity_type: str = None
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    activity_type: Optional[str] = None,
+    team_id: Optional[int] = None,
+    project_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
 ):
-    """获取最近活动"""
+    """获取最近活动(采集器写入的原始事件，按时间倒序游标分页)"""
     try:
-        # 模拟活动数据
-        all_activities = [
-            {
-                "id": 1,
-                "type": "deployment",
-                "title": "生产环境部署",
-                "description": "v2.1.0 版本成功部署到生产环境",
-                "team": "前端团队",
-                "user": "张三",
-                "status": "success",
-                "timestamp": (datetime.now() - timedelta(minutes=30)).isoformat(),
-                "details": {
-                    "version": "v2.1.0",
-                    "environment": "production",
-                    "duration": "5分钟"
-                }
-            },
-            {
-                "id": 2,
-                "type": "commit",
-                "title": "功能开发",
-                "description": "完成用户权限管理模块开发",
-                "team": "后端团队",
-                "user": "李四",
-                "status": "completed",
-                "timestamp": (datetime.now() - timedelta(hours=1)).isoformat(),
-                "details": {
-                    "files_changed": 8,
-                    "lines_added": 245,
-                    "lines_deleted": 32
-                }
-            },
-            {
-                "id": 3,
-                "type": "incident",
-                "title": "性能问题",
-                "description": "API响应时间异常，已修复",
-                "team": "后端团队",
-                "user": "王五",
-                "status": "resolved",
-                "timestamp": (datetime.now() - timedelta(hours=2)).isoformat(),
-                "details": {
-                    "severity": "medium",
-                    "affected_users": 150,
-                    "resolution_time": "45分钟"
-                }
-            },
-            {
-                "id": 4,
-                "type": "review",
-                "title": "代码审查",
-                "description": "完成支付模块代码审查",
-                "team": "前端团队",
-                "user": "赵六",
-                "status": "approved",
-                "timestamp": (datetime.now() - timedelta(hours=3)).isoformat(),
-                "details": {
-                    "pull_request": "#123",
-                    "reviewers": 2,
-                    "comments": 5
-                }
-            },
-            {
-                "id": 5,
-                "type": "test",
-                "title": "自动化测试",
-                "description": "回归测试全部通过",
-                "team": "QA团队",
-                "user": "孙七",
-                "status": "passed",
-                "timestamp": (datetime.now() - timedelta(hours=4)).isoformat(),
-                "details": {
-                    "test_cases": 156,
-                    "passed": 156,
-                    "failed": 0,
-                    "duration": "25分钟"
-                }
-            }
-        ]
-        
-        # 按类型过滤
-        if activity_type:
-            all_activities = [a for a in all_activities if a["type"] == activity_type]
-        
-        # 限制数量
-        activities = all_activities[:limit]
+        page = await asyncio.to_thread(
+            activity_store.list_events, limit, cursor,
+            team_id=team_id, project_id=project_id, event_type=activity_type, since=since, until=until
+        )
         
-        return APIResponse(
+        return api_response(
             success=True,
             message="最近活动获取成功",
-            data={
-                "activities": activities,
-                "total": len(all_activities),
-                "filtered": len(activities),
-                "types": list(set(a["type"] for a in all_activities))
-            }
+            data={**page.to_dict("activities"), "types": list(EVENT_TYPES)}
         )
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"获取最近活动失败: {e}")
         raise HTTPException(status_code=500, detail="获取最近活动失败")
\ No newline at end of file
@@ -1,15 +1,22 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
+import asyncio
 from loguru import logger
 
+from app.core.pagination import pagination_params
+from app.core.responses import api_response
 from app.schemas.schemas import (
     APIResponse, Insight, InsightCreate, InsightUpdate,
     Recommendation, RecommendationCreate, RecommendationUpdate,
-    Prediction, PredictionCreate
+    Prediction, PredictionCreate, PaginationParams,
+    InsightType, SeverityLevel
 )
 from app.services.ai_service import AIService
 from app.services.data_collector import DataCollector
+from app.services.listings import listing_service
+from app.services.job_queue import job_queue
+from app.services.job_handlers import GENERATE_INSIGHTS_JOB
 
 router = APIRouter()
 
@@ -23,164 +30,38 @@ def get_data_collector() -> DataCollector:
 
 @router.get("/", response_model=APIResponse)
 async def get_insights(
-    limit: int = 20,
-    insight_type: Optional[str] = None,
-    severity: Optional[str] = None,
-    ai_service: AIService = Depends(get_ai_service)
+    insight_type: Optional[InsightType] = None,
+    severity: Optional[SeverityLevel] = None,
+    status: Optional[str] = Query(None, pattern="^(open|new|acknowledged|resolved)$"),
+    team_id: Optional[int] = None,
+    project_id: Optional[int] = None,
+    search: Optional[str] = None,
+    sort: Optional[str] = Query(None, pattern="^(created_at|confidence|relevance)$"),
+    pagination: PaginationParams = Depends(pagination_params)
 ):
-    """获取AI洞察列表"""
+    """获取AI洞察列表(游标分页)
+
+    status=open 返回待处理(new + acknowledged)的洞察；search 全文检索标题、描述和建议行动；
+    sort 为 created_at、confidence 或 relevance(需提供 search，有搜索词时默认)，均倒序。
+    """
     try:
-        # 模拟洞察数据
-        insights = [
-            {
-                "id": 1,
-                "title": "部署频率持续下降",
-                "description": "过去两周部署频率从每天1.2次下降到0.8次，建议检查CI/CD流水线效率",
-                "type": "performance",
-                "severity": "medium",
-                "confidence": 0.85,
-                "status": "new",
-                "team_id": 1,
-                "project_id": None,
-                "metrics": {
-                    "deployment_frequency": 0.8,
-                    "trend": "down",
-                    "change_rate": -33.3
-                },
-                "recommendations": [
-                    "优化CI/CD流水线配置",
-                    "减少手动审批环节",
-                    "实施自动化测试"
-                ],
-                "created_by": "ai",
-                "created_at": (datetime.now() - timedelta(hours=2)).isoformat(),
-                "updated_at": None
-            },
-            {
-                "id": 2,
-                "title": "代码质量显著提升",
-                "description": "本月代码审查通过率达到95%，缺陷密度降低40%，团队代码质量意识明显增强",
-                "type": "quality",
-                "severity": "low",
-                "confidence": 0.92,
-                "status": "acknowledged",
-                "team_id": 2,
-                "project_id": 1,
-                "metrics": {
-                    "code_review_pass_rate": 95,
-                    "defect_density": 0.6,
-                    "trend": "up"
-                },
-                "recommendations": [
-                    "继续保持当前的代码审查标准",
-                    "分享最佳实践给其他团队",
-                    "建立代码质量激励机制"
-                ],
-                "created_by": "ai",
-                "created_at": (datetime.now() - timedelta(hours=6)).isoformat(),
-                "updated_at": (datetime.now() - timedelta(hours=1)).isoformat()
-            },
-            {
-                "id": 3,
-                "title": "团队协作效率有待提升",
-                "description": "团队间沟通延迟导致任务阻塞增加，平均等待时间超过预期",
-                "type": "risk",
-                "severity": "high",
-                "confidence": 0.78,
-                "status": "new",
-                "team_id": 3,
-                "project_id": 2,
-                "metrics": {
-                    "collaboration_score": 65,
-                    "waiting_time": 8.5,
-                    "blocked_tasks": 12
-                },
-                "recommendations": [
-                    "建立跨团队日常同步机制",
-                    "使用协作工具提高透明度",
-                    "明确团队间接口和职责"
-                ],
-                "created_by": "ai",
-                "created_at": (datetime.now() - timedelta(hours=12)).isoformat(),
-                "updated_at": None
-            },
-            {
-                "id": 4,
-                "title": "技术债务积累风险",
-                "description": "代码复杂度持续上升，维护成本增加，建议制定技术债务清理计划",
-                "type": "risk",
-                "severity": "medium",
-                "confidence": 0.80,
-                "status": "new",
-                "team_id": 1,
-                "project_id": 1,
-                "metrics": {
-                    "code_complexity": 7.2,
-                    "technical_debt_ratio": 15.3,
-                    "maintenance_time": 25
-                },
-                "recommendations": [
-                    "制定重构计划",
-                    "设置代码复杂度阈值",
-                    "定期进行技术债务评估"
-                ],
-                "created_by": "ai",
-                "created_at": (datetime.now() - timedelta(days=1)).isoformat(),
-                "updated_at": None
-            },
-            {
-                "id": 5,
-                "title": "自动化测试覆盖率提升机会",
-                "description": "当前测试覆盖率为68%，存在提升空间，可以减少手动测试工作量",
-                "type": "opportunity",
-                "severity": "low",
-                "confidence": 0.75,
-                "status": "new",
-                "team_id": 2,
-                "project_id": 1,
-                "metrics": {
-                    "test_coverage": 68,
-                    "manual_test_ratio": 35,
-                    "automation_potential": 25
-                },
-                "recommendations": [
-                    "增加单元测试覆盖率",
-                    "实施集成测试自动化",
-                    "建立测试质量门禁"
-                ],
-                "created_by": "ai",
-                "created_at": (datetime.now() - timedelta(days=2)).isoformat(),
-                "updated_at": None
-            }
-        ]
-        
-        # 按类型过滤
-        if insight_type:
-            insights = [i for i in insights if i["type"] == insight_type]
-        
-        # 按严重程度过滤
-        if severity:
-            insights = [i for i in insights if i["severity"] == severity]
-        
-        # 限制数量
-        insights = insights[:limit]
+        page = await asyncio.to_thread(
+            listing_service.list_insights,
+            pagination.limit, pagination.cursor, pagination.count,
+            insight_type=insight_type.value if insight_type else None,
+            severity=severity.value if severity else None,
+            status=status, team_id=team_id, project_id=project_id,
+            search=search, sort=sort
+        )
         
-        return APIResponse(
+        return api_response(
             success=True,
             message="AI洞察获取成功",
-            data={
-                "insights": insights,
-                "total": len(insights),
-                "summary": {
-                    "new": len([i for i in insights if i["status"] == "new"]),
-                    "acknowledged": len([i for i in insights if i["status"] == "acknowledged"]),
-                    "resolved": len([i for i in insights if i["status"] == "resolved"]),
-                    "high_severity": len([i for i in insights if i["severity"] == "high"]),
-                    "avg_confidence": sum(i["confidence"] for i in insights) / len(insights) if insights else 0
-                }
-            }
+            data=page.to_dict("insights")
         )
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"获取AI洞察失败: {e}")
         raise HTTPException(status_code=500, detail="获取AI洞察失败")
@@ -290,136 +171,44 @@ async def update_insight(insight_id: int, insight_update: InsightUpdate):
 
 @router.get("/recommendations/", response_model=APIResponse)
 async def get_recommendations(
-    limit: int = 20,
     priority: Optional[str] = None,
-    status: Optional[str] = None
+    status: Optional[str] = None,
+    team_id: Optional[int] = None,
+    project_id: Optional[int] = None,
+    search: Optional[str] = None,
+    pagination: PaginationParams = Depends(pagination_params)
 ):
-    """获取改进建议列表"""
+    """获取改进建议列表(游标分页)
+
+    search 全文检索标题和描述，有搜索词时按相关度倒序，否则按创建时间倒序。
+    summary 为当前页的统计。
+    """
     try:
-        # 模拟建议数据
-        recommendations = [
-            {
-                "id": 1,
-                "title": "实施自动化部署流水线",
-                "description": "建立完整的CI/CD自动化流水线，减少手动部署步骤，提高部署频率和可靠性",
-                "type": "process",
-                "priority": "high",
-                "effort": "high",
-                "impact": "high",
-                "status": "pending",
-                "progress": 0,
-                "estimated_duration": 30,
-                "team_id": 1,
-                "team_name": "前端团队",
-                "project_id": 1,
-                "project_name": "主要产品",
-                "insight_id": 1,
-                "expected_benefits": [
-                    "部署频率提升50%",
-                    "部署错误率降低80%",
-                    "人工成本节省60%"
-                ],
-                "implementation_steps": [
-                    "评估现有部署流程",
-                    "设计自动化方案",
-                    "开发部署脚本",
-                    "测试和优化",
-                    "全面推广"
-                ],
-                "created_at": (datetime.now() - timedelta(hours=1)).isoformat(),
-                "updated_at": None
-            },
-            {
-                "id": 2,
-                "title": "建立代码质量门禁",
-                "description": "设置代码质量检查点，确保只有符合质量标准的代码才能合并到主分支",
-                "type": "practice",
-                "priority": "medium",
-                "effort": "medium",
-                "impact": "high",
-                "status": "in_progress",
-                "progress": 35,
-                "estimated_duration": 14,
-                "team_id": 2,
-                "team_name": "后端团队",
-                "project_id": 1,
-                "project_name": "主要产品",
-                "insight_id": 2,
-                "expected_benefits": [
-                    "代码质量提升30%",
-                    "缺陷率降低50%",
-                    "维护成本减少25%"
-                ],
-                "implementation_steps": [
-                    "定义质量标准",
-                    "配置检查工具",
-                    "集成到CI流程",
-                    "团队培训",
-                    "持续优化"
-                ],
-                "created_at": (datetime.now() - timedelta(days=1)).isoformat(),
-                "updated_at": (datetime.now() - timedelta(hours=2)).isoformat()
-            },
-            {
-                "id": 3,
-                "title": "优化团队协作流程",
-                "description": "建立标准化的团队协作流程，减少沟通成本，提高协作效率",
-                "type": "process",
-                "priority": "medium",
-                "effort": "low",
-                "impact": "medium",
-                "status": "completed",
-                "progress": 100,
-                "estimated_duration": 7,
-                "team_id": 3,
-                "team_name": "移动端团队",
-                "project_id": 2,
-                "project_name": "移动应用",
-                "insight_id": 3,
-                "expected_benefits": [
-                    "沟通效率提升40%",
-                    "任务阻塞减少60%",
-                    "团队满意度提升20%"
-                ],
-                "implementation_steps": [
-                    "分析现有流程",
-                    "设计新流程",
-                    "团队培训",
-                    "试点运行",
-                    "全面推广"
-                ],
-                "created_at": (datetime.now() - timedelta(days=3)).isoformat(),
-                "updated_at": (datetime.now() - timedelta(hours=6)).isoformat()
-            }
-        ]
-        
-        # 按优先级过滤
-        if priority:
-            recommendations = [r for r in recommendations if r["priority"] == priority]
-        
-        # 按状态过滤
-        if status:
-            recommendations = [r for r in recommendations if r["status"] == status]
-        
-        # 限制数量
-        recommendations = recommendations[:limit]
+        page = await asyncio.to_thread(
+            listing_service.list_recommendations,
+            pagination.limit, pagination.cursor, pagination.count,
+            priority=priority, status=status, team_id=team_id, project_id=project_id,
+            search=search
+        )
+        recommendations = page.items
         
-        return APIResponse(
+        return api_response(
             success=True,
             message="改进建议获取成功",
             data={
-                "recommendations": recommendations,
-                "total": len(recommendations),
+                **page.to_dict("recommendations"),
                 "summary": {
                     "pending": len([r for r in recommendations if r["status"] == "pending"]),
                     "in_progress": len([r for r in recommendations if r["status"] == "in_progress"]),
                     "completed": len([r for r in recommendations if r["status"] == "completed"]),
                     "high_priority": len([r for r in recommendations if r["priority"] == "high"]),
-                    "avg_progress": sum(r["progress"] for r in recommendations) / len(recommendations) if recommendations else 0
+                    "avg_progress": sum(r["progress"] or 0 for r in recommendations) / len(recommendations) if recommendations else 0
                 }
             }
         )
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"获取改进建议失败: {e}")
         raise HTTPException(status_code=500, detail="获取改进建议失败")
@@ -545,28 +334,26 @@ async def get_predictions(
         raise HTTPException(status_code=500, detail="获取预测分析失败")
 
 
-@router.post("/generate", response_model=APIResponse)
-async def generate_insights(
-    ai_service: AIService = Depends(get_ai_service),
-    data_collector: DataCollector = Depends(get_data_collector)
-):
-    """手动触发AI洞察生成"""
+@router.post("/generate", response_model=APIResponse, status_code=202)
+async def generate_insights(priority: int = 0):
+    """手动触发AI洞察生成
+    
+    提交后台任务并立即返回任务ID，通过 GET /jobs/{job_id} 查询进度和结果。
+    """
     try:
-        # 收集最新数据
-        metrics_data = await data_collector.collect_all_metrics()
-        
-        # 生成AI洞察
-        insights = await ai_service.generate_insights(metrics_data)
+        job, created = await asyncio.to_thread(job_queue.enqueue, GENERATE_INSIGHTS_JOB, priority=priority)
         
         return APIResponse(
             success=True,
-            message=f"成功生成 {len(insights)} 个AI洞察",
+            message="AI洞察生成任务已提交" if created else "已有相同的AI洞察生成任务在执行",
             data={
-                "generated_insights": len(insights),
-                "insights": [insight.dict() for insight in insights]
+                "job_id": job["id"],
+                "status": job["status"],
+                "deduplicated": not created,
+                "status_url": f"/api/v1/jobs/{job['id']}"
             }
         )
         
     except Exception as e:
         logger.error(f"生成AI洞察失败: {e}")
-        raise HTTPException(status_code=500, detail="生成AI洞察失败")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="生成AI洞察失败")
@@ -0,0 +1,27 @@
+import asyncio
+from fastapi import APIRouter, HTTPException
+from loguru import logger
+
+from app.schemas.schemas import APIResponse
+from app.services.job_queue import job_queue
+
+router = APIRouter()
+
+
+@router.get("/{job_id}", response_model=APIResponse)
+async def get_job_status(job_id: str):
+    """获取后台任务状态和进度"""
+    try:
+        job = await asyncio.to_thread(job_queue.get, job_id)
+    except Exception as e:
+        logger.error(f"获取任务状态失败: {e}")
+        raise HTTPException(status_code=500, detail="获取任务状态失败")
+    
+    if job is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    
+    return APIResponse(
+        success=True,
+        message="任务状态获取成功",
+        data=job
+    )
@@ -1,11 +1,17 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
+import asyncio
 from loguru import logger
 
+from app.core.columnar import accepts_arrow, arrow_available, arrow_response, columnar_time_series
+from app.core.http_cache import http_response_cache
+from app.core.responses import api_response
 from app.schemas.schemas import APIResponse
 from app.services.data_collector import DataCollector
 from app.services.ai_service import AIService
+from app.services.job_queue import job_queue
+from app.services.job_handlers import COLLECT_METRICS_JOB
 
 router = APIRouter()
 
@@ -17,16 +23,44 @@ def get_ai_service() -> AIService:
     return AIService()
 
 
+def _response_variant(request: Request, response_format: str) -> str:
+    """时间序列的表示形式: arrow(按 Accept 协商)、columnar 或 rows"""
+    if accepts_arrow(request):
+        if not arrow_available():
+            raise HTTPException(status_code=406, detail="服务端未安装 pyarrow，不支持Arrow格式")
+        return "arrow"
+    return response_format
+
+
+def _metric_response(data: Dict[str, Any], message: str, variant: str):
+    """按表示形式构建指标响应，arrow 只输出时间序列"""
+    if variant == "arrow":
+        return arrow_response(data["time_series"])
+    if variant == "columnar":
+        data = {**data, "time_series": columnar_time_series(data["time_series"])}
+    return api_response(success=True, message=message, data=data)
+
+
 @router.get("/dora", response_model=APIResponse)
 async def get_dora_metrics(
+    request: Request,
     team_id: Optional[int] = None,
     project_id: Optional[int] = None,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     granularity: str = Query(default="daily", regex="^(daily|weekly|monthly)$"),
+    response_format: str = Query(default="rows", alias="format", regex="^(rows|columnar)$"),
     data_collector: DataCollector = Depends(get_data_collector)
 ):
-    """获取DORA指标数据"""
+    """获取DORA指标数据
+    
+    format=columnar 时时间序列按列返回；Accept 为 application/vnd.apache.arrow.stream 时返回 Arrow IPC 流。
+    """
+    variant = _response_variant(request, response_format)
+    cached = http_response_cache.get(request, variant)
+    if cached is not None:
+        return cached
+    
     try:
         # 模拟DORA指标数据
         dora_metrics = {
@@ -114,11 +148,8 @@ async def get_dora_metrics(
             ]
         }
         
-        return APIResponse(
-            success=True,
-            message="DORA指标获取成功",
-            data=dora_metrics
-        )
+        response = _metric_response(dora_metrics, "DORA指标获取成功", variant)
+        return http_response_cache.store(request, response, variant)
         
     except Exception as e:
         logger.error(f"获取DORA指标失败: {e}")
@@ -127,13 +158,20 @@ async def get_dora_metrics(
 
 @router.get("/flow", response_model=APIResponse)
 async def get_flow_metrics(
+    request: Request,
     team_id: Optional[int] = None,
     project_id: Optional[int] = None,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
+    response_format: str = Query(default="rows", alias="format", regex="^(rows|columnar)$"),
     data_collector: DataCollector = Depends(get_data_collector)
 ):
     """获取流动效率指标"""
+    variant = _response_variant(request, response_format)
+    cached = http_response_cache.get(request, variant)
+    if cached is not None:
+        return cached
+    
     try:
         # 模拟流动效率指标数据
         flow_metrics = {
@@ -260,11 +298,8 @@ async def get_flow_metrics(
             ]
         }
         
-        return APIResponse(
-            success=True,
-            message="流动效率指标获取成功",
-            data=flow_metrics
-        )
+        response = _metric_response(flow_metrics, "流动效率指标获取成功", variant)
+        return http_response_cache.store(request, response, variant)
         
     except Exception as e:
         logger.error(f"获取流动效率指标失败: {e}")
@@ -273,12 +308,16 @@ async def get_flow_metrics(
 
 @router.get("/team", response_model=APIResponse)
 async def get_team_metrics(
+    request: Request,
     team_id: Optional[int] = None,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
+    response_format: str = Query(default="rows", alias="format", regex="^(rows|columnar)$"),
     data_collector: DataCollector = Depends(get_data_collector)
 ):
     """获取团队效能指标"""
+    variant = _response_variant(request, response_format)
+    
     try:
         # 模拟团队效能指标数据
         team_metrics = {
@@ -423,11 +462,7 @@ async def get_team_metrics(
             }
         }
         
-        return APIResponse(
-            success=True,
-            message="团队效能指标获取成功",
-            data=team_metrics
-        )
+        return _metric_response(team_metrics, "团队效能指标获取成功", variant)
         
     except Exception as e:
         logger.error(f"获取团队效能指标失败: {e}")
@@ -436,13 +471,17 @@ async def get_team_metrics(
 
 @router.get("/quality", response_model=APIResponse)
 async def get_quality_metrics(
+    request: Request,
     team_id: Optional[int] = None,
     project_id: Optional[int] = None,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
+    response_format: str = Query(default="rows", alias="format", regex="^(rows|columnar)$"),
     data_collector: DataCollector = Depends(get_data_collector)
 ):
     """获取质量指标"""
+    variant = _response_variant(request, response_format)
+    
     try:
         # 模拟质量指标数据
         quality_metrics = {
@@ -584,11 +623,7 @@ async def get_quality_metrics(
             ]
         }
         
-        return APIResponse(
-            success=True,
-            message="质量指标获取成功",
-            data=quality_metrics
-        )
+        return _metric_response(quality_metrics, "质量指标获取成功", variant)
         
     except Exception as e:
         logger.error(f"获取质量指标失败: {e}")
@@ -696,7 +731,7 @@ async def get_custom_metrics(
                     "note": "模拟数据"
                 }
         
-        return APIResponse(
+        return api_response(
             success=True,
             message="自定义指标获取成功",
             data=custom_metrics
@@ -707,66 +742,35 @@ async def get_custom_metrics(
         raise HTTPException(status_code=500, detail="获取自定义指标失败")
 
 
-@router.post("/collect", response_model=APIResponse)
+@router.post("/collect", response_model=APIResponse, status_code=202)
 async def trigger_metrics_collection(
     team_id: Optional[int] = None,
     project_id: Optional[int] = None,
-    metric_types: Optional[List[str]] = None,
-    data_collector: DataCollector = Depends(get_data_collector)
+    metric_types: Optional[List[str]] = Query(None),
+    priority: int = 0
 ):
-    """手动触发指标数据采集"""
+    """手动触发指标数据采集
+    
+    提交后台采集任务并立即返回任务ID，通过 GET /jobs/{job_id} 查询进度和结果。
+    数据源按整个组织采集，team_id/project_id 不影响采集范围(保留参数以兼容旧调用)。
+    """
     try:
-        # 模拟数据采集过程
-        collection_result = {
-            "collection_id": f"collection_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
-            "status": "completed",
-            "start_time": (datetime.now() - timedelta(minutes=2)).isoformat(),
-            "end_time": datetime.now().isoformat(),
-            "duration_seconds": 120,
-            "collected_metrics": {
-                "dora_metrics": {
-                    "deployment_frequency": True,
-                    "lead_time": True,
-                    "change_failure_rate": True,
-                    "recovery_time": True
-                },
-                "flow_metrics": {
-                    "flow_efficiency": True,
-                    "cycle_time": True,
-                    "throughput": True,
-                    "work_in_progress": True
-                },
-                "team_metrics": {
-                    "productivity": True,
-                    "collaboration": True,
-                    "satisfaction": True,
-                    "skill_growth": True
-                },
-                "quality_metrics": {
-                    "defect_density": True,
-                    "test_coverage": True,
-                    "code_quality": True,
-                    "technical_debt": True
-                }
-            },
-            "data_sources": {
-                "github": {"status": "success", "records": 1250},
-                "jira": {"status": "success", "records": 890},
-                "jenkins": {"status": "success", "records": 340},
-                "sonarqube": {"status": "success", "records": 156}
-            },
-            "errors": [],
-            "warnings": [
-                "部分历史数据缺失，使用默认值填充",
-                "GitHub API速率限制，部分数据延迟更新"
-            ],
-            "next_scheduled_collection": (datetime.now() + timedelta(hours=1)).isoformat()
-        }
+        job, created = await asyncio.to_thread(
+            job_queue.enqueue,
+            COLLECT_METRICS_JOB,
+            params={"metric_types": sorted(metric_types) if metric_types else None},
+            priority=priority
+        )
         
         return APIResponse(
             success=True,
-            message="指标数据采集完成",
-            data=collection_result
+            message="指标数据采集任务已提交" if created else "已有相同的指标数据采集任务在执行",
+            data={
+                "job_id": job["id"],
+                "status": job["status"],
+                "deduplicated": not created,
+                "status_url": f"/api/v1/jobs/{job['id']}"
+            }
         )
         
     except Exception as e:
@@ -864,7 +868,7 @@ async def get_metrics_summary(
             }
         }
         
-        return APIResponse(
+        return api_response(
             success=True,
             message="指标汇总获取成功",
             data=metrics_summary
@@ -1,13 +1,19 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
+import asyncio
 from loguru import logger
 
+from app.core.pagination import pagination_params
+from app.core.responses import api_response
 from app.schemas.schemas import (
     APIResponse, Project, ProjectCreate, ProjectUpdate,
-    PaginatedResponse
+    PaginatedResponse, PaginationParams
 )
+from app.services.activity_store import activity_store
+from app.services.comparison import comparison_engine, parse_ids
 from app.services.data_collector import DataCollector
+from app.services.listings import listing_service
 
 router = APIRouter()
 
@@ -18,203 +24,61 @@ def get_data_collector() -> DataCollector:
 
 @router.get("/", response_model=APIResponse)
 async def get_projects(
-    skip: int = 0,
-    limit: int = 20,
     search: Optional[str] = None,
     status: Optional[str] = None,
-    team_id: Optional[int] = None
+    team_id: Optional[int] = None,
+    pagination: PaginationParams = Depends(pagination_params)
 ):
-    """获取项目列表"""
+    """获取项目列表(游标分页)"""
     try:
-        # 模拟项目数据
-        projects = [
-            {
-                "id": 1,
-                "name": "主要产品",
-                "description": "公司核心产品的Web和移动端应用开发",
-                "status": "active",
-                "priority": "high",
-                "start_date": "2023-01-01",
-                "end_date": "2024-12-31",
-                "progress": 65,
-                "budget": 5000000,
-                "spent": 3250000,
-                "team_count": 3,
-                "member_count": 18,
-                "technologies": ["React", "Python", "PostgreSQL", "Redis"],
-                "performance_score": 82.5,
-                "health_status": "good",
-                "created_at": "2023-01-01T09:00:00Z",
-                "updated_at": "2024-01-10T16:30:00Z",
-                "metrics": {
-                    "velocity": 42,
-                    "quality_score": 85,
-                    "on_time_delivery": 88,
-                    "budget_utilization": 65
-                },
-                "teams": [
-                    {"id": 1, "name": "前端团队", "role": "UI开发"},
-                    {"id": 2, "name": "后端团队", "role": "API开发"},
-                    {"id": 5, "name": "QA团队", "role": "质量保证"}
-                ]
-            },
-            {
-                "id": 2,
-                "name": "移动应用",
-                "description": "iOS和Android原生移动应用开发项目",
-                "status": "active",
-                "priority": "medium",
-                "start_date": "2023-06-01",
-                "end_date": "2024-06-30",
-                "progress": 45,
-                "budget": 2000000,
-                "spent": 900000,
-                "team_count": 2,
-                "member_count": 10,
-                "technologies": ["Swift", "Kotlin", "React Native", "Firebase"],
-                "performance_score": 75.8,
-                "health_status": "warning",
-                "created_at": "2023-06-01T10:00:00Z",
-                "updated_at": "2024-01-08T14:20:00Z",
-                "metrics": {
-                    "velocity": 35,
-                    "quality_score": 78,
-                    "on_time_delivery": 72,
-                    "budget_utilization": 45
-                },
-                "teams": [
-                    {"id": 3, "name": "移动端团队", "role": "原生开发"},
-                    {"id": 5, "name": "QA团队", "role": "测试"}
-                ]
-            },
-            {
-                "id": 3,
-                "name": "数据平台",
-                "description": "企业级数据分析和BI平台建设",
-                "status": "active",
-                "priority": "medium",
-                "start_date": "2023-09-01",
-                "end_date": "2024-09-30",
-                "progress": 30,
-                "budget": 3000000,
-                "spent": 900000,
-                "team_count": 2,
-                "member_count": 12,
-                "technologies": ["Python", "Apache Spark", "Elasticsearch", "Tableau"],
-                "performance_score": 78.2,
-                "health_status": "good",
-                "created_at": "2023-09-01T11:00:00Z",
-                "updated_at": "2024-01-09T13:45:00Z",
-                "metrics": {
-                    "velocity": 38,
-                    "quality_score": 88,
-                    "on_time_delivery": 85,
-                    "budget_utilization": 30
-                },
-                "teams": [
-                    {"id": 2, "name": "后端团队", "role": "数据处理"},
-                    {"id": 4, "name": "DevOps团队", "role": "基础设施"}
-                ]
-            },
-            {
-                "id": 4,
-                "name": "基础设施升级",
-                "description": "云原生基础设施和CI/CD流水线升级",
-                "status": "completed",
-                "priority": "high",
-                "start_date": "2023-03-01",
-                "end_date": "2023-12-31",
-                "progress": 100,
-                "budget": 1500000,
-                "spent": 1450000,
-                "team_count": 1,
-                "member_count": 4,
-                "technologies": ["Kubernetes", "Docker", "Terraform", "Jenkins"],
-                "performance_score": 92.1,
-                "health_status": "excellent",
-                "created_at": "2023-03-01T08:00:00Z",
-                "updated_at": "2023-12-31T17:00:00Z",
-                "metrics": {
-                    "velocity": 28,
-                    "quality_score": 95,
-                    "on_time_delivery": 100,
-                    "budget_utilization": 97
-                },
-                "teams": [
-                    {"id": 4, "name": "DevOps团队", "role": "基础设施"}
-                ]
-            },
-            {
-                "id": 5,
-                "name": "AI助手集成",
-                "description": "在产品中集成AI助手功能",
-                "status": "planning",
-                "priority": "low",
-                "start_date": "2024-03-01",
-                "end_date": "2024-08-31",
-                "progress": 5,
-                "budget": 1200000,
-                "spent": 60000,
-                "team_count": 2,
-                "member_count": 8,
-                "technologies": ["Python", "TensorFlow", "OpenAI API", "FastAPI"],
-                "performance_score": 0,
-                "health_status": "planning",
-                "created_at": "2024-01-15T12:00:00Z",
-                "updated_at": "2024-01-15T12:00:00Z",
-                "metrics": {
-                    "velocity": 0,
-                    "quality_score": 0,
-                    "on_time_delivery": 0,
-                    "budget_utilization": 5
-                },
-                "teams": [
-                    {"id": 1, "name": "前端团队", "role": "UI集成"},
-                    {"id": 2, "name": "后端团队", "role": "AI服务"}
-                ]
-            }
-        ]
-        
-        # 搜索过滤
-        if search:
-            projects = [p for p in projects if search.lower() in p["name"].lower() or search.lower() in p["description"].lower()]
-        
-        # 状态过滤
-        if status:
-            projects = [p for p in projects if p["status"] == status]
-        
-        # 团队过滤
-        if team_id:
-            projects = [p for p in projects if any(t["id"] == team_id for t in p["teams"])]
-        
-        # 分页
-        total = len(projects)
-        projects = projects[skip:skip + limit]
+        page = await asyncio.to_thread(
+            listing_service.list_projects,
+            pagination.limit, pagination.cursor, pagination.count,
+            search=search, status=status, team_id=team_id
+        )
         
-        return APIResponse(
+        return api_response(
             success=True,
             message="项目列表获取成功",
-            data={
-                "projects": projects,
-                "total": total,
-                "skip": skip,
-                "limit": limit,
-                "summary": {
-                    "total_projects": total,
-                    "active_projects": len([p for p in projects if p["status"] == "active"]),
-                    "completed_projects": len([p for p in projects if p["status"] == "completed"]),
-                    "total_budget": sum(p["budget"] for p in projects),
-                    "total_spent": sum(p["spent"] for p in projects),
-                    "avg_progress": sum(p["progress"] for p in projects) / len(projects) if projects else 0
-                }
-            }
+            data=page.to_dict("projects")
         )
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"获取项目列表失败: {e}")
         raise HTTPException(status_code=500, detail="获取项目列表失败")
 
 
+@router.get("/comparison", response_model=APIResponse)
+async def get_projects_comparison(
+    project_ids: str,  # 逗号分隔的项目ID
+    metric: str = "overall",
+    days: int = Query(90, ge=1, le=730)
+):
+    """获取项目对比分析
+    
+    最近 days 天的项目指标历史一次性读取后向量化计算变化量、组内 z-score、排名变化和走势相关性，
+    按 metric 指标(overall 为健康度)的最新值排序。
+    """
+    try:
+        project_id_list = parse_ids(project_ids, "project_ids")
+        comparison = await asyncio.to_thread(comparison_engine.compare, "project", project_id_list, metric, days)
+        comparison["projects"] = comparison.pop("entities")
+        
+        return api_response(
+            success=True,
+            message="项目对比分析获取成功",
+            data=comparison
+        )
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"获取项目对比分析失败: {e}")
+        raise HTTPException(status_code=500, detail="获取项目对比分析失败")
+
+
 @router.get("/{project_id}", response_model=APIResponse)
 async def get_project_detail(project_id: int):
     """获取项目详情"""
@@ -614,95 +478,31 @@ async def get_project_metrics(
 
 
 @router.get("/{project_id}/timeline", response_model=APIResponse)
-async def get_project_timeline(project_id: int):
-    """获取项目时间线"""
+async def get_project_timeline(
+    project_id: int,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    event_type: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+):
+    """获取项目时间线
+
+    events 为采集器写入的项目原始事件，按时间倒序游标分页；phases 和 critical_path 为项目计划数据。
+    事件在每次采集后实时变化(并通过实时推送通知客户端刷新)，因此不使用响应缓存。
+    """
     try:
-        # 模拟项目时间线数据
+        page = await asyncio.to_thread(
+            activity_store.list_events, limit, cursor,
+            project_id=project_id, event_type=event_type, since=since, until=until
+        )
+        
         timeline_data = {
             "project_id": project_id,
-            "events": [
-                {
-                    "id": 1,
-                    "date": "2023-01-01",
-                    "type": "milestone",
-                    "title": "项目启动",
-                    "description": "项目正式启动，团队组建完成",
-                    "status": "completed",
-                    "participants": ["项目经理", "技术负责人"]
-                },
-                {
-                    "id": 2,
-                    "date": "2023-01-15",
-                    "type": "development",
-                    "title": "需求分析完成",
-                    "description": "完成详细需求分析和技术方案设计",
-                    "status": "completed",
-                    "participants": ["产品经理", "架构师"]
-                },
-                {
-                    "id": 3,
-                    "date": "2023-02-01",
-                    "type": "development",
-                    "title": "开发环境搭建",
-                    "description": "完成开发、测试、生产环境搭建",
-                    "status": "completed",
-                    "participants": ["DevOps团队"]
-                },
-                {
-                    "id": 4,
-                    "date": "2023-06-28",
-                    "type": "milestone",
-                    "title": "MVP发布",
-                    "description": "最小可行产品版本成功发布",
-                    "status": "completed",
-                    "participants": ["全体团队"]
-                },
-                {
-                    "id": 5,
-                    "date": "2023-12-20",
-                    "type": "milestone",
-                    "title": "Beta版本发布",
-                    "description": "功能完整的Beta测试版本发布",
-                    "status": "completed",
-                    "participants": ["全体团队"]
-                },
-                {
-                    "id": 6,
-                    "date": "2024-01-10",
-                    "type": "development",
-                    "title": "用户认证模块",
-                    "description": "完成用户认证和权限管理模块",
-                    "status": "completed",
-                    "participants": ["后端团队"]
-                },
-                {
-                    "id": 7,
-                    "date": "2024-02-15",
-                    "type": "development",
-                    "title": "支付系统集成",
-                    "description": "集成第三方支付系统",
-                    "status": "in_progress",
-                    "participants": ["后端团队", "前端团队"]
-                },
-                {
-                    "id": 8,
-                    "date": "2024-06-30",
-                    "type": "milestone",
-                    "title": "正式版本发布",
-                    "description": "产品正式版本发布上线",
-                    "status": "planned",
-                    "participants": ["全体团队"]
-                },
-                {
-                    "id": 9,
-                    "date": "2024-12-31",
-                    "type": "milestone",
-                    "title": "项目完成",
-                    "description": "项目所有功能开发完成",
-                    "status": "planned",
-                    "participants": ["全体团队"]
-                }
-            ],
+            "events": page.items,
+            "limit": page.limit,
+            "has_more": page.has_more,
+            "next_cursor": page.next_cursor,
             "phases": [
                 {
                     "name": "需求分析",
@@ -749,89 +549,14 @@ async def get_project_timeline(project_id: int):
             ]
         }
         
-        return APIResponse(
+        return api_response(
             success=True,
             message="项目时间线获取成功",
             data=timeline_data
         )
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"获取项目时间线失败: {e}")
         raise HTTPException(status_code=500, detail="获取项目时间线失败")
-
-
-@router.get("/comparison", response_model=APIResponse)
-async def get_projects_comparison(
-    project_ids: str,  # 逗号分隔的项目ID
-    metric: str = "overall"
-):
-    """获取项目对比分析"""
-    try:
-        # 解析项目ID
-        project_id_list = [int(id.strip()) for id in project_ids.split(",")]
-        
-        # 模拟项目对比数据
-        comparison_data = {
-            "projects": [
-                {
-                    "id": 1,
-                    "name": "主要产品",
-                    "status": "active",
-                    "progress": 65,
-                    "performance_score": 82.5,
-                    "budget_utilization": 65,
-                    "on_time_delivery": 88,
-                    "quality_score": 85,
-                    "team_satisfaction": 82
-                },
-                {
-                    "id": 2,
-                    "name": "移动应用",
-                    "status": "active",
-                    "progress": 45,
-                    "performance_score": 75.8,
-                    "budget_utilization": 45,
-                    "on_time_delivery": 72,
-                    "quality_score": 78,
-                    "team_satisfaction": 75
-                },
-                {
-                    "id": 3,
-                    "name": "数据平台",
-                    "status": "active",
-                    "progress": 30,
-                    "performance_score": 78.2,
-                    "budget_utilization": 30,
-                    "on_time_delivery": 85,
-                    "quality_score": 88,
-                    "team_satisfaction": 80
-                }
-            ],
-            "insights": [
-                "主要产品项目整体表现最佳，进度和质量都很好",
-                "移动应用项目需要关注进度和交付时间",
-                "数据平台项目质量很高，但进度相对较慢",
-                "所有项目的团队满意度都在可接受范围内"
-            ],
-            "recommendations": [
-                "为移动应用项目增加资源投入",
-                "优化数据平台项目的开发流程",
-                "在项目间分享最佳实践",
-                "建立项目间的协作机制"
-            ],
-            "benchmark": {
-                "industry_avg_performance": 75.0,
-                "industry_avg_delivery": 80.0,
-                "industry_avg_quality": 82.0
-            }
-        }
-        
-        return APIResponse(
-            success=True,
-            message="项目对比分析获取成功",
-            data=comparison_data
-        )
-        
-    except Exception as e:
-        logger.error(f"获取项目对比分析失败: {e}")
-        raise HTTPException(status_code=500, detail="获取项目对比分析失败")
\ No newline at end of file
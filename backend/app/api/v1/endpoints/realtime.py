@@ -0,0 +1,80 @@
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect
+from typing import Optional
+import asyncio
+from loguru import logger
+
+from app.core.config import settings
+from app.services.event_bus import TOPICS, event_bus
+
+router = APIRouter()
+
+
+def _parse_topics(topics: Optional[str]):
+    return [topic.strip() for topic in topics.split(",") if topic.strip()] if topics else TOPICS
+
+
+@router.websocket("/ws")
+async def realtime_websocket(
+    websocket: WebSocket,
+    topics: Optional[str] = Query(None, description="逗号分隔的订阅主题: metrics, insights, activities，默认全部"),
+    team_id: Optional[int] = None,
+    project_id: Optional[int] = None
+):
+    """实时推送WebSocket
+    
+    连接参数指定订阅的主题和团队/项目，连接后可发送 {"type": "subscribe", "topics": [...], "team_id": ..., "project_id": ...} 修改订阅；
+    服务端推送 {"type": 主题, "team_id", "project_id", "data", "timestamp"} 增量事件，空闲时每 WS_HEARTBEAT_INTERVAL 秒推送 ping。
+    """
+    await websocket.accept()
+    try:
+        subscription = event_bus.subscribe(_parse_topics(topics), team_id, project_id)
+    except ValueError as e:
+        await websocket.send_json({"type": "error", "message": str(e)})
+        await websocket.close(code=1008)
+        return
+    
+    # 独立读取客户端消息，断开时通知发送循环结束
+    async def read_messages():
+        try:
+            while True:
+                try:
+                    payload = await websocket.receive_json()
+                except (ValueError, TypeError, KeyError):
+                    payload = None
+                if not isinstance(payload, dict) or payload.get("type") not in ("subscribe", "pong"):
+                    await websocket.send_json({"type": "error", "message": "消息格式错误"})
+                    continue
+                if payload["type"] == "subscribe":
+                    try:
+                        subscription.update(payload.get("topics") or TOPICS, payload.get("team_id"), payload.get("project_id"))
+                    except (ValueError, TypeError) as e:
+                        await websocket.send_json({"type": "error", "message": str(e)})
+                        continue
+                    await websocket.send_json({"type": "subscribed", "topics": sorted(subscription.topics)})
+        except (WebSocketDisconnect, RuntimeError):
+            pass
+        finally:
+            subscription.close()
+    
+    reader = asyncio.create_task(read_messages())
+    try:
+        await websocket.send_json({"type": "subscribed", "topics": sorted(subscription.topics)})
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.queue.get(), timeout=settings.WS_HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                await websocket.send_json({"type": "ping"})
+                continue
+            
+            if message is None:
+                break
+            await websocket.send_text(message)
+    
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    except Exception as e:
+        logger.error(f"实时推送WebSocket异常: {e}")
+    finally:
+        event_bus.unsubscribe(subscription)
+        reader.cancel()
+        await asyncio.gather(reader, return_exceptions=True)
@@ -1,14 +1,20 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
+import asyncio
 from loguru import logger
 
+from app.core.pagination import pagination_params
+from app.core.responses import api_response
 from app.schemas.schemas import (
     APIResponse, Team, TeamCreate, TeamUpdate,
     TeamMember, TeamMemberCreate, TeamMemberUpdate,
-    PaginatedResponse
+    PaginatedResponse, PaginationParams
 )
 from app.services.data_collector import DataCollector
+from app.services.comparison import comparison_engine, parse_ids
+from app.services.listings import listing_service
+from app.services.team_rankings import team_rankings
 
 router = APIRouter()
 
@@ -19,156 +25,66 @@ def get_data_collector() -> DataCollector:
 
 @router.get("/", response_model=APIResponse)
 async def get_teams(
-    skip: int = 0,
-    limit: int = 20,
     search: Optional[str] = None,
-    status: Optional[str] = None
+    status: Optional[str] = None,
+    pagination: PaginationParams = Depends(pagination_params)
 ):
-    """获取团队列表"""
+    """获取团队列表(游标分页)"""
     try:
-        # 模拟团队数据
-        teams = [
-            {
-                "id": 1,
-                "name": "前端团队",
-                "description": "负责Web前端和移动端UI开发",
-                "status": "active",
-                "team_lead_id": 1,
-                "team_lead_name": "张三",
-                "member_count": 8,
-                "projects": ["主要产品", "移动应用"],
-                "technologies": ["React", "Vue.js", "TypeScript", "Tailwind CSS"],
-                "performance_score": 85.2,
-                "productivity_trend": "up",
-                "created_at": "2023-01-15T10:00:00Z",
-                "updated_at": "2024-01-10T15:30:00Z",
-                "metrics": {
-                    "velocity": 45,
-                    "quality_score": 88,
-                    "satisfaction": 82,
-                    "collaboration": 90
-                }
-            },
-            {
-                "id": 2,
-                "name": "后端团队",
-                "description": "负责服务端API开发和系统架构",
-                "status": "active",
-                "team_lead_id": 2,
-                "team_lead_name": "李四",
-                "member_count": 10,
-                "projects": ["主要产品", "数据平台"],
-                "technologies": ["Python", "FastAPI", "PostgreSQL", "Redis"],
-                "performance_score": 78.9,
-                "productivity_trend": "stable",
-                "created_at": "2023-01-15T10:00:00Z",
-                "updated_at": "2024-01-08T09:15:00Z",
-                "metrics": {
-                    "velocity": 38,
-                    "quality_score": 92,
-                    "satisfaction": 75,
-                    "collaboration": 85
-                }
-            },
-            {
-                "id": 3,
-                "name": "移动端团队",
-                "description": "负责iOS和Android原生应用开发",
-                "status": "active",
-                "team_lead_id": 3,
-                "team_lead_name": "王五",
-                "member_count": 6,
-                "projects": ["移动应用"],
-                "technologies": ["Swift", "Kotlin", "React Native", "Flutter"],
-                "performance_score": 72.5,
-                "productivity_trend": "down",
-                "created_at": "2023-03-01T14:00:00Z",
-                "updated_at": "2024-01-05T11:45:00Z",
-                "metrics": {
-                    "velocity": 32,
-                    "quality_score": 78,
-                    "satisfaction": 68,
-                    "collaboration": 75
-                }
-            },
-            {
-                "id": 4,
-                "name": "DevOps团队",
-                "description": "负责基础设施和CI/CD流水线",
-                "status": "active",
-                "team_lead_id": 4,
-                "team_lead_name": "赵六",
-                "member_count": 4,
-                "projects": ["基础设施", "监控系统"],
-                "technologies": ["Docker", "Kubernetes", "Jenkins", "Terraform"],
-                "performance_score": 88.7,
-                "productivity_trend": "up",
-                "created_at": "2023-02-01T09:00:00Z",
-                "updated_at": "2024-01-12T16:20:00Z",
-                "metrics": {
-                    "velocity": 28,
-                    "quality_score": 95,
-                    "satisfaction": 85,
-                    "collaboration": 88
-                }
-            },
-            {
-                "id": 5,
-                "name": "QA团队",
-                "description": "负责质量保证和自动化测试",
-                "status": "active",
-                "team_lead_id": 5,
-                "team_lead_name": "孙七",
-                "member_count": 5,
-                "projects": ["测试框架", "质量监控"],
-                "technologies": ["Selenium", "Jest", "Cypress", "JMeter"],
-                "performance_score": 81.3,
-                "productivity_trend": "up",
-                "created_at": "2023-01-20T13:00:00Z",
-                "updated_at": "2024-01-09T14:10:00Z",
-                "metrics": {
-                    "velocity": 35,
-                    "quality_score": 90,
-                    "satisfaction": 78,
-                    "collaboration": 82
-                }
-            }
-        ]
-        
-        # 搜索过滤
-        if search:
-            teams = [t for t in teams if search.lower() in t["name"].lower() or search.lower() in t["description"].lower()]
-        
-        # 状态过滤
-        if status:
-            teams = [t for t in teams if t["status"] == status]
-        
-        # 分页
-        total = len(teams)
-        teams = teams[skip:skip + limit]
+        page = await asyncio.to_thread(
+            listing_service.list_teams,
+            pagination.limit, pagination.cursor, pagination.count,
+            search=search, status=status
+        )
         
-        return APIResponse(
+        return api_response(
             success=True,
             message="团队列表获取成功",
-            data={
-                "teams": teams,
-                "total": total,
-                "skip": skip,
-                "limit": limit,
-                "summary": {
-                    "total_teams": total,
-                    "active_teams": len([t for t in teams if t["status"] == "active"]),
-                    "total_members": sum(t["member_count"] for t in teams),
-                    "avg_performance": sum(t["performance_score"] for t in teams) / len(teams) if teams else 0
-                }
-            }
+            data=page.to_dict("teams")
         )
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"获取团队列表失败: {e}")
         raise HTTPException(status_code=500, detail="获取团队列表失败")
 
 
+@router.get("/comparison", response_model=APIResponse)
+async def get_teams_comparison(
+    team_ids: str,  # 逗号分隔的团队ID
+    metric: str = "overall",
+    days: int = Query(90, ge=1, le=730)
+):
+    """获取团队对比分析
+    
+    最近 days 天的指标历史一次性读取后向量化计算变化量、组内 z-score、排名变化和走势相关性，
+    按 metric 指标的最新值排序；global_ranks 为各团队在全部团队中的排名(来自团队排行索引)。
+    """
+    try:
+        team_id_list = parse_ids(team_ids, "team_ids")
+        comparison = await asyncio.to_thread(comparison_engine.compare, "team", team_id_list, metric, days)
+
+        rankings = await asyncio.to_thread(team_rankings.compare, [team["id"] for team in comparison["entities"]])
+        global_ranks = {team["id"]: team["ranks"] for team in rankings["teams"]}
+        for team in comparison["entities"]:
+            team["global_ranks"] = global_ranks[team["id"]]
+        comparison["total_teams"] = rankings["total_teams"]
+        comparison["teams"] = comparison.pop("entities")
+
+        return api_response(
+            success=True,
+            message="团队对比分析获取成功",
+            data=comparison
+        )
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"获取团队对比分析失败: {e}")
+        raise HTTPException(status_code=500, detail="获取团队对比分析失败")
+
+
 @router.get("/{team_id}", response_model=APIResponse)
 async def get_team_detail(team_id: int):
     """获取团队详情"""
@@ -611,75 +527,3 @@ async def get_team_performance(
     except Exception as e:
         logger.error(f"获取团队效能分析失败: {e}")
         raise HTTPException(status_code=500, detail="获取团队效能分析失败")
-
-
-@router.get("/comparison", response_model=APIResponse)
-async def get_teams_comparison(
-    team_ids: str,  # 逗号分隔的团队ID
-    metric: str = "overall"
-):
-    """获取团队对比分析"""
-    try:
-        # 解析团队ID
-        team_id_list = [int(id.strip()) for id in team_ids.split(",")]
-        
-        # 模拟团队对比数据
-        comparison_data = {
-            "teams": [
-                {
-                    "id": 1,
-                    "name": "前端团队",
-                    "overall_score": 85.2,
-                    "velocity": 45,
-                    "quality": 88,
-                    "satisfaction": 82,
-                    "collaboration": 90,
-                    "deployment_frequency": 1.2,
-                    "lead_time": 2.5
-                },
-                {
-                    "id": 2,
-                    "name": "后端团队",
-                    "overall_score": 78.9,
-                    "velocity": 38,
-                    "quality": 92,
-                    "satisfaction": 75,
-                    "collaboration": 85,
-                    "deployment_frequency": 0.9,
-                    "lead_time": 3.1
-                },
-                {
-                    "id": 3,
-                    "name": "移动端团队",
-                    "overall_score": 72.5,
-                    "velocity": 32,
-                    "quality": 78,
-                    "satisfaction": 68,
-                    "collaboration": 75,
-                    "deployment_frequency": 0.7,
-                    "lead_time": 4.2
-                }
-            ],
-            "insights": [
-                "前端团队在协作和整体效能方面表现最佳",
-                "后端团队代码质量最高，但部署频率有待提升",
-                "移动端团队在各项指标上都有改进空间",
-                "团队间可以加强知识分享和最佳实践交流"
-            ],
-            "recommendations": [
-                "组织跨团队技术分享会",
-                "建立团队间协作机制",
-                "制定统一的质量标准",
-                "实施团队效能提升计划"
-            ]
-        }
-        
-        return APIResponse(
-            success=True,
-            message="团队对比分析获取成功",
-            data=comparison_data
-        )
-        
-    except Exception as e:
-        logger.error(f"获取团队对比分析失败: {e}")
-        raise HTTPException(status_code=500, detail="获取团队对比分析失败")
\ No newline at end of file
@@ -0,0 +1,141 @@
+import importlib.util
+import json
+from datetime import date
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.core.lazy import LazyModule
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+else:
+    pa = LazyModule("pyarrow")
+
+
+# Arrow IPC 流格式的媒体类型
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+# 时间序列的时间列和数值列
+DATE_KEY = "date"
+VALUE_KEY = "value"
+
+
+def arrow_available() -> bool:
+    """是否安装了 pyarrow(可选依赖)"""
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def _media_qualities(accept: str) -> Dict[str, float]:
+    """解析 Accept 头: {媒体范围: q值}"""
+    qualities = {}
+    for item in accept.split(","):
+        media_range, *params = item.split(";")
+        media_range = media_range.strip().lower()
+        if not media_range:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[media_range] = quality
+    return qualities
+
+
+def accepts_arrow(request: Request) -> bool:
+    """请求是否要求 Arrow IPC 格式
+
+    JSON 为默认格式，Arrow 需在 Accept 中显式列出(通配符不算)，q值大于0且不低于 JSON 的q值。
+    """
+    qualities = _media_qualities(request.headers.get("accept", ""))
+    arrow = qualities.get(ARROW_STREAM_MEDIA_TYPE, 0.0)
+    json_quality = next(
+        (qualities[media_range] for media_range in ("application/json", "application/*", "*/*") if media_range in qualities),
+        0.0
+    )
+    return arrow > 0 and arrow >= json_quality
+
+
+def common_filters(time_series: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """所有数据点取值都相同的字段(如 team_id、project_id)，只需声明一次"""
+    points = [point for series in time_series.values() for point in series]
+    if not points:
+        return {}
+
+    keys = set(points[0]) - {DATE_KEY, VALUE_KEY}
+    filters = {}
+    for key in sorted(keys):
+        value = points[0][key]
+        if all(key in point and point[key] == value for point in points):
+            filters[key] = value
+    return filters
+
+
+def to_columnar(series: List[Dict[str, Any]], filters: Optional[Dict[str, Any]] = None) -> Dict[str, List[Any]]:
+    """将 [{date, value, ...}] 转为 {dates: [...], values: [...], ...}，filters 中的字段不再逐点重复"""
+    filters = filters or {}
+    columns: Dict[str, List[Any]] = {
+        "dates": [point.get(DATE_KEY) for point in series],
+        "values": [point.get(VALUE_KEY) for point in series]
+    }
+
+    extra_keys = sorted({key for point in series for key in point} - {DATE_KEY, VALUE_KEY} - set(filters))
+    for key in extra_keys:
+        columns[key] = [point.get(key) for point in series]
+    return columns
+
+
+def columnar_time_series(time_series: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """按指标转换为列式时间序列，公共筛选条件放在 filters 中"""
+    filters = common_filters(time_series)
+    return {
+        "filters": filters,
+        "series": {metric: to_columnar(series, filters) for metric, series in time_series.items()}
+    }
+
+
+def _parse_date(value: Any) -> Any:
+    if isinstance(value, str):
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            return value
+    return value
+
+
+def arrow_time_series(time_series: Dict[str, List[Dict[str, Any]]], metadata: Optional[Dict[str, Any]] = None) -> bytes:
+    """将时间序列编码为 Arrow IPC 流
+
+    长表格式: metric(字典编码)、date、value 以及各指标特有的字段；
+    公共筛选条件和附加信息以JSON写入 schema 元数据(filters、metadata)。
+    """
+    filters = common_filters(time_series)
+    points = [(metric, point) for metric, series in time_series.items() for point in series]
+    extra_keys = sorted({key for _, point in points for key in point} - {DATE_KEY, VALUE_KEY} - set(filters))
+
+    arrays = {
+        "metric": pa.array([metric for metric, _ in points], type=pa.string()).dictionary_encode(),
+        DATE_KEY: pa.array([_parse_date(point.get(DATE_KEY)) for _, point in points]),
+        VALUE_KEY: pa.array([point.get(VALUE_KEY) for _, point in points], type=pa.float64())
+    }
+    for key in extra_keys:
+        arrays[key] = pa.array([point.get(key) for _, point in points])
+
+    schema_metadata = {"filters": json.dumps(filters, ensure_ascii=False, default=str)}
+    if metadata:
+        schema_metadata["metadata"] = json.dumps(metadata, ensure_ascii=False, default=str)
+    table = pa.table(arrays).replace_schema_metadata(schema_metadata)
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def arrow_response(time_series: Dict[str, List[Dict[str, Any]]], metadata: Optional[Dict[str, Any]] = None) -> Response:
+    """Arrow IPC 流响应"""
+    return Response(arrow_time_series(time_series, metadata), media_type=ARROW_STREAM_MEDIA_TYPE)
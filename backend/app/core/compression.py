@@ -0,0 +1,229 @@
+import gzip
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # brotli 为可选依赖，未安装时只使用 gzip
+    brotli = None
+
+
+# 可压缩的内容类型(前缀匹配)
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/x-ndjson",
+    "image/svg+xml"
+)
+
+
+def available_encodings() -> List[str]:
+    """服务端支持的编码，按优先级排列"""
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def negotiate_encoding(accept_encoding: Optional[str], encodings: Optional[Iterable[str]] = None) -> Optional[str]:
+    """根据 Accept-Encoding 选择编码，q 值相同时按服务端优先级；不需要压缩时返回None"""
+    if not accept_encoding:
+        return None
+
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            weights[name.strip().lower()] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in (encodings or available_encodings()):
+        quality = weights.get(encoding, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    """内容类型是否值得压缩"""
+    return bool(content_type) and content_type.lower().startswith(COMPRESSIBLE_TYPES)
+
+
+def compress_body(body: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    """一次性压缩完整响应体"""
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY if level is None else level)
+    return gzip.compress(body, compresslevel=settings.COMPRESSION_GZIP_LEVEL if level is None else level, mtime=0)
+
+
+class StreamCompressor:
+    """流式压缩器: 每个分片压缩后立即刷新，保证SSE等流式响应逐块送达"""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+        else:
+            self._compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, chunk: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(chunk) + self._compressor.flush()
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class CompressionMiddleware:
+    """响应压缩中间件
+
+    按 Accept-Encoding 协商 br/gzip；只压缩可压缩类型且不小于 minimum_size 的响应，
+    已带 Content-Encoding 的响应(如预压缩的缓存响应)原样转发。
+    流式响应(more_body)逐块压缩并刷新，不等待完整响应体。
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = settings.COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(send, encoding, self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """单个响应的压缩状态: 收到第一个响应体分片后决定是否压缩"""
+
+    def __init__(self, send: Send, encoding: str, minimum_size: int):
+        self._send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self._start: Optional[Message] = None
+        self._decided = False
+        self._compressor: Optional[StreamCompressor] = None
+
+    async def send(self, message: Message):
+        if message["type"] == "http.response.start":
+            self._start = message
+            return
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        if not self._decided:
+            self._decided = True
+            await self._start_body(message)
+            return
+
+        if self._compressor is None:
+            await self._send(message)
+            return
+
+        body = self._compressor.compress(message.get("body", b""))
+        more_body = message.get("more_body", False)
+        if not more_body:
+            body += self._compressor.finish()
+        await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+    async def _start_body(self, message: Message):
+        headers = MutableHeaders(raw=self._start["headers"])
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if (
+            "content-encoding" in headers
+            or self._start["status"] in (204, 304)
+            or not is_compressible(headers.get("content-type"))
+        ):
+            await self._send(self._start)
+            await self._send(message)
+            return
+
+        headers.add_vary_header("Accept-Encoding")
+
+        content_length = headers.get("content-length")
+        size = int(content_length) if content_length and content_length.isdigit() else None
+        if (not more_body and len(body) < self.minimum_size) or (size is not None and size < self.minimum_size):
+            await self._send(self._start)
+            await self._send(message)
+            return
+
+        headers["Content-Encoding"] = self.encoding
+        if more_body:
+            # 流式压缩，长度未知
+            self._compressor = StreamCompressor(self.encoding)
+            if "content-length" in headers:
+                del headers["content-length"]
+            body = self._compressor.compress(body)
+        else:
+            body = compress_body(body, self.encoding)
+            headers["Content-Length"] = str(len(body))
+
+        await self._send(self._start)
+        await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+
+def encode_variants(body: bytes, minimum_size: int = settings.COMPRESSION_MIN_SIZE) -> Dict[str, bytes]:
+    """预先生成响应体的各编码版本，缓存时只压缩一次"""
+    variants = {"identity": body}
+    if settings.COMPRESSION_ENABLED and len(body) >= minimum_size:
+        for encoding in available_encodings():
+            level = settings.COMPRESSION_PRECOMPRESS_BROTLI_QUALITY if encoding == "br" else settings.COMPRESSION_PRECOMPRESS_GZIP_LEVEL
+            variants[encoding] = compress_body(body, encoding, level)
+    return variants
+
+
+class PrecompressedResponse(Response):
+    """携带预压缩版本的响应，发送时按请求的 Accept-Encoding 选择版本，不再重新压缩"""
+
+    def __init__(
+        self,
+        variants: Dict[str, bytes],
+        status_code: int = 200,
+        headers: Optional[List[Tuple[bytes, bytes]]] = None,
+        media_type: Optional[str] = None
+    ):
+        self.variants = variants
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = None
+        self.body = variants["identity"]
+        self.raw_headers = list(headers or [])
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        encodings = [encoding for encoding in available_encodings() if encoding in self.variants]
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"), encodings) if encodings else None
+        body = self.variants[encoding] if encoding else self.variants["identity"]
+
+        headers = MutableHeaders(raw=list(self.raw_headers))
+        headers["Content-Length"] = str(len(body))
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        if len(self.variants) > 1:
+            headers.add_vary_header("Accept-Encoding")
+
+        await send({"type": "http.response.start", "status": self.status_code, "headers": headers.raw})
+        await send({"type": "http.response.body", "body": body})
@@ -29,6 +29,11 @@ class Settings(BaseSettings):
     # 数据库配置
     DATABASE_URL: str = "sqlite:///./devops_efficiency.db"
     DATABASE_ECHO: bool = False
+    DB_INIT_MODE: str = "create_all"  # 建表方式: create_all 或 alembic
+    DB_INIT_LOCK_FILE: str = "logs/db_init.lock"  # 多工作进程时只有持锁进程执行建表/迁移
+    DB_INIT_TIMEOUT: int = 120  # 等待其他进程完成初始化的最长时间(秒)
+    SKIP_DB_INIT: bool = False  # 跳过数据库初始化(滚动重启时使用)
+    ALEMBIC_CONFIG: str = "alembic.ini"
     
     # Redis配置
     REDIS_URL: str = "redis://localhost:6379/0"
@@ -38,6 +43,12 @@ class Settings(BaseSettings):
     OPENAI_MODEL: str = "gpt-3.5-turbo"
     OPENAI_MAX_TOKENS: int = 1000
     OPENAI_TEMPERATURE: float = 0.7
+    OPENAI_BASE_URL: Optional[str] = None  # 为空时使用官方地址，可指向兼容服务或本地模拟服务
+    OPENAI_TIMEOUT: float = 30  # 单次请求超时(秒)
+    OPENAI_MAX_CONCURRENCY: int = 8  # 每个进程的最大并发请求数
+    OPENAI_MAX_RETRIES: int = 3  # 429/5xx 最大重试次数
+    OPENAI_RETRY_BASE_DELAY: float = 0.5  # 指数退避初始间隔(秒)
+    OPENAI_RETRY_MAX_DELAY: float = 8.0  # 指数退避最大间隔(秒)
     
     # 数据采集配置
     GITHUB_TOKEN: Optional[str] = None
@@ -56,17 +67,79 @@ class Settings(BaseSettings):
     
     # 缓存配置
     CACHE_TTL: int = 300  # 5分钟
+    CHAT_CACHE_ENABLED: bool = True
+    CHAT_CACHE_TTL: int = 3600  # 聊天回复缓存1小时
+    CHAT_CACHE_MAX_SIZE: int = 1000
+    CHAT_CACHE_SIMILARITY_THRESHOLD: float = 0.75  # 相似问题命中阈值(余弦相似度，实体须完全相同)
+    CHAT_HISTORY_COMPRESSION: bool = True  # 压缩存储较长的聊天消息
+    CHAT_HISTORY_COMPRESS_MIN_BYTES: int = 512  # 超过该字节数的消息才压缩
+    CHAT_HISTORY_PAGE_SIZE: int = 20  # 聊天历史默认每页条数
     
     # 数据采集配置
+    DATA_COLLECTION_ENABLED: bool = True
     DATA_COLLECTION_INTERVAL: int = 300  # 5分钟
+    DATA_COLLECTION_RESULT_TTL: float = 10  # 采集结果短时复用(秒)，0表示只合并并发请求
+    DATA_COLLECTION_JITTER: float = 5  # 每次触发的最大随机延迟(秒)
+    DATA_COLLECTION_TIMEOUT: int = 120  # 单次采集的截止时间(秒)
+    GITHUB_COLLECTION_INTERVAL: Optional[int] = None  # 为空时使用 DATA_COLLECTION_INTERVAL
+    JIRA_COLLECTION_INTERVAL: Optional[int] = 3600  # Jira每小时采集
+    JENKINS_COLLECTION_INTERVAL: Optional[int] = 60  # Jenkins每分钟采集
+    SCHEDULER_LOCK_FILE: str = "logs/collector.lock"  # 多工作进程时只有持锁进程执行定时采集
+    SCHEDULER_LEADER_RETRY_INTERVAL: int = 30  # 非主进程重试获取锁的间隔(秒)
     METRICS_RETENTION_DAYS: int = 90
+    ACTIVITY_RETENTION_DAYS: int = 0  # 原始活动事件保留天数，0表示不清理
+    
+    # 团队排行配置
+    TEAM_RANKING_REFRESH_INTERVAL: float = 5  # 排行索引检查新 TeamMetric 记录的最小间隔(秒)
+    TEAM_RANKING_ID_OVERLAP: int = 100  # 增量读取时重读的已读ID尾部窗口(覆盖并发事务乱序提交)
+    TEAM_RANKING_REBUILD_INTERVAL: float = 3600  # 全量重建排行索引的间隔(秒)
+    
+    # 仪表盘快照配置
+    DASHBOARD_SNAPSHOT_RETENTION: int = 100  # 保留的快照版本数
+    DASHBOARD_SNAPSHOT_POLL_INTERVAL: int = 5  # 检查其他进程发布新快照的间隔(秒)
+    
+    # 后台任务队列配置
+    JOB_WORKER_CONCURRENCY: int = 2  # 每个进程的任务并发数
+    JOB_POLL_INTERVAL: float = 1.0  # 空闲时轮询队列的间隔(秒)
+    JOB_TIMEOUT: int = 600  # 单个任务最长执行时间(秒)
+    JOB_HEARTBEAT_INTERVAL: float = 10  # 运行中任务的心跳和遗留任务检查间隔(秒)
+    JOB_HEARTBEAT_TIMEOUT: float = 60  # 超过该时间无心跳的运行中任务视为工作进程已退出(秒)
     
     # AI分析配置
     AI_ANALYSIS_INTERVAL: int = 3600  # 1小时
     INSIGHT_CONFIDENCE_THRESHOLD: float = 0.7
+    INSIGHT_RULES_PATH: Optional[str] = None  # 为空时使用内置规则文件
+    ANALYSIS_CACHE_MAX_SIZE: int = 256  # 数据分析结果缓存条数
+    METRIC_BENCHMARKS_PATH: Optional[str] = None  # 为空时使用内置指标基准文件
+    BENCHMARK_MIN_SAMPLES: int = 5  # 组织内样本少于该数量时使用行业参考分位点
+    BENCHMARK_REFRESH_INTERVAL: int = 300  # 检查指标数据变化并重建基准索引的间隔(秒)
+    
+    # 分页配置
+    PAGINATION_DEFAULT_LIMIT: int = 20
+    PAGINATION_MAX_LIMIT: int = 100
+    PAGINATION_COUNT_CAP: int = 10000  # 近似计数时最多统计的行数(PostgreSQL使用查询计划估计)
+    SEED_DEMO_DATA: bool = True  # 数据库为空时写入演示用的团队、项目和洞察数据
+    
+    # 响应序列化配置
+    FAST_JSON_RESPONSE: bool = True  # 使用 orjson 序列化响应，可信数据跳过 response_model 校验
+    
+    # 响应压缩配置
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024  # 小于该字节数的响应不压缩
+    COMPRESSION_GZIP_LEVEL: int = 6  # 实时压缩的gzip级别
+    COMPRESSION_BROTLI_QUALITY: int = 4  # 实时压缩的brotli质量(0-11)
+    COMPRESSION_PRECOMPRESS_GZIP_LEVEL: int = 9  # 缓存响应只压缩一次，使用最高级别
+    COMPRESSION_PRECOMPRESS_BROTLI_QUALITY: int = 11
+    RESPONSE_CACHE_MAX_SIZE: int = 256  # 缓存的GET响应条数，过期时间为 CACHE_TTL
     
     # WebSocket配置
     WS_HEARTBEAT_INTERVAL: int = 30
+    CHAT_STREAM_BUFFER_SIZE: int = 64  # 流式聊天缓冲的最大片段数，写满时暂停读取上游(背压)
+    WS_SEND_QUEUE_SIZE: int = 100  # 每个实时推送连接待发送的最大消息数，写满时丢弃最旧的消息
+    
+    # 实时推送配置
+    EVENT_BUS_BACKEND: str = "memory"  # memory 或 redis(多工作进程时跨进程广播，连接失败时退回进程内广播)
+    EVENT_BUS_CHANNEL: str = "impact:events"
     
     class Config:
         env_file = ".env"
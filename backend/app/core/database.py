@@ -1,12 +1,14 @@
-from sqlalchemy import create_engine
+from sqlalchemy import Column, Index, Table, create_engine, inspect, text
+from sqlalchemy.schema import CreateColumn
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from typing import AsyncGenerator
+from typing import AsyncGenerator, List, Tuple
 import asyncio
 from loguru import logger
 
 from .config import settings
+from .locks import FileLock
 
 # 创建数据库引擎
 engine = create_engine(
@@ -35,19 +37,100 @@ def get_db():
         db.close()
 
 
+def _schema_ready() -> bool:
+    """数据库结构是否已就绪(已是最新版本，无需再执行建表/迁移)"""
+    if settings.DB_INIT_MODE == "alembic":
+        from alembic.config import Config
+        from alembic.runtime.migration import MigrationContext
+        from alembic.script import ScriptDirectory
+
+        heads = set(ScriptDirectory.from_config(Config(settings.ALEMBIC_CONFIG)).get_heads())
+        with engine.connect() as connection:
+            current = set(MigrationContext.configure(connection).get_current_heads())
+        return current == heads
+
+    existing = set(inspect(engine).get_table_names())
+    return set(Base.metadata.tables) <= existing and not _missing_columns() and not _missing_indexes()
+
+
+def _missing_columns() -> List[Tuple[Table, Column]]:
+    """已存在的表上缺少的列(create_all 不会为已存在的表补加后来新增的列)"""
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        missing.extend((table, column) for column in table.columns if column.name not in existing)
+    return missing
+
+
+def _missing_indexes() -> List[Index]:
+    """已存在的表上缺少的索引(create_all 不会为已存在的表补建后来新增的索引)"""
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        missing.extend(index for index in table.indexes if index.name not in existing)
+    return missing
+
+
+def _create_schema():
+    """执行建表或Alembic迁移"""
+    if settings.DB_INIT_MODE == "alembic":
+        from alembic import command
+        from alembic.config import Config
+
+        command.upgrade(Config(settings.ALEMBIC_CONFIG), "head")
+    else:
+        Base.metadata.create_all(bind=engine)
+        # 后来新增的列均可为空，直接补加
+        with engine.begin() as connection:
+            for table, column in _missing_columns():
+                logger.info(f"补加列: {table.name}.{column.name}")
+                connection.execute(text(
+                    f"ALTER TABLE {table.name} ADD COLUMN {CreateColumn(column).compile(dialect=engine.dialect)}"
+                ))
+        for index in _missing_indexes():
+            logger.info(f"补建索引: {index.name}")
+            index.create(bind=engine)
+
+
 async def init_db():
-    """初始化数据库"""
+    """初始化数据库
+
+    多工作进程启动时只由获得初始化锁的进程执行建表/迁移，其他进程等待锁释放后
+    检查数据库结构即可继续启动。数据库结构已就绪时直接跳过，不获取锁。
+    """
     try:
-        logger.info("正在初始化数据库...")
-        
-        # 创建所有表
-        Base.metadata.create_all(bind=engine)
-        
-        logger.info("数据库初始化完成")
-        
-        # 创建默认数据
-        await create_default_data()
-        
+        if _schema_ready():
+            logger.info("数据库结构已就绪，跳过初始化")
+            return
+
+        lock = FileLock(settings.DB_INIT_LOCK_FILE)
+        if not await lock.acquire_async(timeout=settings.DB_INIT_TIMEOUT):
+            raise TimeoutError(f"等待数据库初始化锁超时({settings.DB_INIT_TIMEOUT}秒)")
+
+        try:
+            # 等待期间其他进程可能已完成初始化
+            if _schema_ready():
+                logger.info("数据库已由其他工作进程初始化")
+                return
+
+            logger.info("正在初始化数据库...")
+            await asyncio.to_thread(_create_schema)
+            logger.info("数据库初始化完成")
+
+            # 创建默认数据
+            await create_default_data()
+
+        finally:
+            lock.release()
+
     except Exception as e:
         logger.error(f"数据库初始化失败: {e}")
         raise
@@ -58,8 +141,13 @@ async def create_default_data():
     try:
         logger.info("正在创建默认数据...")
         
-        # 这里可以添加创建默认用户、团队等数据的逻辑
-        # 暂时使用模拟数据
+        if settings.SEED_DEMO_DATA:
+            from .default_data import seed_demo_data
+            await asyncio.to_thread(seed_demo_data)
+        
+        # 为已有数据建立全文检索索引(升级后的数据库)
+        from app.services.search_index import search_index
+        await asyncio.to_thread(search_index.backfill)
         
         logger.info("默认数据创建完成")
         
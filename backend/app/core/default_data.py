@@ -0,0 +1,168 @@
+from datetime import datetime, timedelta
+from loguru import logger
+
+from app.core.database import SessionLocal
+from app.models.models import Insight, Project, ProjectMetric, Team, TeamMember, TeamMetric, User
+
+
+# 演示数据: 团队负责人
+DEMO_USERS = [
+    ("zhangsan", "张三", "team_lead"),
+    ("lisi", "李四", "team_lead"),
+    ("wangwu", "王五", "team_lead"),
+    ("zhaoliu", "赵六", "team_lead"),
+    ("sunqi", "孙七", "team_lead")
+]
+
+# 演示数据: (名称, 描述, 负责人序号, 创建时间)
+DEMO_TEAMS = [
+    ("前端团队", "负责Web前端和移动端UI开发", 0, "2023-01-15T10:00:00"),
+    ("后端团队", "负责服务端API开发和系统架构", 1, "2023-01-15T10:00:01"),
+    ("移动端团队", "负责iOS和Android原生应用开发", 2, "2023-03-01T14:00:00"),
+    ("DevOps团队", "负责基础设施和CI/CD流水线", 3, "2023-02-01T09:00:00"),
+    ("QA团队", "负责质量保证和自动化测试", 4, "2023-01-20T13:00:00")
+]
+
+# 演示数据: (名称, 描述, 团队序号, 状态, 开始日期, 结束日期, 创建时间)
+DEMO_PROJECTS = [
+    ("主要产品", "公司核心产品的Web和移动端应用开发", 0, "active", "2023-01-01", "2024-12-31", "2023-01-01T09:00:00"),
+    ("移动应用", "iOS和Android原生移动应用开发项目", 2, "active", "2023-06-01", "2024-06-30", "2023-06-01T10:00:00"),
+    ("数据平台", "企业级数据分析和BI平台建设", 1, "active", "2023-09-01", "2024-09-30", "2023-09-01T11:00:00"),
+    ("基础设施升级", "云原生基础设施和CI/CD流水线升级", 3, "completed", "2023-03-01", "2023-12-31", "2023-03-01T08:00:00"),
+    ("AI助手集成", "在产品中集成AI助手功能", 0, "planning", "2024-03-01", "2024-08-31", "2024-01-15T12:00:00")
+]
+
+# 演示数据: (标题, 描述, 类型, 严重程度, 置信度, 状态, 团队序号, 项目序号, 建议, 创建于多久以前)
+DEMO_INSIGHTS = [
+    ("部署频率持续下降", "过去两周部署频率从每天1.2次下降到0.8次，建议检查CI/CD流水线效率",
+     "performance", "medium", 0.85, "new", 0, None,
+     ["优化CI/CD流水线配置", "减少手动审批环节", "实施自动化测试"], timedelta(hours=2)),
+    ("代码质量显著提升", "本月代码审查通过率达到95%，缺陷密度降低40%，团队代码质量意识明显增强",
+     "quality", "low", 0.92, "acknowledged", 1, 0,
+     ["继续保持代码审查标准", "分享最佳实践给其他团队"], timedelta(hours=6)),
+    ("团队协作效率有待提升", "团队间沟通延迟导致任务阻塞增加，平均等待时间超过预期",
+     "risk", "high", 0.78, "new", 2, 1,
+     ["建立跨团队沟通机制", "明确接口人和响应时限"], timedelta(hours=12)),
+    ("技术债务积累风险", "代码复杂度持续上升，维护成本增加，建议制定技术债务清理计划",
+     "risk", "medium", 0.80, "new", 0, 0,
+     ["制定技术债务清理计划", "每个迭代预留重构时间"], timedelta(days=1)),
+    ("自动化测试覆盖率提升机会", "当前测试覆盖率为68%，存在提升空间，可以减少手动测试工作量",
+     "opportunity", "low", 0.75, "new", 1, 0,
+     ["实施集成测试自动化", "建立测试质量门禁"], timedelta(days=2))
+]
+
+# 演示数据: 团队序号 -> 最近两次测量的 (综合评分, 效能, 速度, 满意度, 协作)，先旧后新
+DEMO_TEAM_METRICS = {
+    0: [(80, 84, 78, 81, 86), (85, 88, 82, 85, 90)],
+    1: [(81, 84, 79, 81, 84), (82, 85, 80, 82, 85)],
+    2: [(75, 77, 72, 76, 79), (78, 80, 75, 78, 82)],
+    3: [(80, 82, 84, 76, 78), (79, 81, 83, 76, 77)],
+    4: [(74, 76, 70, 77, 80), (76, 78, 72, 78, 81)]
+}
+
+# 演示数据: 项目序号 -> 最近两次测量的 (健康度, 进度, 风险等级, 资源利用率)，先旧后新
+DEMO_PROJECT_METRICS = {
+    0: [(80, 58, "low", 62), (82.5, 65, "low", 65)],
+    1: [(78, 40, "medium", 42), (75.8, 45, "medium", 45)],
+    2: [(76, 24, "low", 26), (78.2, 30, "low", 30)],
+    3: [(90, 100, "low", 95), (90, 100, "low", 95)],
+    4: [(70, 0, "medium", 10), (72, 5, "medium", 15)]
+}
+
+
+def seed_demo_data():
+    """数据库中没有团队时写入演示数据(团队负责人、团队、项目、AI洞察、团队效能指标和项目指标)"""
+    db = SessionLocal()
+    try:
+        if db.query(Team.id).first() is not None:
+            return
+
+        now = datetime.now()
+        users = [
+            User(username=username, email=f"{username}@example.com", full_name=full_name, role=role, created_at=now)
+            for username, full_name, role in DEMO_USERS
+        ]
+        db.add_all(users)
+        db.flush()
+
+        teams = [
+            Team(name=name, description=description, lead_id=users[lead].id, created_at=datetime.fromisoformat(created_at))
+            for name, description, lead, created_at in DEMO_TEAMS
+        ]
+        db.add_all(teams)
+        db.flush()
+
+        db.add_all([
+            TeamMember(team_id=team.id, user_id=team.lead_id, role="lead", joined_at=team.created_at)
+            for team in teams
+        ])
+
+        projects = [
+            Project(
+                name=name,
+                description=description,
+                team_id=teams[team].id,
+                status=status,
+                start_date=datetime.fromisoformat(start_date),
+                end_date=datetime.fromisoformat(end_date),
+                created_at=datetime.fromisoformat(created_at)
+            )
+            for name, description, team, status, start_date, end_date, created_at in DEMO_PROJECTS
+        ]
+        db.add_all(projects)
+        db.flush()
+
+        db.add_all([
+            Insight(
+                title=title,
+                description=description,
+                type=insight_type,
+                severity=severity,
+                confidence=confidence,
+                status=status,
+                team_id=teams[team].id,
+                project_id=projects[project].id if project is not None else None,
+                recommendations=recommendations,
+                created_by="ai",
+                created_at=now - age
+            )
+            for title, description, insight_type, severity, confidence, status, team, project, recommendations, age in DEMO_INSIGHTS
+        ])
+
+        measured = [now - timedelta(days=7), now]
+        db.add_all([
+            TeamMetric(
+                team_id=teams[team].id,
+                overall_score=overall_score,
+                efficiency=efficiency,
+                velocity=velocity,
+                satisfaction=satisfaction,
+                collaboration=collaboration,
+                measured_at=measured_at,
+                created_at=measured_at
+            )
+            for team, history in DEMO_TEAM_METRICS.items()
+            for measured_at, (overall_score, efficiency, velocity, satisfaction, collaboration) in zip(measured, history)
+        ])
+        db.add_all([
+            ProjectMetric(
+                project_id=projects[project].id,
+                health_score=health_score,
+                progress=progress,
+                risk_level=risk_level,
+                resource_utilization=resource_utilization,
+                measured_at=measured_at,
+                created_at=measured_at
+            )
+            for project, history in DEMO_PROJECT_METRICS.items()
+            for measured_at, (health_score, progress, risk_level, resource_utilization) in zip(measured, history)
+        ])
+        db.commit()
+        logger.info(f"已写入演示数据: {len(teams)} 个团队, {len(projects)} 个项目, {len(DEMO_INSIGHTS)} 条洞察")
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"写入演示数据失败: {e}")
+        raise
+    finally:
+        db.close()
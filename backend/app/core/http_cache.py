@@ -0,0 +1,74 @@
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import Response
+
+from app.core.compression import PrecompressedResponse, encode_variants
+from app.core.config import settings
+from app.core.responses import FastJSONResponse
+
+
+class HTTPResponseCache:
+    """GET响应缓存
+
+    按请求路径和查询参数缓存渲染好的响应体，同时保存预压缩的 br/gzip 版本，
+    命中时由 PrecompressedResponse 按 Accept-Encoding 直接返回对应版本，不再重新序列化和压缩。
+    进程内 LRU，条目在 CACHE_TTL 秒后过期。
+    """
+
+    def __init__(self, ttl: int = settings.CACHE_TTL, max_size: int = settings.RESPONSE_CACHE_MAX_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[float, PrecompressedResponse]]" = OrderedDict()
+
+    @staticmethod
+    def cache_key(request: Request, variant: str = "") -> Tuple[str, str, str]:
+        """缓存键: 路径 + 排序后的查询参数 + 表示形式(如按 Accept 协商出的 Arrow 格式)"""
+        query = "&".join(f"{key}={value}" for key, value in sorted(request.query_params.multi_items()))
+        return request.url.path, query, variant
+
+    def get(self, request: Request, variant: str = "") -> Optional[Response]:
+        """查找未过期的缓存响应"""
+        key = self.cache_key(request, variant)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, response = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return response
+
+    def store(self, request: Request, response: Any, variant: str = "") -> Response:
+        """缓存成功的响应并返回带预压缩版本的响应"""
+        if not isinstance(response, Response):
+            response = FastJSONResponse(jsonable_encoder(response))
+        if response.status_code != 200:
+            return response
+
+        cached = PrecompressedResponse(
+            encode_variants(response.body),
+            status_code=response.status_code,
+            headers=[(name, value) for name, value in response.raw_headers if name != b"content-length"],
+            media_type=response.media_type
+        )
+
+        key = self.cache_key(request, variant)
+        self._entries[key] = (time.monotonic() + self.ttl, cached)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return cached
+
+    def clear(self):
+        """清空缓存"""
+        self._entries.clear()
+
+
+# 创建全局响应缓存实例
+http_response_cache = HTTPResponseCache()
@@ -0,0 +1,142 @@
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from fastapi import Query as QueryParam
+from sqlalchemy import DateTime, func, select, text, tuple_
+from sqlalchemy.orm import Query, Session
+
+from app.core.config import settings
+from app.schemas.schemas import PaginationParams
+
+
+# 总数统计方式
+COUNT_MODES = ("none", "exact", "approximate")
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """将排序键编码为不透明的游标字符串"""
+    payload = json.dumps(values, separators=(",", ":"), ensure_ascii=False, default=str)
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], size: int) -> Optional[List[Any]]:
+    """解码游标，格式错误时抛出 ValueError"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+    except Exception:
+        raise ValueError("无效的分页游标")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("无效的分页游标")
+    return values
+
+
+def pagination_params(
+    limit: int = QueryParam(settings.PAGINATION_DEFAULT_LIMIT, ge=1, le=settings.PAGINATION_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    count: str = QueryParam("none", pattern="^(none|exact|approximate)$")
+) -> PaginationParams:
+    """列表接口的分页查询参数(参数不合法时由FastAPI返回422)"""
+    return PaginationParams(limit=limit, cursor=cursor, count=count)
+
+
+@dataclass
+class Page:
+    """一页结果"""
+    items: List[Any]
+    limit: int
+    has_more: bool
+    next_cursor: Optional[str]
+    total: Optional[int] = None
+    total_is_exact: bool = True
+
+    def to_dict(self, items_key: str = "items") -> Dict[str, Any]:
+        return {
+            items_key: self.items,
+            "limit": self.limit,
+            "has_more": self.has_more,
+            "next_cursor": self.next_cursor,
+            "total": self.total,
+            "total_is_exact": self.total_is_exact
+        }
+
+
+def _cursor_value(column, value: Any) -> Any:
+    """游标中的值还原为列类型"""
+    if value is not None and isinstance(column.type, DateTime):
+        try:
+            return datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            raise ValueError("无效的分页游标")
+    return value
+
+
+def count_rows(db: Session, query: Query, mode: str) -> Tuple[Optional[int], bool]:
+    """统计查询结果总数，返回(总数, 是否精确)
+
+    - none: 不统计
+    - exact: COUNT(*)
+    - approximate: PostgreSQL 读取查询计划的估计行数；其他数据库最多数到 PAGINATION_COUNT_CAP 行，
+      超过时返回上限并标记为不精确
+    """
+    if mode == "none":
+        return None, True
+
+    statement = query.order_by(None).statement
+    if mode == "exact":
+        return db.execute(select(func.count()).select_from(statement.subquery())).scalar_one(), True
+
+    if db.bind.dialect.name == "postgresql":
+        compiled = statement.compile(dialect=db.bind.dialect, compile_kwargs={"literal_binds": True})
+        plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}")).scalar_one()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"]), False
+
+    cap = settings.PAGINATION_COUNT_CAP
+    capped = db.execute(select(func.count()).select_from(statement.limit(cap + 1).subquery())).scalar_one()
+    return min(capped, cap), capped <= cap
+
+
+def keyset_paginate(
+    db: Session,
+    query: Query,
+    sort_columns: Sequence[Any],
+    limit: int,
+    cursor: Optional[str] = None,
+    count: str = "none"
+) -> Page:
+    """按排序列倒序做游标(keyset)分页
+
+    sort_columns 通常为 (created_at, id)，最后一列必须唯一。翻页条件为
+    (created_at, id) < (游标值)，配合同顺序的索引，任意深度的页都只扫描 limit + 1 行。
+    """
+    position = decode_cursor(cursor, len(sort_columns))
+    total, total_is_exact = count_rows(db, query, count)
+
+    if position is not None:
+        values = [_cursor_value(column, value) for column, value in zip(sort_columns, position)]
+        query = query.filter(tuple_(*sort_columns) < tuple_(*values))
+
+    # 多取一条判断是否还有下一页
+    rows = query.order_by(*(column.desc() for column in sort_columns)).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor([_row_value(last, column) for column in sort_columns])
+    return Page(rows, limit, has_more, next_cursor, total, total_is_exact)
+
+
+def _row_value(row: Any, column) -> Any:
+    """取出行中排序列的值(ORM对象或命名元组)"""
+    entity = row if hasattr(row, column.key) else row[0]
+    value = getattr(entity, column.key)
+    return value.isoformat() if isinstance(value, datetime) else value
+
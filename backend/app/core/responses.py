@@ -0,0 +1,69 @@
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import Enum
+from typing import Any
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.schemas.schemas import APIResponse
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    """序列化 JSON 原生类型以外的对象"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if hasattr(obj, "tolist"):  # numpy 数组和标量
+        return obj.tolist()
+    return jsonable_encoder(obj)
+
+
+class FastJSONResponse(JSONResponse):
+    """使用 orjson 序列化的JSON响应，未安装 orjson 时退回标准库 json"""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(
+                content,
+                default=_default,
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+            )
+        return json.dumps(
+            content,
+            default=_default,
+            ensure_ascii=False,
+            allow_nan=False,
+            separators=(",", ":")
+        ).encode("utf-8")
+
+
+def api_response(data: Any = None, message: str = "操作成功", success: bool = True):
+    """构建 APIResponse 格式的响应
+
+    data 是端点自己构建的可信数据时使用: 直接序列化，跳过 response_model 的 pydantic 校验和
+    jsonable_encoder 对整个嵌套结构的遍历。FAST_JSON_RESPONSE 关闭时返回 APIResponse 模型，
+    走FastAPI默认的校验和序列化流程。路由仍声明 response_model=APIResponse 以保留接口文档。
+    """
+    if not settings.FAST_JSON_RESPONSE:
+        return APIResponse(success=success, message=message, data=data)
+    return FastJSONResponse({
+        "success": success,
+        "message": message,
+        "data": data,
+        "timestamp": datetime.now()
+    })
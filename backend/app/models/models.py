@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Boolean, Text, ForeignKey, JSON, Index, LargeBinary, text, DDL, event
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -28,13 +28,16 @@ class User(Base):
 class Team(Base):
     """团队模型"""
     __tablename__ = "teams"
+    __table_args__ = (
+        Index("ix_teams_created_at_id", "created_at", "id"),  # 游标分页
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
     description = Column(Text, nullable=True)
     lead_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), default=datetime.now, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # 关联关系
@@ -61,6 +64,9 @@ class TeamMember(Base):
 class Project(Base):
     """项目模型"""
     __tablename__ = "projects"
+    __table_args__ = (
+        Index("ix_projects_created_at_id", "created_at", "id"),  # 游标分页
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
@@ -70,7 +76,7 @@ class Project(Base):
     status = Column(String(20), default="active")  # active, completed, archived
     start_date = Column(DateTime(timezone=True), nullable=True)
     end_date = Column(DateTime(timezone=True), nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), default=datetime.now, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # 关联关系
@@ -162,6 +168,17 @@ class ProjectMetric(Base):
 class Insight(Base):
     """AI洞察模型"""
     __tablename__ = "insights"
+    __table_args__ = (
+        Index("ix_insights_created_at_id", "created_at", "id"),  # 游标分页
+        Index("ix_insights_status_severity_created", "status", "severity", "created_at", "id"),
+        Index("ix_insights_team_type_created", "team_id", "type", "created_at", "id"),
+        # 待处理洞察收件箱: 只索引未解决的洞察，谓词需与 OPEN_INSIGHT_STATUSES 一致
+        Index(
+            "ix_insights_open_created", "created_at", "id",
+            postgresql_where=text("status IN ('new', 'acknowledged')"),
+            sqlite_where=text("status IN ('new', 'acknowledged')")
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(200), nullable=False)
@@ -180,7 +197,7 @@ class Insight(Base):
     # 创建信息
     created_by = Column(String(20), default="ai")  # ai, user
     created_by_user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), default=datetime.now, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # 关联关系
@@ -190,6 +207,9 @@ class Insight(Base):
 class Recommendation(Base):
     """改进建议模型"""
     __tablename__ = "recommendations"
+    __table_args__ = (
+        Index("ix_recommendations_created_at_id", "created_at", "id"),  # 游标分页
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(200), nullable=False)
@@ -240,4 +260,163 @@ class Prediction(Base):
     
     # 创建信息
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    valid_until = Column(DateTime(timezone=True), nullable=False)  # 预测有效期
\ No newline at end of file
+    valid_until = Column(DateTime(timezone=True), nullable=False)  # 预测有效期
+
+
+class DashboardSnapshot(Base):
+    """仪表盘快照模型"""
+    __tablename__ = "dashboard_snapshots"
+    
+    id = Column(Integer, primary_key=True, index=True)  # 快照版本号
+    data = Column(JSON, nullable=False)  # 仪表盘概览数据
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+
+class Job(Base):
+    """后台任务模型"""
+    __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_status_priority_created", "status", "priority", "created_at"),
+        # 同一去重键最多一个未结束任务，谓词需与 job_queue.ACTIVE_STATUSES 一致
+        Index(
+            "ix_jobs_active_dedupe", "dedupe_key", unique=True,
+            postgresql_where=text("status IN ('queued', 'running')"),
+            sqlite_where=text("status IN ('queued', 'running')")
+        ),
+    )
+    
+    id = Column(String(32), primary_key=True)
+    type = Column(String(50), nullable=False)  # metrics.collect, insights.generate
+    status = Column(String(20), default="queued")  # queued, running, succeeded, failed
+    priority = Column(Integer, default=0)  # 数值越大越先执行
+    dedupe_key = Column(String(100), index=True, nullable=False)  # 任务类型+参数哈希
+    params = Column(JSON, nullable=True)
+    
+    # 执行信息
+    progress = Column(Float, default=0.0)  # 进度 0-100
+    progress_message = Column(String(200), nullable=True)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    
+    # 执行者: 领取任务的工作进程及其最近一次心跳
+    worker_id = Column(String(100), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # 时间戳
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class Conversation(Base):
+    """聊天会话模型"""
+    __tablename__ = "conversations"
+    __table_args__ = (
+        Index("ix_conversations_user_updated", "user_id", "updated_at", "id"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    title = Column(String(100), nullable=False)  # 取首条提问的前若干字
+    context = Column(JSON, nullable=True)
+    message_count = Column(Integer, default=0)
+    last_message_preview = Column(String(200), nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)  # 最后一条消息的时间
+    
+    # 关联关系
+    messages = relationship("ConversationMessage", back_populates="conversation", passive_deletes=True)
+
+
+class ConversationMessage(Base):
+    """聊天消息模型(只追加写入)"""
+    __tablename__ = "conversation_messages"
+    __table_args__ = (
+        Index("ix_conversation_messages_conversation_id", "conversation_id", "id"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    conversation_id = Column(Integer, ForeignKey("conversations.id", ondelete="CASCADE"), nullable=False)
+    role = Column(String(20), nullable=False)  # user, assistant
+    body = Column(LargeBinary, nullable=False)  # UTF-8 文本，encoding 为 zlib 时为压缩后的内容
+    encoding = Column(String(10), default="identity")  # identity, zlib
+    suggestions = Column(JSON, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    
+    # 关联关系
+    conversation = relationship("Conversation", back_populates="messages")
+
+
+class ActivityEvent(Base):
+    """原始活动事件(只追加写入)，由采集器批量写入"""
+    __tablename__ = "activity_events"
+    __table_args__ = (
+        Index("ix_activity_events_upstream", "source", "event_type", "upstream_id", unique=True),  # 重复采集去重
+        Index("ix_activity_events_ts", "ts", "id"),
+        Index("ix_activity_events_project_ts", "project_id", "ts", "id"),
+        Index("ix_activity_events_team_ts", "team_id", "ts", "id"),
+        Index("ix_activity_events_type_ts", "event_type", "ts", "id"),
+        Index("ix_activity_events_day", "day"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    source = Column(String(20), nullable=False)  # github, jira, jenkins
+    event_type = Column(String(30), nullable=False)  # deployment, pull_request, commit, review, work_item, build
+    upstream_id = Column(String(100), nullable=False)  # 上游系统中的ID
+    team_id = Column(Integer, ForeignKey("teams.id"), nullable=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=True)
+    actor = Column(String(100), nullable=True)
+    title = Column(String(200), nullable=False)
+    status = Column(String(30), nullable=True)
+    ts = Column(DateTime(timezone=True), nullable=False)  # 事件在上游发生的时间
+    day = Column(Date, nullable=False)  # 按天分区键，保留期清理按天删除
+    payload = Column(JSON, nullable=True)  # 上游原始数据
+    collected_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class SearchDocument(Base):
+    """全文检索文档(团队、项目、洞察各一行)
+
+    title_tokens/body_tokens 保存切分后的词元: 中文按相邻两字切分(bigram)，
+    其他文字按单词小写。SQLite 通过 FTS5 外部内容表、PostgreSQL 通过 tsvector 生成列建立索引。
+    """
+    __tablename__ = "search_documents"
+    __table_args__ = (
+        Index("ix_search_documents_entity", "entity_type", "entity_id", unique=True),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    entity_type = Column(String(20), nullable=False)  # team, project, insight
+    entity_id = Column(Integer, nullable=False)
+    title_tokens = Column(Text, nullable=False, default="")
+    body_tokens = Column(Text, nullable=False, default="")
+    updated_at = Column(DateTime(timezone=True), default=datetime.now)
+
+
+# SQLite: FTS5 外部内容表，由触发器与 search_documents 保持同步
+for _statement in (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_documents_fts USING fts5("
+    "title_tokens, body_tokens, content='search_documents', content_rowid='id', tokenize='unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS search_documents_ai AFTER INSERT ON search_documents BEGIN "
+    "INSERT INTO search_documents_fts(rowid, title_tokens, body_tokens) "
+    "VALUES (new.id, new.title_tokens, new.body_tokens); END",
+    "CREATE TRIGGER IF NOT EXISTS search_documents_ad AFTER DELETE ON search_documents BEGIN "
+    "INSERT INTO search_documents_fts(search_documents_fts, rowid, title_tokens, body_tokens) "
+    "VALUES ('delete', old.id, old.title_tokens, old.body_tokens); END",
+    "CREATE TRIGGER IF NOT EXISTS search_documents_au AFTER UPDATE ON search_documents BEGIN "
+    "INSERT INTO search_documents_fts(search_documents_fts, rowid, title_tokens, body_tokens) "
+    "VALUES ('delete', old.id, old.title_tokens, old.body_tokens); "
+    "INSERT INTO search_documents_fts(rowid, title_tokens, body_tokens) "
+    "VALUES (new.id, new.title_tokens, new.body_tokens); END"
+):
+    event.listen(SearchDocument.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+
+# PostgreSQL: 标题权重A、正文权重B的 tsvector 生成列 + GIN 索引
+for _statement in (
+    "ALTER TABLE search_documents ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('simple', title_tokens), 'A') || "
+    "setweight(to_tsvector('simple', body_tokens), 'B')) STORED",
+    "CREATE INDEX ix_search_documents_vector ON search_documents USING GIN (search_vector)"
+):
+    event.listen(SearchDocument.__table__, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
@@ -318,6 +318,7 @@ class AIChatRequest(BaseSchema):
     message: str = Field(..., min_length=1)
     context: Optional[Dict[str, Any]] = None
     user_id: Optional[int] = None
+    conversation_id: Optional[int] = None  # 为空时新建对话(需提供 user_id)
 
 
 class AIChatResponse(BaseSchema):
@@ -326,6 +327,7 @@ class AIChatResponse(BaseSchema):
     data_insights: Optional[Dict[str, Any]] = None
     follow_up_questions: Optional[List[str]] = None
     timestamp: str
+    conversation_id: Optional[int] = None
 
 
 # 仪表盘数据模式
@@ -353,15 +355,17 @@ class ErrorResponse(BaseSchema):
     timestamp: datetime = Field(default_factory=datetime.now)
 
 
-# 分页模式
+# 分页模式(游标分页)
 class PaginationParams(BaseSchema):
-    page: int = Field(1, ge=1)
-    size: int = Field(20, ge=1, le=100)
+    limit: int = Field(20, ge=1, le=100)
+    cursor: Optional[str] = None  # 上一页返回的 next_cursor
+    count: str = Field("none", pattern="^(none|exact|approximate)$")  # 总数统计方式
 
 
 class PaginatedResponse(BaseSchema):
     items: List[Any]
-    total: int
-    page: int
-    size: int
-    pages: int
\ No newline at end of file
+    limit: int
+    has_more: bool
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None  # count=none 时为空
+    total_is_exact: bool = True
\ No newline at end of file
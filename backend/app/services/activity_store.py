@@ -0,0 +1,236 @@
+from datetime import date, datetime, timedelta
+from typing import Dict, Any, List, NamedTuple, Optional, Tuple
+from loguru import logger
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.pagination import Page, keyset_paginate
+from app.models.models import ActivityEvent, Team
+
+
+# 活动事件类型
+EVENT_TYPES = ("deployment", "pull_request", "commit", "review", "work_item", "build")
+
+# 去重键(对应唯一索引 ix_activity_events_upstream)
+DEDUPE_COLUMNS = ("source", "event_type", "upstream_id")
+
+# 每批写入的事件数
+INSERT_BATCH_SIZE = 500
+
+
+class EventSpec(NamedTuple):
+    """原始数据中一类记录到事件的映射"""
+    items_key: str  # 原始数据中的记录列表
+    event_type: str
+    time_field: str  # 上游事件时间，缺失时使用采集时间
+    title: str  # 标题模板，title_field 有值时优先使用
+    title_field: Optional[str] = None
+    status_field: Optional[str] = "status"
+    actor_field: Optional[str] = None
+    id_fields: Tuple[str, ...] = ("id",)  # 组成上游ID的字段，含状态时每次状态变化记一条事件
+
+
+# 各数据源采集方法返回的原始数据 -> 事件
+EVENT_SPECS: Dict[str, Dict[str, Tuple[EventSpec, ...]]] = {
+    "github": {
+        "collect_deployment_data": (
+            EventSpec("deployments", "deployment", "created_at", "部署 #{id}"),
+        ),
+        "collect_pull_requests": (
+            EventSpec("pull_requests", "pull_request", "created_at", "Pull Request #{id}", title_field="title",
+                      status_field="state", actor_field="author", id_fields=("id", "state")),
+        ),
+        "collect_team_activity": (
+            EventSpec("commits", "commit", "date", "提交 {id}", title_field="message",
+                      status_field=None, actor_field="author"),
+            EventSpec("reviews", "review", "date", "代码审查 #{id}", status_field="state", actor_field="reviewer")
+        )
+    },
+    "jira": {
+        "collect_work_items": (
+            EventSpec("work_items", "work_item", "updated", "{id}", title_field="summary",
+                      actor_field="assignee", id_fields=("id", "status")),
+        )
+    },
+    "jenkins": {
+        "collect_build_data": (
+            EventSpec("builds", "build", "timestamp", "构建 #{id}"),
+        )
+    }
+}
+
+
+def _timestamp(value: Any, default: datetime) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    if value:
+        try:
+            value = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            return default
+        # 与其他表一致，统一存储为本地时间
+        return value.astimezone().replace(tzinfo=None) if value.tzinfo else value
+    return default
+
+
+class ActivityStore:
+    """原始活动事件存储
+
+    - 采集器每次采集后批量追加事件，按 (source, event_type, upstream_id) 去重，重复采集是幂等的
+    - day 为按天分区键，超过 ACTIVITY_RETENTION_DAYS 的事件按天整体清理
+    - 活动流和项目时间线按 (ts, id) 倒序做游标分页，通过 (ts, id)、(project_id, ts, id)、
+      (team_id, ts, id) 索引做范围扫描
+    """
+
+    def events_from_source(self, source: str, data: Dict[str, Any], now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """把一次采集的原始数据转换为事件行"""
+        now = now or datetime.now()
+        rows = []
+        for method, specs in EVENT_SPECS.get(source, {}).items():
+            raw = data.get(method) or {}
+            for spec in specs:
+                for item in raw.get(spec.items_key, []):
+                    if item.get("id") is None:
+                        continue
+                    ts = _timestamp(item.get(spec.time_field), now)
+                    rows.append({
+                        "source": source,
+                        "event_type": spec.event_type,
+                        "upstream_id": ":".join(str(item.get(field)) for field in spec.id_fields),
+                        "team_id": item.get("team_id"),
+                        "project_id": item.get("project_id"),
+                        "actor": item.get(spec.actor_field) if spec.actor_field else None,
+                        "title": (item.get(spec.title_field) if spec.title_field else None) or spec.title.format(**item),
+                        "status": item.get(spec.status_field) if spec.status_field else None,
+                        "ts": ts,
+                        "day": ts.date(),
+                        "payload": item,
+                        "collected_at": now
+                    })
+        return rows
+
+    def append(self, rows: List[Dict[str, Any]]) -> int:
+        """批量写入事件，已存在的上游事件被忽略，返回新写入的数量"""
+        if not rows:
+            return 0
+
+        db = SessionLocal()
+        try:
+            dialect = db.bind.dialect.name
+            inserted = 0
+            for start in range(0, len(rows), INSERT_BATCH_SIZE):
+                batch = rows[start:start + INSERT_BATCH_SIZE]
+                if dialect in ("sqlite", "postgresql"):
+                    dialect_insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+                    statement = dialect_insert(ActivityEvent).on_conflict_do_nothing(index_elements=DEDUPE_COLUMNS)
+                    inserted += db.connection().execute(statement, batch).rowcount
+                else:
+                    batch = self._new_rows(db, batch)
+                    if batch:
+                        db.execute(insert(ActivityEvent), batch)
+                        inserted += len(batch)
+            db.commit()
+            return inserted
+        except Exception as e:
+            db.rollback()
+            logger.error(f"写入活动事件失败: {e}")
+            raise
+        finally:
+            db.close()
+
+    @staticmethod
+    def _new_rows(db, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """不支持 ON CONFLICT 的数据库: 先查出已存在的上游ID再过滤"""
+        existing = set(
+            db.query(ActivityEvent.source, ActivityEvent.event_type, ActivityEvent.upstream_id)
+            .filter(ActivityEvent.upstream_id.in_({row["upstream_id"] for row in rows}))
+            .all()
+        )
+        unique = {}
+        for row in rows:
+            key = tuple(row[column] for column in DEDUPE_COLUMNS)
+            if key not in existing:
+                unique.setdefault(key, row)
+        return list(unique.values())
+
+    def record_source(self, source: str, data: Dict[str, Any]) -> Dict[Tuple[Optional[int], Optional[int]], int]:
+        """写入一次采集得到的事件并按保留期清理过期事件，返回各 (team_id, project_id) 新写入的数量"""
+        groups: Dict[Tuple[Optional[int], Optional[int]], List[Dict[str, Any]]] = {}
+        for row in self.events_from_source(source, data):
+            groups.setdefault((row["team_id"], row["project_id"]), []).append(row)
+
+        inserted = {}
+        for scope, rows in groups.items():
+            count = self.append(rows)
+            if count:
+                inserted[scope] = count
+
+        if settings.ACTIVITY_RETENTION_DAYS:
+            self.prune(date.today() - timedelta(days=settings.ACTIVITY_RETENTION_DAYS))
+        return inserted
+
+    def prune(self, before: date) -> int:
+        """删除 before 之前各天的事件"""
+        db = SessionLocal()
+        try:
+            deleted = db.query(ActivityEvent).filter(ActivityEvent.day < before).delete(synchronize_session=False)
+            db.commit()
+            return deleted
+        except Exception as e:
+            db.rollback()
+            logger.error(f"清理活动事件失败: {e}")
+            raise
+        finally:
+            db.close()
+
+    def list_events(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        team_id: Optional[int] = None,
+        project_id: Optional[int] = None,
+        event_type: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> Page:
+        """按时间倒序的活动事件，since/until 为 [since, until) 时间范围"""
+        db = SessionLocal()
+        try:
+            query = db.query(ActivityEvent, Team.name).outerjoin(Team, Team.id == ActivityEvent.team_id)
+            if project_id is not None:
+                query = query.filter(ActivityEvent.project_id == project_id)
+            if team_id is not None:
+                query = query.filter(ActivityEvent.team_id == team_id)
+            if event_type:
+                query = query.filter(ActivityEvent.event_type == event_type)
+            if since:
+                query = query.filter(ActivityEvent.ts >= since)
+            if until:
+                query = query.filter(ActivityEvent.ts < until)
+
+            page = keyset_paginate(db, query, (ActivityEvent.ts, ActivityEvent.id), limit, cursor)
+            page.items = [
+                {
+                    "id": event.id,
+                    "type": event.event_type,
+                    "source": event.source,
+                    "title": event.title,
+                    "team_id": event.team_id,
+                    "team": team_name,
+                    "project_id": event.project_id,
+                    "user": event.actor,
+                    "status": event.status,
+                    "timestamp": event.ts.isoformat(),
+                    "details": event.payload
+                }
+                for event, team_name in page.items
+            ]
+            return page
+        finally:
+            db.close()
+
+
+# 创建全局活动事件存储实例
+activity_store = ActivityStore()
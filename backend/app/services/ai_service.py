@@ -1,14 +1,22 @@
-import openai
 import json
+import re
 import asyncio
-from typing import List, Dict, Any, Optional
+from functools import cached_property
+from typing import TYPE_CHECKING, AsyncIterator, List, Dict, Any, Optional, FrozenSet, Tuple, Union
 from datetime import datetime, timedelta
 from loguru import logger
-import numpy as np
-from sklearn.linear_model import LinearRegression
-from sklearn.preprocessing import StandardScaler
+from sqlalchemy import insert
 
 from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.lazy import LazyModule
+from app.models.models import Insight as InsightModel, Recommendation as RecommendationModel
+from app.services.rule_engine import InsightRuleEngine, load_insight_rule_engine
+from app.services.keyword_matcher import keyword_matcher
+from app.services.llm_gateway import get_llm_gateway
+from app.services.response_cache import SemanticResponseCache, get_chat_response_cache
+from app.services.metric_query import metric_query_engine, parse_query, describe_result
+from app.services.metric_benchmarks import MetricBenchmarkIndex, get_metric_benchmark_index
 from app.schemas.schemas import (
     Insight, InsightCreate, InsightType, SeverityLevel,
     Recommendation, RecommendationCreate, PriorityLevel,
@@ -16,37 +24,57 @@ from app.schemas.schemas import (
     ChatMessage, ChatResponse
 )
 
+# numpy 和 scikit-learn 导入较慢，首次预测时再加载
+if TYPE_CHECKING:
+    import numpy as np
+    from sklearn import linear_model, preprocessing
+else:
+    np = LazyModule("numpy")
+    linear_model = LazyModule("sklearn.linear_model")
+    preprocessing = LazyModule("sklearn.preprocessing")
+
 
 class AIService:
     """AI服务类，提供智能分析功能"""
     
     def __init__(self):
-        self.openai_client = None
-        if settings.OPENAI_API_KEY:
-            openai.api_key = settings.OPENAI_API_KEY
-            self.openai_client = openai
-        
-        self.scaler = StandardScaler()
+        self.llm_gateway = get_llm_gateway()
         self.models = {}
         
         logger.info("AI服务初始化完成")
     
+    @cached_property
+    def rule_engine(self) -> InsightRuleEngine:
+        """洞察规则引擎(首次使用时加载)"""
+        return load_insight_rule_engine()
+    
+    @cached_property
+    def response_cache(self) -> Optional[SemanticResponseCache]:
+        """聊天回复缓存(首次使用时创建)"""
+        return get_chat_response_cache() if settings.CHAT_CACHE_ENABLED else None
+    
+    @cached_property
+    def benchmark_index(self) -> MetricBenchmarkIndex:
+        """指标基准索引(首次使用时加载)"""
+        return get_metric_benchmark_index()
+    
+    @cached_property
+    def scaler(self) -> "preprocessing.StandardScaler":
+        """特征标准化器"""
+        return preprocessing.StandardScaler()
+    
     async def generate_insights(self, metrics_data: Dict[str, Any]) -> List[InsightCreate]:
         """生成AI洞察"""
+        return await self.generate_insights_batch([metrics_data])
+    
+    async def generate_insights_batch(self, metrics_rows: List[Dict[str, Any]]) -> List[InsightCreate]:
+        """批量生成多个团队的AI洞察
+        
+        每行为一个团队的指标数据(包含 dora/flow/team 分类及可选的 team_id、project_id)，
+        所有规则对所有行在一次向量化评估中完成。
+        """
         try:
-            insights = []
-            
-            # 分析DORA指标
-            dora_insights = await self._analyze_dora_metrics(metrics_data.get('dora', {}))
-            insights.extend(dora_insights)
-            
-            # 分析流动效率
-            flow_insights = await self._analyze_flow_metrics(metrics_data.get('flow', {}))
-            insights.extend(flow_insights)
-            
-            # 分析团队效能
-            team_insights = await self._analyze_team_metrics(metrics_data.get('team', {}))
-            insights.extend(team_insights)
+            insights = self.rule_engine.generate_insights(metrics_rows)
             
             logger.info(f"生成了 {len(insights)} 个AI洞察")
             return insights
@@ -55,183 +83,106 @@ class AIService:
             logger.error(f"生成AI洞察失败: {e}")
             return []
     
-    async def _analyze_dora_metrics(self, dora_data: Dict[str, Any]) -> List[InsightCreate]:
-        """分析DORA指标"""
-        insights = []
+    async def generate_recommendations(self, insights: List[Insight]) -> List[RecommendationCreate]:
+        """基于洞察批量生成改进建议
         
+        相同的建议文本在整个批次内只估算一次工作量和实施时间，再分发回各条洞察。
+        """
         try:
-            # 部署频率分析
-            deployment_freq = dora_data.get('deployment_frequency', 0)
-            if deployment_freq < 1:  # 每天少于1次部署
-                insights.append(InsightCreate(
-                    title="部署频率偏低",
-                    description=f"当前部署频率为 {deployment_freq:.2f} 次/天，建议提高自动化部署能力",
-                    type=InsightType.PERFORMANCE,
-                    severity=SeverityLevel.MEDIUM,
-                    confidence=0.85,
-                    metrics={"deployment_frequency": deployment_freq},
-                    recommendations=[
-                        "实施CI/CD自动化流水线",
-                        "减少手动部署步骤",
-                        "建立部署监控机制"
-                    ]
-                ))
-            
-            # 变更前置时间分析
-            lead_time = dora_data.get('lead_time_for_changes', 0)
-            if lead_time > 168:  # 超过一周
-                insights.append(InsightCreate(
-                    title="变更前置时间过长",
-                    description=f"当前变更前置时间为 {lead_time:.1f} 小时，影响交付速度",
-                    type=InsightType.PERFORMANCE,
-                    severity=SeverityLevel.HIGH,
-                    confidence=0.90,
-                    metrics={"lead_time_for_changes": lead_time},
-                    recommendations=[
-                        "优化代码审查流程",
-                        "减少批次大小",
-                        "并行化开发任务"
-                    ]
-                ))
+            # 按建议文本去重估算
+            estimates: Dict[str, Tuple[str, int]] = {}
+            for insight in insights:
+                for rec_text in insight.recommendations or []:
+                    if rec_text not in estimates:
+                        categories = keyword_matcher.match(rec_text)
+                        estimates[rec_text] = (
+                            self._estimate_effort(categories),
+                            self._estimate_duration(categories)
+                        )
             
-            # 变更失败率分析
-            failure_rate = dora_data.get('change_failure_rate', 0)
-            if failure_rate > 15:  # 失败率超过15%
-                insights.append(InsightCreate(
-                    title="变更失败率较高",
-                    description=f"当前变更失败率为 {failure_rate:.1f}%，需要提升质量控制",
-                    type=InsightType.QUALITY,
-                    severity=SeverityLevel.HIGH,
-                    confidence=0.88,
-                    metrics={"change_failure_rate": failure_rate},
-                    recommendations=[
-                        "加强测试覆盖率",
-                        "实施渐进式部署",
-                        "建立回滚机制"
-                    ]
-                ))
+            # 分发到各条洞察
+            recommendations = []
+            for insight in insights:
+                if not insight.recommendations:
+                    continue
+                
+                title = f"针对{insight.title}的改进建议"
+                rec_type = self._get_recommendation_type(insight.type)
+                priority = self._get_priority_from_severity(insight.severity)
+                impact = self._estimate_impact(insight.severity)
+                
+                for rec_text in insight.recommendations:
+                    effort, duration = estimates[rec_text]
+                    recommendations.append(RecommendationCreate(
+                        title=title,
+                        description=rec_text,
+                        type=rec_type,
+                        priority=priority,
+                        effort=effort,
+                        impact=impact,
+                        team_id=insight.team_id,
+                        project_id=insight.project_id,
+                        insight_id=insight.id,
+                        estimated_duration=duration
+                    ))
+            
+            logger.info(f"生成了 {len(recommendations)} 个改进建议（{len(estimates)} 条不同建议）")
+            return recommendations
             
         except Exception as e:
-            logger.error(f"DORA指标分析失败: {e}")
-        
-        return insights
+            logger.error(f"生成改进建议失败: {e}")
+            return []
     
-    async def _analyze_flow_metrics(self, flow_data: Dict[str, Any]) -> List[InsightCreate]:
-        """分析流动效率指标"""
-        insights = []
+    def save_insights(self, insights: List[InsightCreate]) -> List[Insight]:
+        """写入AI洞察，返回带ID的洞察(供改进建议通过 insight_id 关联)"""
+        if not insights:
+            return []
         
+        db = SessionLocal()
         try:
-            # 流动效率分析
-            flow_efficiency = flow_data.get('flow_efficiency', 0)
-            if flow_efficiency < 20:  # 流动效率低于20%
-                insights.append(InsightCreate(
-                    title="流动效率偏低",
-                    description=f"当前流动效率为 {flow_efficiency:.1f}%，存在较多等待时间",
-                    type=InsightType.PERFORMANCE,
-                    severity=SeverityLevel.MEDIUM,
-                    confidence=0.82,
-                    metrics={"flow_efficiency": flow_efficiency},
-                    recommendations=[
-                        "识别并消除瓶颈",
-                        "减少任务切换",
-                        "优化工作流程"
-                    ]
-                ))
+            models = [InsightModel(**insight.model_dump(mode="json"), created_by="ai") for insight in insights]
+            db.add_all(models)
+            db.flush()
+            saved = [Insight.model_validate(model) for model in models]
+            db.commit()
             
-            # 在制品分析
-            wip = flow_data.get('work_in_progress', 0)
-            if wip > 10:  # 在制品过多
-                insights.append(InsightCreate(
-                    title="在制品数量过多",
-                    description=f"当前在制品数量为 {wip}，可能影响交付速度",
-                    type=InsightType.RISK,
-                    severity=SeverityLevel.MEDIUM,
-                    confidence=0.75,
-                    metrics={"work_in_progress": wip},
-                    recommendations=[
-                        "限制WIP数量",
-                        "优先完成进行中的任务",
-                        "提高任务完成率"
-                    ]
-                ))
+            logger.info(f"写入了 {len(saved)} 个AI洞察")
+            return saved
             
         except Exception as e:
-            logger.error(f"流动效率指标分析失败: {e}")
-        
-        return insights
+            db.rollback()
+            logger.error(f"写入AI洞察失败: {e}")
+            raise
+        finally:
+            db.close()
     
-    async def _analyze_team_metrics(self, team_data: Dict[str, Any]) -> List[InsightCreate]:
-        """分析团队效能指标"""
-        insights = []
+    def save_recommendations(self, recommendations: List[RecommendationCreate]) -> int:
+        """批量写入改进建议，返回写入条数"""
+        if not recommendations:
+            return 0
         
+        db = SessionLocal()
         try:
-            # 团队满意度分析
-            satisfaction = team_data.get('satisfaction', 0)
-            if satisfaction < 70:  # 满意度低于70%
-                insights.append(InsightCreate(
-                    title="团队满意度偏低",
-                    description=f"当前团队满意度为 {satisfaction:.1f}%，需要关注团队状态",
-                    type=InsightType.RISK,
-                    severity=SeverityLevel.HIGH,
-                    confidence=0.80,
-                    metrics={"satisfaction": satisfaction},
-                    recommendations=[
-                        "开展团队建设活动",
-                        "改善工作环境",
-                        "提供技能培训"
-                    ]
-                ))
+            db.execute(
+                insert(RecommendationModel),
+                [recommendation.model_dump(mode="json") for recommendation in recommendations]
+            )
+            db.commit()
             
-            # 协作效率分析
-            collaboration = team_data.get('collaboration', 0)
-            if collaboration < 75:  # 协作效率低于75%
-                insights.append(InsightCreate(
-                    title="团队协作有待提升",
-                    description=f"当前协作效率为 {collaboration:.1f}%，建议加强团队沟通",
-                    type=InsightType.OPPORTUNITY,
-                    severity=SeverityLevel.MEDIUM,
-                    confidence=0.78,
-                    metrics={"collaboration": collaboration},
-                    recommendations=[
-                        "建立定期沟通机制",
-                        "使用协作工具",
-                        "明确角色职责"
-                    ]
-                ))
+            logger.info(f"写入了 {len(recommendations)} 个改进建议")
+            return len(recommendations)
             
         except Exception as e:
-            logger.error(f"团队效能指标分析失败: {e}")
-        
-        return insights
+            db.rollback()
+            logger.error(f"写入改进建议失败: {e}")
+            raise
+        finally:
+            db.close()
     
-    async def generate_recommendations(self, insights: List[Insight]) -> List[RecommendationCreate]:
-        """基于洞察生成改进建议"""
-        try:
-            recommendations = []
-            
-            for insight in insights:
-                if insight.recommendations:
-                    for rec_text in insight.recommendations:
-                        recommendation = RecommendationCreate(
-                            title=f"针对{insight.title}的改进建议",
-                            description=rec_text,
-                            type=self._get_recommendation_type(insight.type),
-                            priority=self._get_priority_from_severity(insight.severity),
-                            effort=self._estimate_effort(rec_text),
-                            impact=self._estimate_impact(insight.severity),
-                            team_id=insight.team_id,
-                            project_id=insight.project_id,
-                            insight_id=insight.id,
-                            estimated_duration=self._estimate_duration(rec_text)
-                        )
-                        recommendations.append(recommendation)
-            
-            logger.info(f"生成了 {len(recommendations)} 个改进建议")
-            return recommendations
-            
-        except Exception as e:
-            logger.error(f"生成改进建议失败: {e}")
-            return []
+    async def generate_and_save_recommendations(self, insights: List[Insight]) -> int:
+        """生成改进建议并批量写入 recommendations 表(insights 须为已写入的洞察)"""
+        recommendations = await self.generate_recommendations(insights)
+        return await asyncio.to_thread(self.save_recommendations, recommendations)
     
     def _get_recommendation_type(self, insight_type: InsightType) -> str:
         """根据洞察类型确定建议类型"""
@@ -253,12 +204,11 @@ class AIService:
         }
         return mapping.get(severity, PriorityLevel.MEDIUM)
     
-    def _estimate_effort(self, recommendation: str) -> str:
-        """估算实施工作量"""
-        # 简单的关键词匹配
-        if any(word in recommendation.lower() for word in ['自动化', '工具', '系统']):
+    def _estimate_effort(self, categories: FrozenSet[str]) -> str:
+        """估算实施工作量(categories 为关键词匹配器返回的分类)"""
+        if "effort.high" in categories:
             return "high"
-        elif any(word in recommendation.lower() for word in ['流程', '规范', '培训']):
+        elif "effort.medium" in categories:
             return "medium"
         else:
             return "low"
@@ -273,11 +223,11 @@ class AIService:
         }
         return mapping.get(severity, "medium")
     
-    def _estimate_duration(self, recommendation: str) -> int:
+    def _estimate_duration(self, categories: FrozenSet[str]) -> int:
         """估算实施时间(天)"""
-        if any(word in recommendation.lower() for word in ['自动化', '系统', '工具']):
+        if "duration.long" in categories:
             return 30  # 1个月
-        elif any(word in recommendation.lower() for word in ['流程', '规范']):
+        elif "duration.medium" in categories:
             return 14  # 2周
         else:
             return 7   # 1周
@@ -380,7 +330,7 @@ class AIService:
             X = np.array(range(len(values))).reshape(-1, 1)
             y = np.array(values)
             
-            model = LinearRegression()
+            model = linear_model.LinearRegression()
             model.fit(X, y)
             
             # 预测下一个值
@@ -415,16 +365,105 @@ class AIService:
         
         return time_series
     
+    async def analyze_data_with_query(
+        self,
+        query: str,
+        data: Optional[Dict[str, Any]] = None,
+        data_type: Optional[str] = None,
+        team_id: Optional[int] = None,
+        project_id: Optional[int] = None,
+        time_range: Optional[str] = "30d"
+    ) -> Dict[str, Any]:
+        """用自然语言查询指标数据
+
+        问题解析为结构化意图后在本地指标表上计算结果，LLM只负责组织语言；
+        结果按 (意图, 数据版本) 缓存。
+        """
+        intent = parse_query(query, data_type, team_id, project_id, time_range)
+        version = await asyncio.to_thread(metric_query_engine.data_version, intent.table)
+        cache_key = metric_query_engine.cache_key(intent, version, data)
+        
+        cached = metric_query_engine.get_cached(cache_key)
+        if cached is not None:
+            return {**cached, "cached": True}
+        
+        result = await asyncio.to_thread(metric_query_engine.execute, intent, data)
+        answer = describe_result(intent, result)
+        if self.llm_gateway and result["source"] != "none":
+            answer = await self._phrase_analysis(query, answer, result)
+        
+        analysis = {
+            "answer": answer,
+            "intent": intent.to_dict(),
+            "result": result,
+            "data_version": {"records": version[0], "max_id": version[1]},
+            "generated_at": datetime.now().isoformat(),
+            "cached": False
+        }
+        metric_query_engine.set_cached(cache_key, analysis)
+        return analysis
+    
+    async def _phrase_analysis(self, query: str, answer: str, result: Dict[str, Any]) -> str:
+        """使用LLM润色分析结论，失败时返回原结论"""
+        try:
+            prompt = f"""
+            用户问题: {query}
+            
+            分析结论: {answer}
+            计算结果: {json.dumps(result, ensure_ascii=False)}
+            
+            请用简洁、专业的中文回答用户问题，只能使用上面给出的数字，不要编造数据。
+            """
+            
+            return await self.llm_gateway.chat_completion(
+                messages=[
+                    {"role": "system", "content": "你是一个软件开发效能管理专家。"},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=300
+            )
+            
+        except Exception as e:
+            logger.error(f"分析结论润色失败: {e}")
+            return answer
+    
+    async def explain_metric(
+        self,
+        metric_name: str,
+        metric_value: float,
+        context: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """解释指标并给出基准对比
+        
+        百分位和表现等级由预计算的基准索引二分查找得到，不调用LLM。
+        """
+        if self.benchmark_index.is_stale():
+            await asyncio.to_thread(self.benchmark_index.refresh)
+        return self.benchmark_index.explain(metric_name, metric_value)
+    
     async def chat_with_ai(self, message: ChatMessage) -> ChatResponse:
         """AI聊天功能"""
         try:
+            # 相同或相近的问题直接返回缓存回复
+            if self.response_cache is not None:
+                cached = self.response_cache.get(message.message, message.context)
+                if cached is not None:
+                    return cached.model_copy(update={"timestamp": datetime.now()})
+            
             # 如果有OpenAI API，使用真实的AI
-            if self.openai_client and settings.OPENAI_API_KEY:
-                response = await self._openai_chat(message)
+            if self.llm_gateway:
+                try:
+                    response = await self._openai_chat(message)
+                except Exception:
+                    # 降级为模拟响应，不写入缓存
+                    return await self._mock_chat(message)
             else:
                 # 使用模拟响应
                 response = await self._mock_chat(message)
             
+            if self.response_cache is not None:
+                self.response_cache.set(message.message, response, message.context)
+            
             return response
             
         except Exception as e:
@@ -435,57 +474,104 @@ class AIService:
                 timestamp=datetime.now()
             )
     
+    async def stream_chat_with_ai(self, message: ChatMessage) -> AsyncIterator[Union[str, ChatResponse]]:
+        """流式AI聊天: 逐段产出回复文本，最后产出完整的 ChatResponse"""
+        # 相同或相近的问题直接返回缓存回复
+        if self.response_cache is not None:
+            cached = self.response_cache.get(message.message, message.context)
+            if cached is not None:
+                yield cached.response
+                yield cached.model_copy(update={"timestamp": datetime.now()})
+                return
+        
+        if self.llm_gateway:
+            parts: List[str] = []
+            try:
+                async for content in self.llm_gateway.stream_chat_completion(
+                    messages=self._build_chat_messages(message)
+                ):
+                    parts.append(content)
+                    yield content
+                
+                response = self._openai_chat_response("".join(parts))
+                if self.response_cache is not None:
+                    self.response_cache.set(message.message, response, message.context)
+                yield response
+                return
+                
+            except Exception as e:
+                # 已经输出部分内容时无法降级
+                if parts:
+                    raise
+                logger.error(f"OpenAI流式聊天失败: {e}")
+        
+        # 使用模拟响应(OpenAI调用失败时不写入缓存)
+        response = await self._mock_chat(message)
+        for piece in self._split_for_stream(response.response):
+            yield piece
+        if not self.llm_gateway and self.response_cache is not None:
+            self.response_cache.set(message.message, response, message.context)
+        yield response
+    
+    def _build_chat_messages(self, message: ChatMessage) -> List[Dict[str, str]]:
+        """构建聊天请求消息"""
+        prompt = f"""
+        你是一个软件开发效能管理专家，专门帮助团队提升开发效能。
+        请基于用户的问题提供专业的建议和分析。
+        
+        用户问题: {message.message}
+        
+        请提供简洁、实用的回答。
+        """
+        
+        return [
+            {"role": "system", "content": "你是一个软件开发效能管理专家。"},
+            {"role": "user", "content": prompt}
+        ]
+    
+    def _openai_chat_response(self, text: str) -> ChatResponse:
+        """构建OpenAI回复"""
+        return ChatResponse(
+            response=text,
+            confidence=0.85,
+            suggestions=[
+                "查看相关指标趋势",
+                "分析团队效能报告",
+                "制定改进计划"
+            ],
+            timestamp=datetime.now()
+        )
+    
+    @staticmethod
+    def _split_for_stream(text: str) -> List[str]:
+        """按标点将完整回复切分为多段，用于模拟流式输出"""
+        return [piece for piece in re.split(r"(?<=[，。；：、！？,.;:!?])", text) if piece]
+    
     async def _openai_chat(self, message: ChatMessage) -> ChatResponse:
         """使用OpenAI进行聊天"""
         try:
-            prompt = f"""
-            你是一个软件开发效能管理专家，专门帮助团队提升开发效能。
-            请基于用户的问题提供专业的建议和分析。
-            
-            用户问题: {message.message}
-            
-            请提供简洁、实用的回答。
-            """
-            
-            response = await self.openai_client.ChatCompletion.acreate(
-                model=settings.OPENAI_MODEL,
-                messages=[
-                    {"role": "system", "content": "你是一个软件开发效能管理专家。"},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=settings.OPENAI_MAX_TOKENS,
-                temperature=settings.OPENAI_TEMPERATURE
+            ai_response = await self.llm_gateway.chat_completion(
+                messages=self._build_chat_messages(message)
             )
             
-            ai_response = response.choices[0].message.content
-            
-            return ChatResponse(
-                response=ai_response,
-                confidence=0.85,
-                suggestions=[
-                    "查看相关指标趋势",
-                    "分析团队效能报告",
-                    "制定改进计划"
-                ],
-                timestamp=datetime.now()
-            )
+            return self._openai_chat_response(ai_response)
             
         except Exception as e:
             logger.error(f"OpenAI聊天失败: {e}")
-            return await self._mock_chat(message)
+            raise
     
     async def _mock_chat(self, message: ChatMessage) -> ChatResponse:
         """模拟AI聊天响应"""
-        # 简单的关键词匹配
-        msg_lower = message.message.lower()
+        # 关键词匹配
+        topics = keyword_matcher.match(message.message)
         
-        if any(word in msg_lower for word in ['部署', 'deployment']):
+        if "topic.deployment" in topics:
             response = "关于部署频率，建议您关注以下几个方面：1) 建立自动化CI/CD流水线；2) 减少手动部署步骤；3) 实施渐进式部署策略。当前的部署频率数据显示还有提升空间。"
-        elif any(word in msg_lower for word in ['质量', 'quality', '测试']):
+        elif "topic.quality" in topics:
             response = "代码质量是效能的重要基础。建议：1) 提高测试覆盖率；2) 实施代码审查；3) 使用静态代码分析工具；4) 建立质量门禁。"
-        elif any(word in msg_lower for word in ['团队', 'team', '协作']):
+        elif "topic.team" in topics:
             response = "团队协作效率直接影响交付速度。建议：1) 建立定期沟通机制；2) 明确角色职责；3) 使用协作工具；4) 开展团队建设活动。"
-        elif any(word in msg_lower for word in ['流程', 'process', '效率']):
+        elif "topic.process" in topics:
             response = "流程优化是提升效能的关键。建议：1) 识别并消除瓶颈；2) 标准化工作流程；3) 减少不必要的等待时间；4) 持续改进。"
         else:
             response = "感谢您的问题。作为效能管理专家，我建议您从以下维度分析：1) 交付速度；2) 质量水平；3) 团队协作；4) 流程效率。您可以查看相关的指标数据来深入了解当前状况。"
@@ -0,0 +1,244 @@
+import zlib
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+from loguru import logger
+from sqlalchemy import and_, or_
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.pagination import encode_cursor, decode_cursor
+from app.models.models import Conversation, ConversationMessage
+
+
+# 会话标题和列表预览的最大长度
+TITLE_LENGTH = 50
+PREVIEW_LENGTH = 200
+
+
+class ChatHistoryStore:
+    """聊天历史存储
+
+    - 消息只追加写入，每次追加同时更新会话的 updated_at、消息数和最后一条消息预览
+    - 会话列表按 (updated_at, id) 倒序、消息按 id 倒序做游标(keyset)分页，
+      查询通过 (user_id, updated_at, id) 和 (conversation_id, id) 索引定位，耗时只与页大小有关
+    - 超过 CHAT_HISTORY_COMPRESS_MIN_BYTES 的消息以 zlib 压缩存储
+    """
+
+    def __init__(
+        self,
+        compression: bool = settings.CHAT_HISTORY_COMPRESSION,
+        compress_min_bytes: int = settings.CHAT_HISTORY_COMPRESS_MIN_BYTES
+    ):
+        self.compression = compression
+        self.compress_min_bytes = compress_min_bytes
+
+    def _encode(self, text: str) -> Tuple[bytes, str]:
+        """编码消息内容，压缩后更小时才使用压缩结果"""
+        raw = text.encode("utf-8")
+        if self.compression and len(raw) >= self.compress_min_bytes:
+            compressed = zlib.compress(raw)
+            if len(compressed) < len(raw):
+                return compressed, "zlib"
+        return raw, "identity"
+
+    @staticmethod
+    def _decode(body: bytes, encoding: Optional[str]) -> str:
+        """解码消息内容"""
+        if encoding == "zlib":
+            body = zlib.decompress(body)
+        return body.decode("utf-8")
+
+    def append_messages(
+        self,
+        user_id: int,
+        messages: List[Dict[str, Any]],
+        conversation_id: Optional[int] = None,
+        context: Optional[Dict[str, Any]] = None
+    ) -> int:
+        """追加消息，未指定会话时新建会话，返回会话ID
+
+        messages 中每项包含 role、content，可选 suggestions。
+        指定的会话不存在或不属于该用户时抛出 LookupError。
+        """
+        now = datetime.now()
+
+        db = SessionLocal()
+        try:
+            if conversation_id is None:
+                first = messages[0]["content"].strip()
+                conversation = Conversation(
+                    user_id=user_id,
+                    title=first[:TITLE_LENGTH] or "新对话",
+                    context=context,
+                    message_count=0,
+                    created_at=now,
+                    updated_at=now
+                )
+                db.add(conversation)
+                db.flush()
+            else:
+                conversation = db.query(Conversation).filter(
+                    Conversation.id == conversation_id,
+                    Conversation.user_id == user_id
+                ).first()
+                if conversation is None:
+                    raise LookupError(f"对话不存在: {conversation_id}")
+
+            for message in messages:
+                body, encoding = self._encode(message["content"])
+                db.add(ConversationMessage(
+                    conversation_id=conversation.id,
+                    role=message["role"],
+                    body=body,
+                    encoding=encoding,
+                    suggestions=message.get("suggestions"),
+                    created_at=now
+                ))
+
+            conversation.message_count = (conversation.message_count or 0) + len(messages)
+            conversation.last_message_preview = messages[-1]["content"][:PREVIEW_LENGTH]
+            conversation.updated_at = now
+            db.commit()
+            return conversation.id
+
+        except LookupError:
+            db.rollback()
+            raise
+        except Exception as e:
+            db.rollback()
+            logger.error(f"保存聊天记录失败: {e}")
+            raise
+        finally:
+            db.close()
+
+    def record_exchange(
+        self,
+        user_id: int,
+        user_message: str,
+        ai_response: str,
+        suggestions: Optional[List[str]] = None,
+        conversation_id: Optional[int] = None,
+        context: Optional[Dict[str, Any]] = None
+    ) -> int:
+        """保存一问一答，返回会话ID"""
+        return self.append_messages(
+            user_id,
+            [
+                {"role": "user", "content": user_message},
+                {"role": "assistant", "content": ai_response, "suggestions": suggestions}
+            ],
+            conversation_id=conversation_id,
+            context=context
+        )
+
+    def list_conversations(self, user_id: int, limit: int = settings.CHAT_HISTORY_PAGE_SIZE, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """按最近更新时间倒序分页获取会话列表"""
+        position = decode_cursor(cursor, 2)
+
+        db = SessionLocal()
+        try:
+            query = db.query(Conversation).filter(Conversation.user_id == user_id)
+            if position is not None:
+                updated_at, last_id = datetime.fromisoformat(position[0]), position[1]
+                query = query.filter(or_(
+                    Conversation.updated_at < updated_at,
+                    and_(Conversation.updated_at == updated_at, Conversation.id < last_id)
+                ))
+
+            # 多取一条判断是否还有下一页
+            rows = query.order_by(Conversation.updated_at.desc(), Conversation.id.desc()).limit(limit + 1).all()
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+
+            return {
+                "conversations": [
+                    {
+                        "id": row.id,
+                        "title": row.title,
+                        "context": row.context,
+                        "message_count": row.message_count,
+                        "last_message_preview": row.last_message_preview,
+                        "created_at": row.created_at.isoformat(),
+                        "updated_at": row.updated_at.isoformat()
+                    }
+                    for row in rows
+                ],
+                "has_more": has_more,
+                "next_cursor": encode_cursor([rows[-1].updated_at.isoformat(), rows[-1].id]) if has_more else None
+            }
+        finally:
+            db.close()
+
+    def list_messages(
+        self,
+        conversation_id: int,
+        user_id: int,
+        limit: int = settings.CHAT_HISTORY_PAGE_SIZE,
+        cursor: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """从最新消息开始向前分页获取会话消息，页内按时间正序；会话不存在时返回None"""
+        position = decode_cursor(cursor, 1)
+
+        db = SessionLocal()
+        try:
+            conversation = db.query(Conversation.id).filter(
+                Conversation.id == conversation_id,
+                Conversation.user_id == user_id
+            ).first()
+            if conversation is None:
+                return None
+
+            query = db.query(ConversationMessage).filter(ConversationMessage.conversation_id == conversation_id)
+            if position is not None:
+                query = query.filter(ConversationMessage.id < position[0])
+
+            rows = query.order_by(ConversationMessage.id.desc()).limit(limit + 1).all()
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+
+            return {
+                "conversation_id": conversation_id,
+                "messages": [
+                    {
+                        "id": row.id,
+                        "role": row.role,
+                        "content": self._decode(row.body, row.encoding),
+                        "suggestions": row.suggestions,
+                        "created_at": row.created_at.isoformat()
+                    }
+                    for row in reversed(rows)
+                ],
+                "has_more": has_more,
+                "next_cursor": encode_cursor([rows[-1].id]) if has_more else None
+            }
+        finally:
+            db.close()
+
+    def delete_conversation(self, conversation_id: int, user_id: int) -> bool:
+        """删除会话及其消息，会话不存在时返回False"""
+        db = SessionLocal()
+        try:
+            conversation = db.query(Conversation.id).filter(
+                Conversation.id == conversation_id,
+                Conversation.user_id == user_id
+            ).first()
+            if conversation is None:
+                return False
+
+            db.query(ConversationMessage).filter(
+                ConversationMessage.conversation_id == conversation_id
+            ).delete(synchronize_session=False)
+            db.query(Conversation).filter(Conversation.id == conversation_id).delete(synchronize_session=False)
+            db.commit()
+            return True
+
+        except Exception as e:
+            db.rollback()
+            logger.error(f"删除对话失败: {e}")
+            raise
+        finally:
+            db.close()
+
+
+# 创建全局聊天历史存储实例
+chat_history_store = ChatHistoryStore()
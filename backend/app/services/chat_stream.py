@@ -0,0 +1,91 @@
+import asyncio
+import json
+from datetime import datetime
+from typing import AsyncIterator, Dict, Any, Optional, TypeVar
+from loguru import logger
+
+from app.core.config import settings
+from app.schemas.schemas import ChatMessage, ChatResponse
+from app.services.ai_service import AIService
+
+
+T = TypeVar("T")
+
+_END = object()
+
+
+async def iterate_with_heartbeat(
+    source: AsyncIterator[T],
+    heartbeat_interval: float = settings.WS_HEARTBEAT_INTERVAL,
+    buffer_size: int = settings.CHAT_STREAM_BUFFER_SIZE
+) -> AsyncIterator[Optional[T]]:
+    """转发异步迭代器的输出，空闲超过 heartbeat_interval 秒时产出None作为心跳
+
+    source 在独立任务中消费并写入有界队列: 客户端消费慢导致队列写满时生产任务暂停读取上游(背压)；
+    调用方停止迭代(客户端断开或取消)时取消生产任务并关闭 source。
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=buffer_size)
+
+    async def produce():
+        try:
+            async for item in source:
+                await queue.put((item, None))
+            await queue.put((_END, None))
+        except Exception as e:
+            await queue.put((_END, e))
+        finally:
+            aclose = getattr(source, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            try:
+                item, error = await asyncio.wait_for(queue.get(), timeout=heartbeat_interval)
+            except asyncio.TimeoutError:
+                yield None
+                continue
+
+            if item is _END:
+                if error is not None:
+                    raise error
+                return
+            yield item
+
+    finally:
+        # asyncio.wait 被取消时不会再次取消生产任务，保证上游连接的关闭流程完整执行
+        producer.cancel()
+        await asyncio.wait({producer})
+
+
+async def chat_stream_events(ai_service: AIService, message: ChatMessage) -> AsyncIterator[Dict[str, Any]]:
+    """流式聊天事件: start、token、ping(心跳)、done 或 error"""
+    yield {"type": "start", "timestamp": datetime.now().isoformat()}
+
+    try:
+        async for item in iterate_with_heartbeat(ai_service.stream_chat_with_ai(message)):
+            if item is None:
+                yield {"type": "ping"}
+            elif isinstance(item, ChatResponse):
+                yield {
+                    "type": "done",
+                    "message": item.response,
+                    "suggestions": item.suggestions or [],
+                    "confidence": item.confidence,
+                    "timestamp": item.timestamp.isoformat()
+                }
+            else:
+                yield {"type": "token", "content": item}
+
+    except Exception as e:
+        logger.error(f"流式聊天失败: {e}")
+        yield {"type": "error", "message": "AI聊天服务暂时不可用"}
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """格式化为Server-Sent Events消息，心跳使用注释行"""
+    if event["type"] == "ping":
+        return ": ping\n\n"
+    data = json.dumps({key: value for key, value in event.items() if key != "type"}, ensure_ascii=False)
+    return f"event: {event['type']}\ndata: {data}\n\n"
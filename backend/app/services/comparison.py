@@ -0,0 +1,275 @@
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Dict, Any, List, NamedTuple, Optional, Tuple
+from sqlalchemy import select
+
+from app.core.database import engine
+from app.core.lazy import LazyModule
+from app.models.models import Project, ProjectMetric, Team, TeamMetric
+
+if TYPE_CHECKING:
+    import numpy as np
+else:
+    np = LazyModule("numpy")
+
+
+# 一次对比最多包含的实体数
+MAX_COMPARISON_ENTITIES = 500
+
+# 结果中各统计量的小数位数，None 表示整数(默认2位)
+STATISTIC_DIGITS = {"zscore": 3, "rank": None, "previous_rank": None, "rank_change": None}
+
+METRIC_LABELS = {
+    "overall_score": "综合评分",
+    "efficiency": "效能",
+    "velocity": "速度",
+    "satisfaction": "满意度",
+    "collaboration": "协作",
+    "health_score": "健康度",
+    "progress": "进度",
+    "resource_utilization": "资源利用率"
+}
+
+
+class ComparisonSpec(NamedTuple):
+    """一类可对比实体的指标来源"""
+    metric_model: Any  # 指标历史表
+    entity_column: str  # 指标表中的实体ID列
+    entity_model: Any
+    detail_fields: Tuple[str, ...]  # 结果中附带的实体字段(名称以外)
+    metrics: Tuple[str, ...]
+    default_metric: str  # metric=overall 时使用的指标
+
+
+COMPARISON_SPECS: Dict[str, ComparisonSpec] = {
+    "team": ComparisonSpec(
+        TeamMetric, "team_id", Team, (),
+        ("overall_score", "efficiency", "velocity", "satisfaction", "collaboration"), "overall_score"
+    ),
+    "project": ComparisonSpec(
+        ProjectMetric, "project_id", Project, ("status",),
+        ("health_score", "progress", "resource_utilization"), "health_score"
+    )
+}
+
+
+def parse_ids(value: str, label: str) -> List[int]:
+    """解析逗号分隔的ID(去重并保持顺序)，不合法时抛出 ValueError"""
+    try:
+        ids = list(dict.fromkeys(int(part.strip()) for part in value.split(",") if part.strip()))
+    except ValueError:
+        raise ValueError(f"{label} 必须为逗号分隔的ID")
+    if not ids:
+        raise ValueError(f"请至少指定一个ID: {label}")
+    if len(ids) > MAX_COMPARISON_ENTITIES:
+        raise ValueError(f"最多同时对比 {MAX_COMPARISON_ENTITIES} 个对象")
+    return ids
+
+
+def _day(value: datetime) -> datetime:
+    # 与其他表一致，统一按本地时间的日期对齐
+    return value.astimezone().replace(tzinfo=None) if value.tzinfo else value
+
+
+def _optional(values: "np.ndarray", digits: Optional[int] = 2) -> List[Any]:
+    """NaN 转为 None 的数值列表，digits 为空时转为整数"""
+    return [
+        None if np.isnan(value) else int(value) if digits is None else round(float(value), digits)
+        for value in values
+    ]
+
+
+def _ranks(values: "np.ndarray") -> "np.ndarray":
+    """按数值倒序的排名(从1开始，同分并列)，NaN 的排名为 NaN"""
+    ranks = 1 + (values[np.newaxis, :] > values[:, np.newaxis]).sum(axis=1).astype(np.float64)
+    ranks[np.isnan(values)] = np.nan
+    return ranks
+
+
+class ComparisonEngine:
+    """多团队/多项目对比分析
+
+    一次查询读取所有对比对象在时间窗口内的指标历史，每个指标按天对齐为
+    (实体 × 天) 的矩阵(同一天取最后一次测量，缺失的天沿用之前的值)。变化量、
+    组内 z-score、排名变化和实体间相关系数都在矩阵上向量化计算，不逐个实体查询。
+    """
+
+    def load(
+        self,
+        spec: ComparisonSpec,
+        entity_ids: List[int],
+        since: datetime
+    ) -> Dict[str, "np.ndarray"]:
+        """读取指标历史，返回 {指标: 实体×天矩阵}，矩阵的行顺序与 entity_ids 一致"""
+        entity_column = getattr(spec.metric_model, spec.entity_column)
+        statement = (
+            select(entity_column, spec.metric_model.measured_at, *(getattr(spec.metric_model, m) for m in spec.metrics))
+            .where(entity_column.in_(entity_ids))
+            .where(spec.metric_model.measured_at >= since)
+            .order_by(spec.metric_model.measured_at, spec.metric_model.id)
+        )
+        with engine.connect() as connection:
+            rows = connection.execute(statement).all()
+
+        start = np.datetime64(since.date(), "D")
+        days = int((np.datetime64(datetime.now().date(), "D") - start).astype(np.int64)) + 1
+        matrices = {metric: np.full((len(entity_ids), days), np.nan) for metric in spec.metrics}
+        if not rows:
+            return matrices
+
+        columns = list(zip(*rows))
+        position = {entity_id: index for index, entity_id in enumerate(entity_ids)}
+        row_index = np.fromiter((position[value] for value in columns[0]), dtype=np.int64, count=len(rows))
+        measured = np.array([_day(value) for value in columns[1]], dtype="datetime64[D]")
+        day_index = np.clip((measured - start).astype(np.int64), 0, days - 1)
+
+        # 同一(实体, 天)的多次测量只保留最后一次: 行已按时间排序，反转后 np.unique 取到的首个即最后一次
+        cell = row_index * days + day_index
+        _, last = np.unique(cell[::-1], return_index=True)
+        last = len(rows) - 1 - last
+        for offset, metric in enumerate(spec.metrics):
+            values = np.array(columns[2 + offset], dtype=np.float64)[last]
+            matrices[metric][row_index[last], day_index[last]] = values
+        return matrices
+
+    @staticmethod
+    def forward_fill(matrix: "np.ndarray") -> "np.ndarray":
+        """沿时间轴用最近一次的值填充缺失"""
+        index = np.where(np.isnan(matrix), 0, np.arange(matrix.shape[1]))
+        np.maximum.accumulate(index, axis=1, out=index)
+        return matrix[np.arange(matrix.shape[0])[:, np.newaxis], index]
+
+    @staticmethod
+    def first_observed(matrix: "np.ndarray") -> "np.ndarray":
+        """每个实体在窗口内的第一次测量值"""
+        observed = ~np.isnan(matrix)
+        first = matrix[np.arange(matrix.shape[0]), observed.argmax(axis=1)]
+        first[~observed.any(axis=1)] = np.nan
+        return first
+
+    @staticmethod
+    def correlation(matrix: "np.ndarray") -> "np.ndarray":
+        """实体间指标走势的皮尔逊相关系数矩阵(缺失的天按该实体均值处理，无波动的实体为 NaN)"""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            centered = matrix - np.nanmean(matrix, axis=1, keepdims=True)
+            centered = np.nan_to_num(centered, nan=0.0)
+            norms = np.sqrt((centered ** 2).sum(axis=1))
+            result = (centered @ centered.T) / np.outer(norms, norms)
+        result[(norms == 0)[:, np.newaxis] | (norms == 0)[np.newaxis, :]] = np.nan
+        return result
+
+    def metric_statistics(self, matrix: "np.ndarray") -> Dict[str, "np.ndarray"]:
+        """一个指标的向量化统计: 最新值、窗口内首个值、变化量、组内 z-score 和排名变化"""
+        filled = self.forward_fill(matrix)
+        latest = filled[:, -1]
+        first = self.first_observed(matrix)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            delta = latest - first
+            delta_pct = np.where(first != 0, delta / np.abs(first) * 100, np.nan)
+            measured = ~np.isnan(latest)
+            mean = latest[measured].mean() if measured.any() else np.nan
+            std = latest[measured].std() if measured.any() else np.nan
+            # 组内各值相同时 z-score 为0
+            zscore = np.where(std > 0, (latest - mean) / std, 0.0)
+            zscore[~measured] = np.nan
+        rank, previous_rank = _ranks(latest), _ranks(first)
+        return {
+            "latest": latest,
+            "first": first,
+            "delta": delta,
+            "delta_pct": delta_pct,
+            "zscore": zscore,
+            "rank": rank,
+            "previous_rank": previous_rank,
+            # 正数表示排名上升
+            "rank_change": previous_rank - rank
+        }
+
+    def details(self, spec: ComparisonSpec, entity_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """一次查询读取实体名称等字段，不存在的ID不在结果中"""
+        model = spec.entity_model
+        fields = ("name",) + spec.detail_fields
+        statement = select(model.id, *(getattr(model, field) for field in fields)).where(model.id.in_(entity_ids))
+        with engine.connect() as connection:
+            rows = connection.execute(statement).all()
+        return {row[0]: dict(zip(fields, row[1:])) for row in rows}
+
+    def compare(self, entity_type: str, entity_ids: List[int], metric: str = "overall", days: int = 90) -> Dict[str, Any]:
+        """对比一组团队或项目，metric 为排序和相关性分析使用的指标"""
+        spec = COMPARISON_SPECS[entity_type]
+        metric = spec.default_metric if metric == "overall" else metric
+        if metric not in spec.metrics:
+            raise ValueError(f"不支持的对比指标: {metric}，可选: {', '.join(spec.metrics)}")
+
+        details = self.details(spec, entity_ids)
+        missing = [entity_id for entity_id in entity_ids if entity_id not in details]
+        entity_ids = [entity_id for entity_id in entity_ids if entity_id in details]
+        result = {"metric": metric, "days": days, "entities": [], "missing_ids": missing, "summary": {}, "insights": []}
+        if not entity_ids:
+            return result
+
+        since = datetime.combine(datetime.now().date() - timedelta(days=days - 1), datetime.min.time())
+        matrices = self.load(spec, entity_ids, since)
+
+        statistics = {name: self.metric_statistics(matrix) for name, matrix in matrices.items()}
+        columns = {
+            name: {key: _optional(values, STATISTIC_DIGITS.get(key, 2)) for key, values in stats.items()}
+            for name, stats in statistics.items()
+        }
+
+        # 每个实体走势最接近的对象
+        correlation = self.correlation(matrices[metric])
+        np.fill_diagonal(correlation, np.nan)
+        has_peer = ~np.isnan(correlation).all(axis=1)
+        peers = np.where(np.isnan(correlation), -np.inf, correlation).argmax(axis=1)
+
+        entities = result["entities"]
+        for row, entity_id in enumerate(entity_ids):
+            entities.append({
+                "id": entity_id,
+                **details[entity_id],
+                "metrics": {
+                    name: {key: values[row] for key, values in column.items()}
+                    for name, column in columns.items()
+                },
+                "most_similar": {
+                    "id": entity_ids[peers[row]],
+                    "correlation": round(float(correlation[row, peers[row]]), 3)
+                } if has_peer[row] else None
+            })
+        entities.sort(key=lambda entity: (entity["metrics"][metric]["rank"] is None, entity["metrics"][metric]["rank"] or 0))
+
+        summary = result["summary"]
+        for name, stats in statistics.items():
+            latest = stats["latest"]
+            measured = ~np.isnan(latest)
+            summary[name] = {
+                "measured": int(measured.sum()),
+                "mean": round(float(latest[measured].mean()), 2) if measured.any() else None,
+                "std": round(float(latest[measured].std()), 2) if measured.any() else None,
+                "leader": entity_ids[int(np.nanargmax(latest))] if measured.any() else None,
+                "most_improved": entity_ids[int(np.nanargmax(stats["delta"]))] if (stats["delta"] > 0).any() else None
+            }
+
+        result["insights"] = self.describe(result)
+        return result
+
+    @staticmethod
+    def describe(result: Dict[str, Any]) -> List[str]:
+        """对比结论: 各指标领先和进步最大的对象"""
+        names = {entity["id"]: entity["name"] for entity in result["entities"]}
+        if len(names) < 2:
+            return []
+        leading: Dict[int, List[str]] = {}
+        improved: Dict[int, List[str]] = {}
+        for name, summary in result["summary"].items():
+            if summary["leader"] is not None:
+                leading.setdefault(summary["leader"], []).append(METRIC_LABELS[name])
+            if summary["most_improved"] is not None:
+                improved.setdefault(summary["most_improved"], []).append(METRIC_LABELS[name])
+        insights = [f"{names[entity_id]}在{'、'.join(labels)}方面表现最佳" for entity_id, labels in leading.items()]
+        insights += [f"{names[entity_id]}的{'、'.join(labels)}提升最多" for entity_id, labels in improved.items()]
+        return insights
+
+
+# 创建全局对比分析引擎实例
+comparison_engine = ComparisonEngine()
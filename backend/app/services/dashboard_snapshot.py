@@ -0,0 +1,238 @@
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional
+from loguru import logger
+from sqlalchemy import func
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.models import DashboardSnapshot as DashboardSnapshotModel
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """不可变的仪表盘快照"""
+    version: int
+    created_at: datetime
+    data: Dict[str, Any]
+
+    @property
+    def age_seconds(self) -> float:
+        """快照已存在的秒数"""
+        return (datetime.now() - self.created_at).total_seconds()
+
+
+class DashboardSnapshotStore:
+    """仪表盘快照存储
+
+    采集周期结束后发布一个新版本快照(写入 dashboard_snapshots 表并替换内存中的最新快照)，
+    读取时直接返回内存中的最新快照。其他工作进程发布的新版本按
+    DASHBOARD_SNAPSHOT_POLL_INTERVAL 间隔检查版本号后加载。
+    """
+
+    def __init__(self):
+        self._latest: Optional[Snapshot] = None
+        self._last_checked = 0.0
+
+    def publish(self, data: Dict[str, Any]) -> Snapshot:
+        """发布新快照"""
+        created_at = datetime.now()
+        version = (self._latest.version + 1) if self._latest else 1
+
+        db = SessionLocal()
+        try:
+            record = DashboardSnapshotModel(data=data, created_at=created_at)
+            db.add(record)
+            db.flush()
+            version = record.id
+
+            # 清理过期版本
+            db.query(DashboardSnapshotModel).filter(
+                DashboardSnapshotModel.id <= version - settings.DASHBOARD_SNAPSHOT_RETENTION
+            ).delete(synchronize_session=False)
+            db.commit()
+
+        except Exception as e:
+            db.rollback()
+            logger.error(f"保存仪表盘快照失败: {e}")
+        finally:
+            db.close()
+
+        snapshot = Snapshot(version=version, created_at=created_at, data=data)
+        self._latest = snapshot
+        self._last_checked = time.monotonic()
+
+        logger.info(f"仪表盘快照已发布: v{version}")
+        return snapshot
+
+    def latest(self) -> Optional[Snapshot]:
+        """获取最新快照"""
+        now = time.monotonic()
+        if self._latest is None or now - self._last_checked >= settings.DASHBOARD_SNAPSHOT_POLL_INTERVAL:
+            self._last_checked = now
+            self._load_newer()
+        return self._latest
+
+    def _load_newer(self):
+        """加载其他进程发布的更新版本"""
+        db = SessionLocal()
+        try:
+            latest_version = db.query(func.max(DashboardSnapshotModel.id)).scalar()
+            if latest_version is None or (self._latest and latest_version <= self._latest.version):
+                return
+
+            record = db.get(DashboardSnapshotModel, latest_version)
+            if record is not None:
+                created_at = record.created_at or datetime.now()
+                if created_at.tzinfo is not None:
+                    created_at = created_at.astimezone().replace(tzinfo=None)
+                self._latest = Snapshot(version=record.id, created_at=created_at, data=record.data)
+
+        except Exception as e:
+            logger.error(f"加载仪表盘快照失败: {e}")
+        finally:
+            db.close()
+
+
+def build_dashboard_overview(metrics_data: Dict[str, Any]) -> Dict[str, Any]:
+    """根据采集结果构建仪表盘概览数据"""
+    return {
+        "dora_metrics": {
+            "deployment_frequency": metrics_data.get('dora', {}).get('deployment_frequency', 0.5),
+            "lead_time_for_changes": metrics_data.get('dora', {}).get('lead_time_for_changes', 48),
+            "change_failure_rate": metrics_data.get('dora', {}).get('change_failure_rate', 10),
+            "time_to_restore_service": metrics_data.get('dora', {}).get('time_to_restore_service', 4),
+            "trend": {
+                "deployment_frequency": "up",
+                "lead_time_for_changes": "down",
+                "change_failure_rate": "down",
+                "time_to_restore_service": "stable"
+            }
+        },
+        "flow_metrics": {
+            "flow_efficiency": metrics_data.get('flow', {}).get('flow_efficiency', 25),
+            "work_in_progress": metrics_data.get('flow', {}).get('work_in_progress', 8),
+            "cycle_time": metrics_data.get('flow', {}).get('cycle_time', 7),
+            "throughput": metrics_data.get('flow', {}).get('throughput', 3),
+            "trend": {
+                "flow_efficiency": "up",
+                "work_in_progress": "down",
+                "cycle_time": "down",
+                "throughput": "up"
+            }
+        },
+        "team_rankings": [
+            {
+                "id": 1,
+                "name": "前端团队",
+                "score": 85,
+                "trend": "up",
+                "change": 5,
+                "members": 6
+            },
+            {
+                "id": 2,
+                "name": "后端团队",
+                "score": 82,
+                "trend": "stable",
+                "change": 1,
+                "members": 8
+            },
+            {
+                "id": 3,
+                "name": "移动端团队",
+                "score": 78,
+                "trend": "up",
+                "change": 3,
+                "members": 4
+            }
+        ],
+        "recent_activities": [
+            {
+                "id": 1,
+                "type": "deployment",
+                "title": "生产环境部署",
+                "description": "v2.1.0 版本成功部署到生产环境",
+                "team": "前端团队",
+                "status": "success",
+                "timestamp": (datetime.now() - timedelta(minutes=30)).isoformat()
+            },
+            {
+                "id": 2,
+                "type": "commit",
+                "title": "功能开发",
+                "description": "完成用户权限管理模块开发",
+                "team": "后端团队",
+                "status": "completed",
+                "timestamp": (datetime.now() - timedelta(hours=1)).isoformat()
+            },
+            {
+                "id": 3,
+                "type": "incident",
+                "title": "性能问题",
+                "description": "API响应时间异常，已修复",
+                "team": "后端团队",
+                "status": "resolved",
+                "timestamp": (datetime.now() - timedelta(hours=2)).isoformat()
+            },
+            {
+                "id": 4,
+                "type": "review",
+                "title": "代码审查",
+                "description": "完成支付模块代码审查",
+                "team": "前端团队",
+                "status": "approved",
+                "timestamp": (datetime.now() - timedelta(hours=3)).isoformat()
+            }
+        ],
+        "alerts": [
+            {
+                "id": 1,
+                "type": "warning",
+                "title": "部署频率偏低",
+                "message": "本周部署频率低于目标值，建议关注",
+                "severity": "medium",
+                "timestamp": (datetime.now() - timedelta(hours=1)).isoformat()
+            },
+            {
+                "id": 2,
+                "type": "info",
+                "title": "代码质量提升",
+                "message": "本月代码审查通过率达到95%",
+                "severity": "low",
+                "timestamp": (datetime.now() - timedelta(hours=6)).isoformat()
+            }
+        ]
+    }
+
+
+def overview_metric_values(overview: Dict[str, Any]) -> Dict[str, float]:
+    """仪表盘概览中的全组织指标数值 {指标名: 值}(DORA指标和流动效率指标)"""
+    values = {}
+    for section in ("dora_metrics", "flow_metrics"):
+        for name, value in (overview.get(section) or {}).items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                values[name] = value
+    return values
+
+
+def overview_delta(previous: Optional[Dict[str, Any]], current: Dict[str, Any]) -> Dict[str, Any]:
+    """两个快照之间变化的部分: 顶层为字典的分类只保留变化的子项"""
+    if previous is None:
+        return current
+
+    delta = {}
+    for key, value in current.items():
+        old = previous.get(key)
+        if value == old:
+            continue
+        if isinstance(value, dict) and isinstance(old, dict):
+            delta[key] = {name: item for name, item in value.items() if old.get(name) != item}
+        else:
+            delta[key] = value
+    return delta
+
+
+# 创建全局仪表盘快照存储实例
+dashboard_snapshots = DashboardSnapshotStore()
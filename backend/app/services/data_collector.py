@@ -1,22 +1,50 @@
 import asyncio
 import aiohttp
 import json
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
 from loguru import logger
 import base64
 
 from app.core.config import settings
+from app.services.dashboard_snapshot import (
+    Snapshot, dashboard_snapshots, build_dashboard_overview, overview_delta
+)
+from app.services.event_bus import event_bus
+from app.services.activity_store import activity_store
+from app.services.single_flight import SingleFlight
+from app.core.locks import FileLock
+from app.services.scheduler import PeriodicScheduler
 from app.schemas.schemas import (
     DoraMetricCreate, FlowMetricCreate, TeamMetricCreate
 )
 
 
+# 支持的指标类型
+METRIC_TYPES = ('dora', 'flow', 'team')
+
+# 各数据源的原始数据采集方法
+SOURCE_METHODS = {
+    'github': ('collect_deployment_data', 'collect_pull_requests', 'collect_team_activity'),
+    'jira': ('collect_work_items', 'collect_team_performance'),
+    'jenkins': ('collect_build_data',)
+}
+
+# 各数据源最近一次定时采集的原始数据
+_source_data: Dict[str, Dict[str, Any]] = {}
+
+# 进程内共享的采集请求合并器(DataCollector 会按请求创建多个实例)
+_collection_flight = SingleFlight()
+
+
 class DataCollector:
     """数据采集服务类"""
     
     def __init__(self):
         self.session = None
+        self._collection_task: Optional[asyncio.Task] = None
+        self.scheduler: Optional[PeriodicScheduler] = None
+        self._refresh_task: Optional[asyncio.Task] = None
         self.collectors = {
             'github': GitHubCollector(),
             'jira': JiraCollector(),
@@ -29,8 +57,15 @@ class DataCollector:
         try:
             self.session = aiohttp.ClientSession()
             
-            # 启动定期采集任务
-            asyncio.create_task(self._periodic_collection())
+            # 按数据源分别定时采集，多工作进程时只有持锁进程执行
+            self.scheduler = PeriodicScheduler(lock=FileLock(settings.SCHEDULER_LOCK_FILE))
+            for source, interval in self._source_intervals().items():
+                self.scheduler.add_job(
+                    f"collect:{source}",
+                    lambda source=source: self.collect_source_and_publish(source),
+                    interval=interval
+                )
+            self._collection_task = asyncio.create_task(self.scheduler.run())
             
             logger.info("数据采集服务已启动")
             
@@ -40,6 +75,10 @@ class DataCollector:
     async def stop_collection(self):
         """停止数据采集"""
         try:
+            if self._collection_task:
+                self._collection_task.cancel()
+                await asyncio.gather(self._collection_task, return_exceptions=True)
+            
             if self.session:
                 await self.session.close()
             
@@ -48,37 +87,129 @@ class DataCollector:
         except Exception as e:
             logger.error(f"停止数据采集服务失败: {e}")
     
-    async def _periodic_collection(self):
-        """定期数据采集"""
-        while True:
-            try:
-                await self.collect_all_metrics()
-                await asyncio.sleep(settings.DATA_COLLECTION_INTERVAL)
-                
-            except Exception as e:
-                logger.error(f"定期数据采集失败: {e}")
-                await asyncio.sleep(60)  # 出错时等待1分钟后重试
+    def _source_intervals(self) -> Dict[str, int]:
+        """各数据源的采集间隔(秒)"""
+        return {
+            'github': settings.GITHUB_COLLECTION_INTERVAL or settings.DATA_COLLECTION_INTERVAL,
+            'jira': settings.JIRA_COLLECTION_INTERVAL or settings.DATA_COLLECTION_INTERVAL,
+            'jenkins': settings.JENKINS_COLLECTION_INTERVAL or settings.DATA_COLLECTION_INTERVAL
+        }
+    
+    async def collect_source(self, source: str) -> Dict[str, Any]:
+        """采集单个数据源的原始数据"""
+        collector = self.collectors[source]
+        methods = SOURCE_METHODS[source]
+        
+        results = await asyncio.gather(
+            *(getattr(collector, method)() for method in methods),
+            return_exceptions=True
+        )
+        
+        data = {
+            method: result if not isinstance(result, Exception) else {}
+            for method, result in zip(methods, results)
+        }
+        _source_data[source] = data
+        
+        # 原始事件写入活动事件表(按上游ID去重)，并按团队/项目推送新增数量
+        try:
+            inserted = await asyncio.to_thread(activity_store.record_source, source, data)
+            for (team_id, project_id), count in inserted.items():
+                await event_bus.publish(
+                    "activities", {"source": source, "new_events": count},
+                    team_id=team_id, project_id=project_id
+                )
+        except Exception as e:
+            logger.error(f"写入{source}活动事件失败: {e}")
+        
+        return data
+    
+    def metrics_from_sources(self) -> Dict[str, Any]:
+        """基于各数据源最近一次采集的原始数据计算指标"""
+        github = _source_data.get('github', {})
+        jira = _source_data.get('jira', {})
+        jenkins = _source_data.get('jenkins', {})
+        
+        return {
+            'dora': self._calculate_dora_metrics(
+                github.get('collect_deployment_data', {}), jenkins.get('collect_build_data', {})
+            ),
+            'flow': self._calculate_flow_metrics(
+                jira.get('collect_work_items', {}), github.get('collect_pull_requests', {})
+            ),
+            'team': self._calculate_team_metrics(
+                github.get('collect_team_activity', {}), jira.get('collect_team_performance', {})
+            ),
+            'timestamp': datetime.now().isoformat()
+        }
+    
+    async def collect_source_and_publish(self, source: str) -> Snapshot:
+        """采集单个数据源并基于最新原始数据发布仪表盘快照"""
+        await self.collect_source(source)
+        return await self._publish_snapshot(build_dashboard_overview(self.metrics_from_sources()))
+    
+    async def collect_and_publish(self) -> Snapshot:
+        """采集指标数据并发布新的仪表盘快照"""
+        metrics_data = await self.collect_all_metrics()
+        return await self._publish_snapshot(build_dashboard_overview(metrics_data))
+    
+    async def _publish_snapshot(self, overview: Dict[str, Any]) -> Snapshot:
+        """发布仪表盘快照，并向订阅客户端推送与上一版本相比变化的部分"""
+        previous = await asyncio.to_thread(dashboard_snapshots.latest)
+        snapshot = await asyncio.to_thread(dashboard_snapshots.publish, overview)
+        delta = overview_delta(previous.data if previous else None, snapshot.data)
+        if delta:
+            await event_bus.publish("metrics", {"version": snapshot.version, "changed": delta})
+        return snapshot
+    
+    def request_refresh(self) -> bool:
+        """在后台触发一次采集，不等待结果；已有采集在进行时返回False"""
+        if self._refresh_task and not self._refresh_task.done():
+            return False
+        
+        self._refresh_task = asyncio.create_task(self._refresh())
+        return True
     
-    async def collect_all_metrics(self) -> Dict[str, Any]:
-        """采集所有指标数据"""
+    async def _refresh(self):
+        """后台刷新任务"""
+        try:
+            await self.collect_and_publish()
+        except Exception as e:
+            logger.error(f"刷新仪表盘快照失败: {e}")
+    
+    async def collect_all_metrics(self, metric_types: Optional[List[str]] = None) -> Dict[str, Any]:
+        """采集所有指标数据
+        
+        各数据源按整个组织采集，不区分团队和项目。相同指标类型的并发调用合并为一次采集，
+        DATA_COLLECTION_RESULT_TTL 内的重复调用直接复用上次结果。返回结果在调用方之间共享，不应修改。
+        """
+        types = tuple(sorted(set(metric_types))) if metric_types else METRIC_TYPES
+        return await _collection_flight.do(
+            types,
+            lambda: self._collect_metrics(types),
+            ttl=settings.DATA_COLLECTION_RESULT_TTL
+        )
+    
+    async def _collect_metrics(self, metric_types: Tuple[str, ...]) -> Dict[str, Any]:
+        """执行一次指标采集"""
         try:
             logger.info("开始采集指标数据...")
             
             # 并行采集各类数据
-            tasks = [
-                self.collect_dora_metrics(),
-                self.collect_flow_metrics(),
-                self.collect_team_metrics()
-            ]
+            collectors = {
+                'dora': self.collect_dora_metrics,
+                'flow': self.collect_flow_metrics,
+                'team': self.collect_team_metrics
+            }
+            tasks = [collectors[metric_type]() for metric_type in metric_types]
             
             results = await asyncio.gather(*tasks, return_exceptions=True)
             
             metrics_data = {
-                'dora': results[0] if not isinstance(results[0], Exception) else {},
-                'flow': results[1] if not isinstance(results[1], Exception) else {},
-                'team': results[2] if not isinstance(results[2], Exception) else {},
-                'timestamp': datetime.now().isoformat()
+                metric_type: result if not isinstance(result, Exception) else {}
+                for metric_type, result in zip(metric_types, results)
             }
+            metrics_data['timestamp'] = datetime.now().isoformat()
             
             logger.info("指标数据采集完成")
             return metrics_data
@@ -257,6 +388,8 @@ class GitHubCollector:
             deployments = [
                 {
                     'id': 1,
+                    'team_id': 4,
+                    'project_id': 1,
                     'status': 'success',
                     'created_at': (datetime.now() - timedelta(days=1)).isoformat(),
                     'lead_time': 24,
@@ -264,6 +397,8 @@ class GitHubCollector:
                 },
                 {
                     'id': 2,
+                    'team_id': 4,
+                    'project_id': 1,
                     'status': 'failed',
                     'created_at': (datetime.now() - timedelta(days=2)).isoformat(),
                     'lead_time': 36,
@@ -284,6 +419,8 @@ class GitHubCollector:
             pull_requests = [
                 {
                     'id': 1,
+                    'team_id': 1,
+                    'project_id': 1,
                     'state': 'merged',
                     'created_at': (datetime.now() - timedelta(days=1)).isoformat(),
                     'merged_at': datetime.now().isoformat(),
@@ -291,6 +428,8 @@ class GitHubCollector:
                 },
                 {
                     'id': 2,
+                    'team_id': 2,
+                    'project_id': 3,
                     'state': 'open',
                     'created_at': (datetime.now() - timedelta(hours=6)).isoformat(),
                     'merged_at': None,
@@ -309,13 +448,13 @@ class GitHubCollector:
         try:
             # 模拟团队活动数据
             commits = [
-                {'id': 1, 'author': 'user1', 'date': datetime.now().isoformat()},
-                {'id': 2, 'author': 'user2', 'date': (datetime.now() - timedelta(hours=2)).isoformat()}
+                {'id': 1, 'team_id': 1, 'project_id': 1, 'author': 'user1', 'date': datetime.now().isoformat()},
+                {'id': 2, 'team_id': 2, 'project_id': 3, 'author': 'user2', 'date': (datetime.now() - timedelta(hours=2)).isoformat()}
             ]
             
             reviews = [
-                {'id': 1, 'reviewer': 'user1', 'date': datetime.now().isoformat()},
-                {'id': 2, 'reviewer': 'user3', 'date': (datetime.now() - timedelta(hours=1)).isoformat()}
+                {'id': 1, 'team_id': 1, 'project_id': 1, 'reviewer': 'user1', 'date': datetime.now().isoformat()},
+                {'id': 2, 'team_id': 2, 'project_id': 3, 'reviewer': 'user3', 'date': (datetime.now() - timedelta(hours=1)).isoformat()}
             ]
             
             return {
@@ -343,6 +482,8 @@ class JiraCollector:
             work_items = [
                 {
                     'id': 'PROJ-1',
+                    'team_id': 1,
+                    'project_id': 1,
                     'status': 'done',
                     'completed': True,
                     'total_time': 120,  # 小时
@@ -351,6 +492,8 @@ class JiraCollector:
                 },
                 {
                     'id': 'PROJ-2',
+                    'team_id': 3,
+                    'project_id': 2,
                     'status': 'in_progress',
                     'completed': False,
                     'total_time': 48,
@@ -406,12 +549,16 @@ class JenkinsCollector:
             builds = [
                 {
                     'id': 1,
+                    'team_id': 4,
+                    'project_id': 4,
                     'status': 'success',
                     'duration': 300,  # 秒
                     'timestamp': datetime.now().isoformat()
                 },
                 {
                     'id': 2,
+                    'team_id': 4,
+                    'project_id': 4,
                     'status': 'failed',
                     'duration': 180,
                     'timestamp': (datetime.now() - timedelta(hours=2)).isoformat()
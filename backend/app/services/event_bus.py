@@ -0,0 +1,195 @@
+import asyncio
+import json
+from datetime import datetime
+from typing import Dict, Any, Iterable, Optional, Set, Union
+from loguru import logger
+
+from app.core.config import settings
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # redis 为可选依赖，未安装时只在进程内广播
+    aioredis = None
+
+
+# 实时推送的主题
+TOPICS = ("metrics", "insights", "activities")
+
+
+class Subscription:
+    """一个客户端的订阅: 主题、团队/项目过滤条件和待发送消息队列"""
+
+    def __init__(
+        self,
+        topics: Iterable[str] = TOPICS,
+        team_id: Optional[int] = None,
+        project_id: Optional[int] = None,
+        queue_size: int = settings.WS_SEND_QUEUE_SIZE
+    ):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.update(topics, team_id, project_id)
+
+    def update(self, topics: Iterable[str], team_id: Optional[int] = None, project_id: Optional[int] = None):
+        """修改订阅范围，主题不合法时抛出 ValueError"""
+        topics = frozenset(topics)
+        if not topics or not topics <= set(TOPICS):
+            raise ValueError(f"订阅主题必须为 {', '.join(TOPICS)} 之一")
+        self.topics = topics
+        self.team_id = team_id
+        self.project_id = project_id
+
+    def matches(self, event: Dict[str, Any]) -> bool:
+        """事件是否在订阅范围内: 未指定团队/项目的事件推送给所有订阅者"""
+        if event.get("type") not in self.topics:
+            return False
+        for key, expected in (("team_id", self.team_id), ("project_id", self.project_id)):
+            if expected is not None and event.get(key) is not None and event[key] != expected:
+                return False
+        return True
+
+    def deliver(self, message: Optional[str]):
+        """放入待发送队列，客户端消费过慢导致队列写满时丢弃最旧的消息，不阻塞发布方"""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+    def close(self):
+        """通知发送方结束(None 为结束标记)"""
+        self.deliver(None)
+
+
+class EventBus:
+    """实时事件广播
+
+    采集周期、洞察生成等完成后发布紧凑的增量事件，推送给本进程内所有匹配的WebSocket订阅。
+    EVENT_BUS_BACKEND=redis 时通过 Redis pub/sub 在多个工作进程间广播(每个进程订阅同一频道后
+    分发给本进程的连接)；Redis 不可用时退回进程内广播。事件只序列化一次，所有连接发送同一文本。
+    """
+
+    def __init__(
+        self,
+        backend: str = settings.EVENT_BUS_BACKEND,
+        redis_url: str = settings.REDIS_URL,
+        channel: str = settings.EVENT_BUS_CHANNEL
+    ):
+        self.backend = backend
+        self.redis_url = redis_url
+        self.channel = channel
+        self._subscriptions: Set[Subscription] = set()
+        self._redis = None
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+
+    @property
+    def distributed(self) -> bool:
+        """是否通过Redis跨进程广播"""
+        return self._redis is not None
+
+    async def start(self):
+        """连接Redis并开始接收其他进程发布的事件"""
+        if self.backend != "redis":
+            return
+        if aioredis is None:
+            logger.warning("未安装redis，实时推送使用进程内广播")
+            return
+
+        try:
+            client = aioredis.from_url(self.redis_url)
+            await client.ping()
+            pubsub = client.pubsub()
+            await pubsub.subscribe(self.channel)
+        except Exception as e:
+            logger.warning(f"连接Redis失败，实时推送使用进程内广播: {e}")
+            return
+
+        self._redis = client
+        self._pubsub = pubsub
+        self._listener = asyncio.create_task(self._listen())
+        logger.info(f"实时推送已订阅Redis频道: {self.channel}")
+
+    async def stop(self):
+        """停止接收并关闭所有订阅"""
+        if self._listener:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+        for subscription in list(self._subscriptions):
+            subscription.close()
+        self._subscriptions.clear()
+
+    async def _listen(self):
+        """接收Redis频道消息并分发(连接中断时由redis客户端重连并重新订阅)"""
+        while True:
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is not None:
+                    self._dispatch(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"接收实时事件失败: {e}")
+                await asyncio.sleep(1)
+
+    def subscribe(
+        self,
+        topics: Iterable[str] = TOPICS,
+        team_id: Optional[int] = None,
+        project_id: Optional[int] = None
+    ) -> Subscription:
+        """新增订阅，主题不合法时抛出 ValueError"""
+        subscription = Subscription(topics, team_id, project_id)
+        self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self._subscriptions.discard(subscription)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscriptions)
+
+    async def publish(
+        self,
+        topic: str,
+        data: Dict[str, Any],
+        team_id: Optional[int] = None,
+        project_id: Optional[int] = None
+    ):
+        """发布事件；team_id/project_id 为空表示与所有团队/项目相关"""
+        message = json.dumps({
+            "type": topic,
+            "team_id": team_id,
+            "project_id": project_id,
+            "data": data,
+            "timestamp": datetime.now().isoformat()
+        }, ensure_ascii=False, default=str)
+
+        if self._redis is not None:
+            try:
+                await self._redis.publish(self.channel, message)
+                return
+            except Exception as e:
+                logger.error(f"发布实时事件到Redis失败，仅推送本进程连接: {e}")
+        self._dispatch(message)
+
+    def _dispatch(self, message: Union[str, bytes]):
+        """分发给本进程内匹配的订阅"""
+        if isinstance(message, bytes):
+            message = message.decode("utf-8")
+        event = json.loads(message)
+        for subscription in list(self._subscriptions):
+            if subscription.matches(event):
+                subscription.deliver(message)
+
+
+# 创建全局事件广播实例
+event_bus = EventBus()
@@ -0,0 +1,69 @@
+import asyncio
+from typing import Dict, Any, List, Optional, Tuple
+
+from app.services.ai_service import AIService
+from app.services.data_collector import DataCollector
+from app.services.event_bus import event_bus
+from app.services.job_queue import JobQueue, ProgressCallback
+
+
+# 任务类型
+COLLECT_METRICS_JOB = "metrics.collect"
+GENERATE_INSIGHTS_JOB = "insights.generate"
+
+
+def register_job_handlers(queue: JobQueue, ai_service: AIService, data_collector: DataCollector):
+    """注册内置后台任务"""
+
+    async def collect_metrics(params: Dict[str, Any], progress: ProgressCallback) -> Dict[str, Any]:
+        """采集指标数据；未指定指标类型时同时发布仪表盘快照"""
+        await progress(10, "正在采集指标数据")
+        if not params.get("metric_types"):
+            snapshot = await data_collector.collect_and_publish()
+            return {
+                "snapshot_version": snapshot.version,
+                "collected_at": snapshot.created_at.isoformat(),
+                "metrics": snapshot.data
+            }
+
+        metrics_data = await data_collector.collect_all_metrics(metric_types=params.get("metric_types"))
+        return {
+            "collected_at": metrics_data.get("timestamp"),
+            "metrics": metrics_data
+        }
+
+    async def generate_insights(params: Dict[str, Any], progress: ProgressCallback) -> Dict[str, Any]:
+        """采集最新数据，生成AI洞察并与改进建议一起写入数据库"""
+        await progress(10, "正在采集指标数据")
+        metrics_data = await data_collector.collect_all_metrics()
+
+        await progress(50, "正在生成AI洞察")
+        insights = await ai_service.generate_insights(metrics_data)
+
+        # 先写入洞察取得ID，改进建议按 insight_id 关联后批量写入
+        await progress(70, "正在保存AI洞察和改进建议")
+        insights = await asyncio.to_thread(ai_service.save_insights, insights)
+        saved_recommendations = await ai_service.generate_and_save_recommendations(insights)
+
+        # 按团队/项目推送新生成的洞察摘要
+        groups: Dict[Tuple[Optional[int], Optional[int]], List[Dict[str, Any]]] = {}
+        for insight in insights:
+            groups.setdefault((insight.team_id, insight.project_id), []).append({
+                "id": insight.id,
+                "title": insight.title,
+                "type": insight.type,
+                "severity": insight.severity,
+                "confidence": insight.confidence
+            })
+        for (team_id, project_id), summaries in groups.items():
+            await event_bus.publish("insights", {"generated": len(summaries), "insights": summaries},
+                                    team_id=team_id, project_id=project_id)
+
+        return {
+            "generated_insights": len(insights),
+            "saved_recommendations": saved_recommendations,
+            "insights": [insight.model_dump(mode="json") for insight in insights]
+        }
+
+    queue.register(COLLECT_METRICS_JOB, collect_metrics)
+    queue.register(GENERATE_INSIGHTS_JOB, generate_insights)
@@ -0,0 +1,296 @@
+import asyncio
+import hashlib
+import json
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, Callable, Awaitable, List, Tuple
+from loguru import logger
+from sqlalchemy import and_, or_
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.models import Job
+
+
+# 任务处理函数: (参数, 进度回调) -> 结果
+ProgressCallback = Callable[[float, Optional[str]], Awaitable[None]]
+JobHandler = Callable[[Dict[str, Any], ProgressCallback], Awaitable[Dict[str, Any]]]
+
+# 未结束的任务状态(与唯一索引 ix_jobs_active_dedupe 的谓词一致)
+ACTIVE_STATUSES = ("queued", "running")
+
+
+def _stale_running(now: datetime):
+    """工作进程已退出的运行中任务: 超过 JOB_HEARTBEAT_TIMEOUT 没有心跳"""
+    deadline = now - timedelta(seconds=settings.JOB_HEARTBEAT_TIMEOUT)
+    return and_(
+        Job.status == "running",
+        or_(Job.heartbeat_at < deadline, and_(Job.heartbeat_at.is_(None), Job.started_at < deadline))
+    )
+
+
+class JobQueue:
+    """后台任务队列
+
+    单节点部署使用的进程内 asyncio 工作池，任务持久化在数据库 jobs 表中。
+    入队立即返回任务ID；相同类型和参数的未结束任务会被合并(由部分唯一索引保证并发入队也只有一个)；
+    工作协程按优先级(高优先)和入队时间领取任务，领取通过条件更新保证多进程下不重复执行。
+    运行中的任务记录领取它的工作进程并定期心跳，心跳超时的任务(进程崩溃或重启遗留)由各进程
+    定期检查并标记为失败，不再参与去重。
+    """
+
+    def __init__(self, concurrency: int = settings.JOB_WORKER_CONCURRENCY):
+        self.concurrency = concurrency
+        self.handlers: Dict[str, JobHandler] = {}
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._workers: List[asyncio.Task] = []
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def register(self, job_type: str, handler: JobHandler):
+        """注册任务处理函数"""
+        self.handlers[job_type] = handler
+
+    @staticmethod
+    def dedupe_key(job_type: str, params: Dict[str, Any]) -> str:
+        """任务去重键"""
+        payload = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+        return f"{job_type}:{hashlib.sha1(payload.encode('utf-8')).hexdigest()}"
+
+    def enqueue(self, job_type: str, params: Optional[Dict[str, Any]] = None, priority: int = 0) -> Tuple[Dict[str, Any], bool]:
+        """提交任务，返回(任务信息, 是否新建)；已有相同的未结束任务时直接返回该任务
+
+        同步读写数据库，在事件循环中需通过 asyncio.to_thread 调用。
+        """
+        params = params or {}
+        dedupe_key = self.dedupe_key(job_type, params)
+
+        db = SessionLocal()
+        try:
+            for _ in range(2):
+                # 心跳超时的运行中任务先标记为失败，不再作为去重结果返回
+                self._fail_stale_jobs(db, Job.dedupe_key == dedupe_key)
+                existing = db.query(Job).filter(
+                    Job.dedupe_key == dedupe_key,
+                    Job.status.in_(ACTIVE_STATUSES)
+                ).first()
+                if existing is not None:
+                    return self._to_dict(existing), False
+
+                job = Job(
+                    id=uuid.uuid4().hex,
+                    type=job_type,
+                    status="queued",
+                    priority=priority,
+                    dedupe_key=dedupe_key,
+                    params=params,
+                    progress=0.0,
+                    created_at=datetime.now()
+                )
+                db.add(job)
+                try:
+                    db.commit()
+                except IntegrityError:
+                    # 并发入队的相同任务已先写入，重新查询并返回该任务
+                    db.rollback()
+                    continue
+
+                if self._wakeup is not None:
+                    # 可能在工作线程中调用，通过事件循环唤醒工作协程
+                    self._loop.call_soon_threadsafe(self._wakeup.set)
+                logger.info(f"任务已入队: {job_type} ({job.id})")
+                return self._to_dict(job), True
+
+            raise RuntimeError(f"任务入队冲突: {dedupe_key}")
+
+        except Exception as e:
+            db.rollback()
+            logger.error(f"任务入队失败: {e}")
+            raise
+        finally:
+            db.close()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """查询任务状态(同步读取数据库)"""
+        db = SessionLocal()
+        try:
+            job = db.get(Job, job_id)
+            return self._to_dict(job) if job else None
+        finally:
+            db.close()
+
+    async def start(self):
+        """启动工作协程和心跳协程"""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._heartbeat = asyncio.create_task(self._heartbeat_loop())
+        for i in range(self.concurrency):
+            self._workers.append(asyncio.create_task(self._worker(i)))
+        logger.info(f"后台任务队列已启动，并发数: {self.concurrency}，工作进程: {self.worker_id}")
+
+    async def stop(self):
+        """停止工作协程和心跳协程"""
+        tasks = self._workers + ([self._heartbeat] if self._heartbeat else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers.clear()
+        self._heartbeat = None
+        logger.info("后台任务队列已停止")
+
+    async def _heartbeat_loop(self):
+        """定期为本进程运行中的任务续期心跳，并清理其他进程遗留的任务"""
+        while True:
+            try:
+                await asyncio.to_thread(self._beat)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"任务心跳失败: {e}")
+            await asyncio.sleep(settings.JOB_HEARTBEAT_INTERVAL)
+
+    def _beat(self):
+        """续期心跳并将心跳超时的任务标记为失败"""
+        db = SessionLocal()
+        try:
+            db.query(Job).filter(Job.status == "running", Job.worker_id == self.worker_id).update(
+                {"heartbeat_at": datetime.now()},
+                synchronize_session=False
+            )
+            db.commit()
+            self._fail_stale_jobs(db)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def _worker(self, index: int):
+        """工作协程: 循环领取并执行任务"""
+        while True:
+            try:
+                job = await asyncio.to_thread(self._claim_next)
+                if job is None:
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=settings.JOB_POLL_INTERVAL)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                await self._run(job)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"任务工作协程{index}异常: {e}")
+                await asyncio.sleep(settings.JOB_POLL_INTERVAL)
+
+    def _claim_next(self) -> Optional[Dict[str, Any]]:
+        """领取优先级最高的排队任务"""
+        db = SessionLocal()
+        try:
+            while True:
+                job = db.query(Job).filter(Job.status == "queued").order_by(
+                    Job.priority.desc(), Job.created_at.asc()
+                ).first()
+                if job is None:
+                    return None
+
+                # 条件更新，其他进程已领取时重试下一个
+                now = datetime.now()
+                claimed = db.query(Job).filter(Job.id == job.id, Job.status == "queued").update(
+                    {"status": "running", "started_at": now, "worker_id": self.worker_id, "heartbeat_at": now},
+                    synchronize_session=False
+                )
+                db.commit()
+                if claimed:
+                    db.refresh(job)
+                    return self._to_dict(job)
+
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def _run(self, job: Dict[str, Any]):
+        """执行任务并记录结果"""
+        job_id = job["id"]
+        handler = self.handlers.get(job["type"])
+        if handler is None:
+            await asyncio.to_thread(self._finish, job_id, "failed", error=f"未注册的任务类型: {job['type']}")
+            return
+
+        async def report_progress(progress: float, message: Optional[str] = None):
+            await asyncio.to_thread(self._update, job_id, progress=progress, progress_message=message)
+
+        try:
+            result = await asyncio.wait_for(handler(job["params"] or {}, report_progress), timeout=settings.JOB_TIMEOUT)
+            await asyncio.to_thread(self._finish, job_id, "succeeded", result=result)
+            logger.info(f"任务执行完成: {job['type']} ({job_id})")
+
+        except asyncio.TimeoutError:
+            await asyncio.to_thread(self._finish, job_id, "failed", error=f"任务执行超时({settings.JOB_TIMEOUT}秒)")
+            logger.error(f"任务执行超时: {job['type']} ({job_id})")
+        except Exception as e:
+            await asyncio.to_thread(self._finish, job_id, "failed", error=str(e))
+            logger.error(f"任务执行失败: {job['type']} ({job_id}): {e}")
+
+    def _finish(self, job_id: str, status: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+        """标记任务结束"""
+        values = {"status": status, "result": result, "error": error, "finished_at": datetime.now()}
+        if status == "succeeded":
+            values["progress"] = 100.0
+        self._update(job_id, **values)
+
+    def _update(self, job_id: str, **values):
+        """更新任务字段"""
+        db = SessionLocal()
+        try:
+            db.query(Job).filter(Job.id == job_id).update(values, synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"更新任务状态失败({job_id}): {e}")
+        finally:
+            db.close()
+
+    @staticmethod
+    def _fail_stale_jobs(db, *criteria) -> int:
+        """将心跳超时的运行中任务(工作进程崩溃或重启遗留)标记为失败，返回清理的数量"""
+        now = datetime.now()
+        failed = db.query(Job).filter(_stale_running(now), *criteria).update(
+            {"status": "failed", "error": "工作进程已退出，任务未完成", "finished_at": now},
+            synchronize_session=False
+        )
+        db.commit()
+        if failed:
+            logger.warning(f"已将 {failed} 个遗留的运行中任务标记为失败")
+        return failed
+
+    @staticmethod
+    def _to_dict(job: Job) -> Dict[str, Any]:
+        """任务信息"""
+        return {
+            "id": job.id,
+            "type": job.type,
+            "status": job.status,
+            "priority": job.priority,
+            "params": job.params,
+            "progress": job.progress,
+            "progress_message": job.progress_message,
+            "result": job.result,
+            "error": job.error,
+            "created_at": job.created_at.isoformat() if job.created_at else None,
+            "started_at": job.started_at.isoformat() if job.started_at else None,
+            "finished_at": job.finished_at.isoformat() if job.finished_at else None
+        }
+
+
+# 创建全局任务队列实例
+job_queue = JobQueue()
@@ -0,0 +1,64 @@
+import re
+from typing import Dict, List, FrozenSet
+
+
+# 关键词分类定义: 分类名 -> 关键词列表
+KEYWORD_SETS: Dict[str, List[str]] = {
+    # 建议实施工作量
+    "effort.high": ["自动化", "工具", "系统"],
+    "effort.medium": ["流程", "规范", "培训"],
+    # 建议实施时间
+    "duration.long": ["自动化", "系统", "工具"],
+    "duration.medium": ["流程", "规范"],
+    # 聊天话题
+    "topic.deployment": ["部署", "deployment"],
+    "topic.quality": ["质量", "quality", "测试"],
+    "topic.team": ["团队", "team", "协作"],
+    "topic.process": ["流程", "process", "效率"]
+}
+
+
+class KeywordMatcher:
+    """关键词匹配器
+
+    将所有分类的关键词编译为一个合并正则，一次扫描返回文本命中的全部分类。
+    正则使用前瞻在每个位置尝试匹配(长词优先)，并让长关键词继承其包含的短关键词的分类，
+    因此重叠或互为前缀的关键词不会漏判。
+    """
+
+    def __init__(self, keyword_sets: Dict[str, List[str]]):
+        self.keyword_sets = keyword_sets
+
+        # 关键词 -> 分类(大小写不敏感)
+        keyword_categories: Dict[str, set] = {}
+        for category, keywords in keyword_sets.items():
+            for keyword in keywords:
+                keyword_categories.setdefault(keyword.lower(), set()).add(category)
+
+        # 命中长关键词时，其包含的短关键词必然也出现在文本中
+        self._categories: Dict[str, FrozenSet[str]] = {}
+        for keyword in keyword_categories:
+            categories = set()
+            for other, other_categories in keyword_categories.items():
+                if other in keyword:
+                    categories |= other_categories
+            self._categories[keyword] = frozenset(categories)
+
+        alternation = "|".join(
+            re.escape(keyword) for keyword in sorted(self._categories, key=len, reverse=True)
+        )
+        self._pattern = re.compile(f"(?=({alternation}))", re.IGNORECASE) if alternation else None
+
+    def match(self, text: str) -> FrozenSet[str]:
+        """返回文本命中的所有分类"""
+        if not text or self._pattern is None:
+            return frozenset()
+
+        matched = set()
+        for keyword in self._pattern.findall(text):
+            matched |= self._categories[keyword.lower()]
+        return frozenset(matched)
+
+
+# 导入时编译的全局匹配器
+keyword_matcher = KeywordMatcher(KEYWORD_SETS)
@@ -0,0 +1,284 @@
+from typing import Dict, Any, Optional
+from sqlalchemy import func
+
+from app.core.database import SessionLocal
+from app.core.pagination import Page, keyset_paginate
+from app.models.models import Insight, Project, Recommendation, Team, TeamMember, TeamMetric, User
+from app.services.search_index import search_index
+
+
+# 未解决的洞察状态(与 ix_insights_open_created 的部分索引谓词一致)
+OPEN_INSIGHT_STATUSES = ("new", "acknowledged")
+
+# 洞察列表可选的排序方式: 排序列(最后一列唯一)，relevance 仅在提供搜索词时可用
+INSIGHT_SORTS = {
+    "created_at": (Insight.created_at, Insight.id),
+    "confidence": (Insight.confidence, Insight.created_at, Insight.id)
+}
+
+
+def _isoformat(value) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+class ListingService:
+    """团队、项目、洞察、改进建议列表查询
+
+    筛选条件全部下推到SQL，按 (created_at, id) 倒序做游标分页；提供搜索词时改为连接全文检索
+    子查询，按 (相关度, id) 倒序分页。列表附带的统计字段(成员数、最新评分等)只针对当前页的ID批量查询。
+    """
+
+    @staticmethod
+    def _search(db, query, entity_type: str, entity_id, search: str):
+        """连接全文检索子查询，返回(查询, 相关度列)"""
+        match = search_index.match(entity_type, search, db.bind.dialect.name)
+        return query.add_columns(match.c.score).join(match, match.c.entity_id == entity_id), match.c.score
+
+    def list_teams(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        count: str = "none",
+        search: Optional[str] = None,
+        status: Optional[str] = None
+    ) -> Page:
+        """团队列表，status 为 active 或 inactive"""
+        db = SessionLocal()
+        try:
+            query = db.query(Team, User.full_name, User.username).outerjoin(User, User.id == Team.lead_id)
+            sort_columns = (Team.created_at, Team.id)
+            if search:
+                query, score = self._search(db, query, "team", Team.id, search)
+                sort_columns = (score, Team.id)
+            if status:
+                query = query.filter(Team.is_active == (status == "active"))
+
+            page = keyset_paginate(db, query, sort_columns, limit, cursor, count)
+            team_ids = [row[0].id for row in page.items]
+
+            member_counts = dict(
+                db.query(TeamMember.team_id, func.count(TeamMember.id))
+                .filter(TeamMember.team_id.in_(team_ids))
+                .group_by(TeamMember.team_id)
+                .all()
+            ) if team_ids else {}
+
+            # 各团队最新一次效能评分
+            latest = (
+                db.query(TeamMetric.team_id, func.max(TeamMetric.measured_at).label("measured_at"))
+                .filter(TeamMetric.team_id.in_(team_ids))
+                .group_by(TeamMetric.team_id)
+                .subquery()
+            )
+            scores = dict(
+                db.query(TeamMetric.team_id, TeamMetric.overall_score)
+                .join(latest, (TeamMetric.team_id == latest.c.team_id) & (TeamMetric.measured_at == latest.c.measured_at))
+                .all()
+            ) if team_ids else {}
+
+            items = []
+            for row in page.items:
+                team, lead_name, lead_username = row[:3]
+                item = {
+                    "id": team.id,
+                    "name": team.name,
+                    "description": team.description,
+                    "status": "active" if team.is_active else "inactive",
+                    "team_lead_id": team.lead_id,
+                    "team_lead_name": lead_name or lead_username,
+                    "member_count": member_counts.get(team.id, 0),
+                    "performance_score": scores.get(team.id),
+                    "created_at": _isoformat(team.created_at),
+                    "updated_at": _isoformat(team.updated_at)
+                }
+                if search:
+                    item["relevance"] = row.score
+                items.append(item)
+            page.items = items
+            return page
+        finally:
+            db.close()
+
+    def list_projects(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        count: str = "none",
+        search: Optional[str] = None,
+        status: Optional[str] = None,
+        team_id: Optional[int] = None
+    ) -> Page:
+        """项目列表"""
+        db = SessionLocal()
+        try:
+            query = db.query(Project, Team.name).outerjoin(Team, Team.id == Project.team_id)
+            sort_columns = (Project.created_at, Project.id)
+            if search:
+                query, score = self._search(db, query, "project", Project.id, search)
+                sort_columns = (score, Project.id)
+            if status:
+                query = query.filter(Project.status == status)
+            if team_id is not None:
+                query = query.filter(Project.team_id == team_id)
+
+            page = keyset_paginate(db, query, sort_columns, limit, cursor, count)
+            items = []
+            for row in page.items:
+                project, team_name = row[:2]
+                item = {
+                    "id": project.id,
+                    "name": project.name,
+                    "description": project.description,
+                    "status": project.status,
+                    "team_id": project.team_id,
+                    "team_name": team_name,
+                    "repository_url": project.repository_url,
+                    "start_date": _isoformat(project.start_date),
+                    "end_date": _isoformat(project.end_date),
+                    "created_at": _isoformat(project.created_at),
+                    "updated_at": _isoformat(project.updated_at)
+                }
+                if search:
+                    item["relevance"] = row.score
+                items.append(item)
+            page.items = items
+            return page
+        finally:
+            db.close()
+
+    def list_insights(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        count: str = "none",
+        insight_type: Optional[str] = None,
+        severity: Optional[str] = None,
+        status: Optional[str] = None,
+        team_id: Optional[int] = None,
+        project_id: Optional[int] = None,
+        search: Optional[str] = None,
+        sort: Optional[str] = None
+    ) -> Page:
+        """AI洞察列表
+
+        status 可以是具体状态，也可以是 open(new + acknowledged，走部分索引)。
+        search 检索标题、描述和建议行动；未指定 sort 时有搜索词按相关度、否则按创建时间排序。
+        所有筛选、排序和分页都在SQL中完成，不会把历史洞察加载到内存。
+        """
+        sort = sort or ("relevance" if search else "created_at")
+        if sort not in INSIGHT_SORTS and not (sort == "relevance" and search):
+            raise ValueError(f"不支持的排序方式: {sort}")
+
+        db = SessionLocal()
+        try:
+            query = db.query(Insight)
+            if search:
+                query, score = self._search(db, query, "insight", Insight.id, search)
+            if status == "open":
+                query = query.filter(Insight.status.in_(OPEN_INSIGHT_STATUSES))
+            elif status:
+                query = query.filter(Insight.status == status)
+            if severity:
+                query = query.filter(Insight.severity == severity)
+            if team_id is not None:
+                query = query.filter(Insight.team_id == team_id)
+            if insight_type:
+                query = query.filter(Insight.type == insight_type)
+            if project_id is not None:
+                query = query.filter(Insight.project_id == project_id)
+
+            sort_columns = (score, Insight.id) if sort == "relevance" else INSIGHT_SORTS[sort]
+            page = keyset_paginate(db, query, sort_columns, limit, cursor, count)
+            page.items = [
+                {**self._insight_dict(row[0]), "relevance": row.score} if search else self._insight_dict(row)
+                for row in page.items
+            ]
+            return page
+        finally:
+            db.close()
+
+    def list_recommendations(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        count: str = "none",
+        priority: Optional[str] = None,
+        status: Optional[str] = None,
+        team_id: Optional[int] = None,
+        project_id: Optional[int] = None,
+        search: Optional[str] = None
+    ) -> Page:
+        """改进建议列表，search 检索标题和描述，有搜索词时按相关度排序"""
+        db = SessionLocal()
+        try:
+            query = (
+                db.query(Recommendation, Team.name, Project.name)
+                .outerjoin(Team, Team.id == Recommendation.team_id)
+                .outerjoin(Project, Project.id == Recommendation.project_id)
+            )
+            sort_columns = (Recommendation.created_at, Recommendation.id)
+            if search:
+                query, score = self._search(db, query, "recommendation", Recommendation.id, search)
+                sort_columns = (score, Recommendation.id)
+            if priority:
+                query = query.filter(Recommendation.priority == priority)
+            if status:
+                query = query.filter(Recommendation.status == status)
+            if team_id is not None:
+                query = query.filter(Recommendation.team_id == team_id)
+            if project_id is not None:
+                query = query.filter(Recommendation.project_id == project_id)
+
+            page = keyset_paginate(db, query, sort_columns, limit, cursor, count)
+            items = []
+            for row in page.items:
+                recommendation, team_name, project_name = row[:3]
+                item = {
+                    "id": recommendation.id,
+                    "title": recommendation.title,
+                    "description": recommendation.description,
+                    "type": recommendation.type,
+                    "priority": recommendation.priority,
+                    "effort": recommendation.effort,
+                    "impact": recommendation.impact,
+                    "status": recommendation.status,
+                    "progress": recommendation.progress,
+                    "estimated_duration": recommendation.estimated_duration,
+                    "team_id": recommendation.team_id,
+                    "team_name": team_name,
+                    "project_id": recommendation.project_id,
+                    "project_name": project_name,
+                    "insight_id": recommendation.insight_id,
+                    "created_at": _isoformat(recommendation.created_at),
+                    "updated_at": _isoformat(recommendation.updated_at)
+                }
+                if search:
+                    item["relevance"] = row.score
+                items.append(item)
+            page.items = items
+            return page
+        finally:
+            db.close()
+
+    @staticmethod
+    def _insight_dict(insight: Insight) -> Dict[str, Any]:
+        return {
+            "id": insight.id,
+            "title": insight.title,
+            "description": insight.description,
+            "type": insight.type,
+            "severity": insight.severity,
+            "confidence": insight.confidence,
+            "status": insight.status,
+            "team_id": insight.team_id,
+            "project_id": insight.project_id,
+            "metrics": insight.metrics,
+            "recommendations": insight.recommendations,
+            "created_by": insight.created_by,
+            "created_at": _isoformat(insight.created_at),
+            "updated_at": _isoformat(insight.updated_at)
+        }
+
+
+# 创建全局列表查询实例
+listing_service = ListingService()
@@ -0,0 +1,202 @@
+import asyncio
+import random
+from functools import cached_property, lru_cache
+from typing import TYPE_CHECKING, AsyncIterator, List, Dict, Any, Optional
+from loguru import logger
+
+from app.core.config import settings
+from app.core.lazy import LazyModule
+
+if TYPE_CHECKING:
+    import httpx
+    import openai
+else:
+    httpx = LazyModule("httpx")
+    openai = LazyModule("openai")
+
+
+class LLMGateway:
+    """LLM网关
+
+    进程内共享一个 AsyncOpenAI 客户端(底层为连接池化的 httpx 客户端)，
+    并统一处理并发上限、429/5xx 指数退避重试、单请求超时和Token用量统计。
+    客户端在首次请求时创建，openai 库随之导入。
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        model: str = settings.OPENAI_MODEL,
+        max_concurrency: int = settings.OPENAI_MAX_CONCURRENCY,
+        timeout: float = settings.OPENAI_TIMEOUT,
+        max_retries: int = settings.OPENAI_MAX_RETRIES
+    ):
+        self.model = model
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.api_key = api_key
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._http_client: Optional["httpx.AsyncClient"] = None
+
+        # Token用量统计
+        self.usage: Dict[str, int] = {
+            "requests": 0,
+            "failures": 0,
+            "retries": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "total_tokens": 0
+        }
+
+    @cached_property
+    def client(self) -> "openai.AsyncOpenAI":
+        """AsyncOpenAI 客户端"""
+        self._http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.max_concurrency,
+                max_keepalive_connections=self.max_concurrency
+            ),
+            timeout=httpx.Timeout(self.timeout)
+        )
+        # 重试由网关统一处理，关闭SDK自带重试
+        return openai.AsyncOpenAI(
+            api_key=self.api_key,
+            base_url=self.base_url,
+            http_client=self._http_client,
+            max_retries=0
+        )
+
+    async def chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int = settings.OPENAI_MAX_TOKENS,
+        temperature: float = settings.OPENAI_TEMPERATURE,
+        timeout: Optional[float] = None
+    ) -> str:
+        """调用聊天补全接口，返回回复文本"""
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore:
+                    response = await self.client.chat.completions.create(
+                        model=self.model,
+                        messages=messages,
+                        max_tokens=max_tokens,
+                        temperature=temperature,
+                        timeout=timeout or self.timeout
+                    )
+
+                self._record_usage(response.usage)
+                return response.choices[0].message.content
+
+            except Exception as e:
+                if attempt >= self.max_retries or not self._is_retryable(e):
+                    self.usage["failures"] += 1
+                    raise
+
+                delay = self._retry_delay(attempt, e)
+                attempt += 1
+                self.usage["retries"] += 1
+                logger.warning(f"LLM请求失败，{delay:.2f}秒后第{attempt}次重试: {e}")
+                await asyncio.sleep(delay)
+
+    async def stream_chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int = settings.OPENAI_MAX_TOKENS,
+        temperature: float = settings.OPENAI_TEMPERATURE,
+        timeout: Optional[float] = None
+    ) -> AsyncIterator[str]:
+        """流式调用聊天补全接口，逐段产出回复文本
+
+        只在收到第一段内容之前重试；调用方停止迭代(如客户端断开)时立即关闭上游连接。
+        Token用量由服务端在最后一段(choices 为空)中返回。
+        """
+        attempt = 0
+        while True:
+            received = False
+            usage = None
+            try:
+                async with self._semaphore:
+                    stream = await self.client.chat.completions.create(
+                        model=self.model,
+                        messages=messages,
+                        max_tokens=max_tokens,
+                        temperature=temperature,
+                        timeout=timeout or self.timeout,
+                        stream=True,
+                        # 当前 openai SDK 版本尚无 stream_options 参数，通过请求体传递
+                        extra_body={"stream_options": {"include_usage": True}}
+                    )
+                    try:
+                        async for chunk in stream:
+                            if getattr(chunk, "usage", None) is not None:
+                                usage = chunk.usage
+                            if not chunk.choices:
+                                continue
+                            content = chunk.choices[0].delta.content
+                            if content:
+                                received = True
+                                yield content
+                    finally:
+                        await stream.response.aclose()
+
+                self._record_usage(usage)
+                return
+
+            except Exception as e:
+                if received or attempt >= self.max_retries or not self._is_retryable(e):
+                    self.usage["failures"] += 1
+                    raise
+
+                delay = self._retry_delay(attempt, e)
+                attempt += 1
+                self.usage["retries"] += 1
+                logger.warning(f"LLM流式请求失败，{delay:.2f}秒后第{attempt}次重试: {e}")
+                await asyncio.sleep(delay)
+
+    def _is_retryable(self, error: Exception) -> bool:
+        """429、5xx、超时和连接错误可重试"""
+        if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError)):
+            return True
+        if isinstance(error, openai.APIStatusError):
+            return error.status_code == 429 or error.status_code >= 500
+        return False
+
+    def _retry_delay(self, attempt: int, error: Exception) -> float:
+        """指数退避(带抖动)，优先使用服务端返回的 Retry-After"""
+        if isinstance(error, openai.APIStatusError):
+            retry_after = error.response.headers.get("retry-after")
+            try:
+                if retry_after is not None:
+                    return min(float(retry_after), settings.OPENAI_RETRY_MAX_DELAY)
+            except ValueError:
+                pass
+
+        delay = min(settings.OPENAI_RETRY_BASE_DELAY * (2 ** attempt), settings.OPENAI_RETRY_MAX_DELAY)
+        return delay * random.uniform(0.5, 1.0)
+
+    def _record_usage(self, usage: Any):
+        """累计Token用量(流式响应的用量可能是未解析的字典)"""
+        self.usage["requests"] += 1
+        if usage is None:
+            return
+        for key in ("prompt_tokens", "completion_tokens", "total_tokens"):
+            value = usage.get(key) if isinstance(usage, dict) else getattr(usage, key, None)
+            self.usage[key] += value or 0
+
+    async def close(self):
+        """关闭连接池"""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+
+
+@lru_cache(maxsize=None)
+def get_llm_gateway() -> Optional[LLMGateway]:
+    """获取进程内共享的LLM网关，未配置API密钥时返回None"""
+    if not settings.OPENAI_API_KEY:
+        return None
+    return LLMGateway(api_key=settings.OPENAI_API_KEY, base_url=settings.OPENAI_BASE_URL)
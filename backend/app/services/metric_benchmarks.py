@@ -0,0 +1,197 @@
+import json
+import time
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Tuple
+from loguru import logger
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.database import engine
+from app.core.lazy import LazyModule
+from app.services.metric_query import METRIC_CATALOG, METRIC_TABLES, metric_query_engine, resolve_metric
+
+if TYPE_CHECKING:
+    import pandas as pd
+else:
+    pd = LazyModule("pandas")
+
+
+# 默认基准文件
+DEFAULT_BENCHMARKS_PATH = Path(__file__).resolve().parent.parent / "rules" / "metric_benchmarks.json"
+
+# 无静态分级时按百分位划分等级
+PERCENTILE_LEVELS = ((90, "elite"), (60, "high"), (30, "medium"), (0, "low"))
+
+
+class MetricBenchmarkIndex:
+    """指标基准索引
+
+    - 组织内分布: 每个团队/项目取最新一次测量值，按指标排序后保存，查询时二分查找计算百分位
+    - 行业参考: 静态DORA分级和参考分位点，组织内样本不足时用于估算百分位
+    指标表数据版本变化时才重建索引，检查间隔为 BENCHMARK_REFRESH_INTERVAL。
+    """
+
+    def __init__(self, definitions: Dict[str, Any], min_samples: int = settings.BENCHMARK_MIN_SAMPLES):
+        self.levels: Dict[str, str] = definitions.get("levels", {})
+        self.metrics: Dict[str, Dict[str, Any]] = definitions["metrics"]
+        self.min_samples = min_samples
+
+        # 参考分位点: 指标 -> (取值列表, 百分位列表)，取值升序
+        self._reference: Dict[str, Tuple[List[float], List[float]]] = {}
+        for metric, benchmark in self.metrics.items():
+            points = sorted((value, percentile) for percentile, value in benchmark.get("reference_quantiles", []))
+            if points:
+                self._reference[metric] = ([value for value, _ in points], [percentile for _, percentile in points])
+
+        # 组织内分布: 指标 -> 升序样本
+        self._samples: Dict[str, List[float]] = {}
+        self._version: Optional[Dict[str, Tuple]] = None
+        self._checked_at: Optional[float] = None
+
+    @classmethod
+    def from_file(cls, path: Path) -> "MetricBenchmarkIndex":
+        """从JSON基准文件创建索引"""
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def is_stale(self) -> bool:
+        """是否需要检查数据版本"""
+        return self._checked_at is None or time.monotonic() - self._checked_at >= settings.BENCHMARK_REFRESH_INTERVAL
+
+    def refresh(self, force: bool = False):
+        """指标表数据变化时重建组织内分布"""
+        if not force and not self.is_stale():
+            return
+        self._checked_at = time.monotonic()
+
+        try:
+            version = {table: metric_query_engine.data_version(table) for table in METRIC_TABLES}
+            if not force and version == self._version:
+                return
+
+            samples: Dict[str, List[float]] = {}
+            for table, model in METRIC_TABLES.items():
+                metrics = [metric for metric, definition in METRIC_CATALOG.items() if definition.table == table]
+                entity_columns = [column for column in ("team_id", "project_id") if hasattr(model, column)]
+                statement = select(
+                    *(getattr(model, column) for column in entity_columns),
+                    model.measured_at,
+                    *(getattr(model, metric) for metric in metrics)
+                )
+
+                with engine.connect() as connection:
+                    frame = pd.read_sql(statement, connection)
+                if frame.empty:
+                    continue
+
+                # 每个团队/项目取各指标最新的非空测量值
+                latest = frame.sort_values("measured_at", kind="stable").groupby(entity_columns, dropna=False).last()
+                for metric in metrics:
+                    samples[metric] = sorted(latest[metric].dropna().astype(float).tolist())
+
+            self._samples = samples
+            self._version = version
+            logger.info(f"指标基准索引已更新: {sum(len(values) for values in samples.values())} 个样本")
+
+        except Exception as e:
+            logger.error(f"更新指标基准索引失败: {e}")
+
+    def percentile(self, metric: str, value: float) -> Tuple[Optional[float], Optional[str], int]:
+        """计算取值优于多少百分比的团队，返回(百分位, 来源, 样本数)"""
+        higher_is_better = self.metrics[metric].get("higher_is_better", True)
+        samples = self._samples.get(metric, [])
+
+        if len(samples) >= self.min_samples:
+            # 中位秩，相同取值各计一半
+            rank = (bisect_left(samples, value) + bisect_right(samples, value)) / 2
+            percentile, source = rank / len(samples) * 100, "organization"
+        elif metric in self._reference:
+            percentile, source = self._interpolate(metric, value), "industry"
+        else:
+            return None, None, len(samples)
+
+        if not higher_is_better:
+            percentile = 100 - percentile
+        return round(percentile, 1), source, len(samples)
+
+    def _interpolate(self, metric: str, value: float) -> float:
+        """在参考分位点之间线性插值"""
+        values, percentiles = self._reference[metric]
+        index = bisect_right(values, value)
+        if index == 0:
+            return percentiles[0] / 2
+        if index == len(values):
+            return (percentiles[-1] + 100) / 2
+
+        low, high = values[index - 1], values[index]
+        ratio = (value - low) / (high - low) if high > low else 0
+        return percentiles[index - 1] + ratio * (percentiles[index] - percentiles[index - 1])
+
+    def performance_level(self, metric: str, value: float, percentile: Optional[float]) -> Optional[str]:
+        """表现等级: 优先使用静态分级，否则按百分位划分"""
+        benchmark = self.metrics[metric]
+        bands = benchmark.get("bands")
+        if bands:
+            higher_is_better = benchmark.get("higher_is_better", True)
+            for threshold, level in bands:
+                if threshold is None or (value >= threshold if higher_is_better else value <= threshold):
+                    return level
+
+        if percentile is None:
+            return None
+        return next(level for minimum, level in PERCENTILE_LEVELS if percentile >= minimum)
+
+    def organization_average(self, metric: str) -> Optional[float]:
+        """组织内平均值"""
+        samples = self._samples.get(metric)
+        return sum(samples) / len(samples) if samples else None
+
+    def explain(self, metric_name: str, value: float) -> Dict[str, Any]:
+        """查询指标的基准对比和解释"""
+        metric = resolve_metric(metric_name)
+        if metric is None or metric not in self.metrics:
+            raise ValueError(f"不支持的指标: {metric_name}")
+
+        benchmark = self.metrics[metric]
+        definition = METRIC_CATALOG[metric]
+        percentile, source, sample_size = self.percentile(metric, value)
+        level = self.performance_level(metric, value, percentile)
+        organization_average = self.organization_average(metric)
+
+        return {
+            "metric": metric,
+            "label": definition.label,
+            "unit": definition.unit,
+            "description": benchmark.get("description"),
+            "higher_is_better": benchmark.get("higher_is_better", True),
+            "industry_average": benchmark.get("industry_average", organization_average),
+            "organization_average": organization_average,
+            "performance_level": level,
+            "performance_level_label": self.levels.get(level) if level else None,
+            "percentile": percentile,
+            "percentile_source": source,
+            "sample_size": sample_size,
+            "business_impact": benchmark.get("business_impact"),
+            "technical_impact": benchmark.get("technical_impact"),
+            "team_impact": benchmark.get("team_impact"),
+            "suggestions": benchmark.get("suggestions", []),
+            "related_metrics": [
+                {"metric": related, "label": METRIC_CATALOG[related].label}
+                for related in benchmark.get("related_metrics", []) if related in METRIC_CATALOG
+            ],
+            "calculation_method": benchmark.get("calculation_method"),
+            "best_practices": benchmark.get("best_practices", [])
+        }
+
+
+@lru_cache(maxsize=None)
+def get_metric_benchmark_index(path: Optional[str] = None) -> MetricBenchmarkIndex:
+    """加载指标基准索引，同一基准文件只加载一次"""
+    benchmarks_path = Path(path or settings.METRIC_BENCHMARKS_PATH or DEFAULT_BENCHMARKS_PATH)
+    try:
+        return MetricBenchmarkIndex.from_file(benchmarks_path)
+    except Exception as e:
+        logger.error(f"加载指标基准失败({benchmarks_path}): {e}")
+        raise
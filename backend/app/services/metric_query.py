@@ -0,0 +1,387 @@
+import hashlib
+import json
+import re
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Dict, Any, Optional, Tuple
+from sqlalchemy import select, func
+
+from app.core.config import settings
+from app.core.database import engine
+from app.core.lazy import LazyModule
+from app.models.models import DoraMetric, FlowMetric, TeamMetric
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+else:
+    np = LazyModule("numpy")
+    pd = LazyModule("pandas")
+
+
+# 指标表
+METRIC_TABLES = {
+    "dora": DoraMetric,
+    "flow": FlowMetric,
+    "team": TeamMetric
+}
+
+
+@dataclass(frozen=True)
+class MetricDefinition:
+    """可查询的指标"""
+    table: str
+    label: str
+    unit: str
+    keywords: Tuple[str, ...]
+    aliases: Tuple[str, ...] = ()  # 采集数据中的其他字段名
+
+
+# 指标目录
+METRIC_CATALOG: Dict[str, MetricDefinition] = {
+    "deployment_frequency": MetricDefinition("dora", "部署频率", "次/天", ("部署频率", "部署次数", "部署", "deployment frequency", "deployments", "deployment", "deploys", "deploy")),
+    "lead_time_for_changes": MetricDefinition("dora", "变更前置时间", "小时", ("变更前置时间", "前置时间", "交付时间", "lead time"), ("lead_time",)),
+    "change_failure_rate": MetricDefinition("dora", "变更失败率", "%", ("变更失败率", "失败率", "failure rate")),
+    "time_to_restore_service": MetricDefinition("dora", "服务恢复时间", "小时", ("服务恢复时间", "恢复时间", "恢复", "mttr", "restore", "recovery"), ("recovery_time",)),
+    "flow_efficiency": MetricDefinition("flow", "流动效率", "%", ("流动效率", "流动", "flow efficiency")),
+    "work_in_progress": MetricDefinition("flow", "在制品数量", "个", ("在制品", "wip", "work in progress"), ("wip",)),
+    "cycle_time": MetricDefinition("flow", "周期时间", "天", ("周期时间", "周期", "cycle time")),
+    "throughput": MetricDefinition("flow", "吞吐量", "个/周", ("吞吐量", "吞吐", "throughput")),
+    "overall_score": MetricDefinition("team", "综合评分", "分", ("综合评分", "评分", "得分", "overall score", "score"), ("productivity_score",)),
+    "efficiency": MetricDefinition("team", "团队效能", "分", ("效能", "效率", "efficiency")),
+    "velocity": MetricDefinition("team", "速度", "分", ("速度", "速率", "velocity")),
+    "satisfaction": MetricDefinition("team", "满意度", "分", ("满意度", "satisfaction"), ("satisfaction_score",)),
+    "collaboration": MetricDefinition("team", "协作", "分", ("协作", "collaboration"), ("collaboration_score",))
+}
+
+# 未识别出指标时按数据类型选择的默认指标
+DEFAULT_METRICS = {
+    "dora": "deployment_frequency",
+    "flow": "flow_efficiency",
+    "team": "overall_score",
+    "quality": "change_failure_rate"
+}
+
+# 聚合方式关键词(按优先级排列)
+AGGREGATION_KEYWORDS = (
+    ("trend", ("趋势", "变化", "走势", "trend", "trending")),
+    ("max", ("最高", "最大", "峰值", "highest", "max", "peak")),
+    ("min", ("最低", "最小", "lowest", "min")),
+    ("sum", ("总计", "合计", "总共", "总和", "total", "sum")),
+    ("latest", ("最新", "当前", "目前", "现在", "latest", "current", "now")),
+    ("mean", ("平均", "均值", "average", "mean", "avg"))
+)
+
+AGGREGATION_LABELS = {
+    "mean": "平均值",
+    "max": "最高值",
+    "min": "最低值",
+    "sum": "总计",
+    "latest": "最新值",
+    "trend": "趋势"
+}
+
+# 时间范围
+_CN_NUMBERS = {"一": 1, "两": 2, "二": 2, "三": 3, "四": 4, "五": 5, "六": 6, "七": 7, "八": 8, "九": 9, "十": 10, "半": 0.5}
+_UNIT_DAYS = {
+    "天": 1, "日": 1, "d": 1, "day": 1, "days": 1,
+    "周": 7, "星期": 7, "w": 7, "week": 7, "weeks": 7,
+    "个月": 30, "月": 30, "m": 30, "month": 30, "months": 30,
+    "年": 365, "y": 365, "year": 365, "years": 365
+}
+_TIME_PATTERN = re.compile(
+    r"(\d+|[一两二三四五六七八九十半])\s*(个月|星期|months?|weeks?|days?|years?|[天日周月年dwmy])(?![a-z])"
+)
+_FIXED_RANGES = (
+    (("今天", "today"), 1),
+    (("本周", "这周", "this week"), 7),
+    (("本月", "这个月", "this month"), 30),
+    (("季度", "quarter"), 90),
+    (("今年", "本年", "this year"), 365)
+)
+_ALL_TIME_KEYWORDS = ("全部", "所有时间", "历史以来", "all time")
+_TEAM_PATTERN = re.compile(r"(?:团队|team)\s*#?\s*(\d+)|(\d+)\s*号团队")
+
+
+def _find_keyword(text: str, keyword: str) -> int:
+    """查找关键词位置；英文关键词按整词匹配，未找到返回-1"""
+    if not keyword.isascii():
+        return text.find(keyword)
+    match = re.search(rf"(?<![a-z]){re.escape(keyword)}(?![a-z])", text)
+    return match.start() if match else -1
+
+
+@dataclass(frozen=True)
+class QueryIntent:
+    """结构化的分析意图"""
+    metric: str
+    table: str
+    aggregation: str
+    days: Optional[int]  # None 表示不限时间
+    team_id: Optional[int] = None
+    project_id: Optional[int] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def resolve_metric(text: str) -> Optional[str]:
+    """识别文本中的指标：指标名、字段别名或问题中最早出现的关键词(同一位置取更长的关键词)"""
+    text = text.strip().lower()
+    if text in METRIC_CATALOG:
+        return text
+    for metric, definition in METRIC_CATALOG.items():
+        if text in definition.aliases:
+            return metric
+
+    best: Optional[Tuple[int, int, str]] = None
+    for metric, definition in METRIC_CATALOG.items():
+        for keyword in definition.keywords:
+            position = _find_keyword(text, keyword)
+            if position >= 0:
+                candidate = (position, -len(keyword), metric)
+                if best is None or candidate < best:
+                    best = candidate
+    return best[2] if best else None
+
+
+def parse_time_range(text: str) -> Optional[int]:
+    """从文本中解析时间范围(天数)，未识别返回None"""
+    text = text.lower()
+    match = _TIME_PATTERN.search(text)
+    if match:
+        amount, unit = match.groups()
+        number = float(amount) if amount.isdigit() else _CN_NUMBERS[amount]
+        return max(1, int(number * _UNIT_DAYS[unit]))
+
+    for keywords, days in _FIXED_RANGES:
+        if any(keyword in text for keyword in keywords):
+            return days
+    return None
+
+
+def parse_query(
+    query: str,
+    data_type: Optional[str] = None,
+    team_id: Optional[int] = None,
+    project_id: Optional[int] = None,
+    time_range: Optional[str] = "30d"
+) -> QueryIntent:
+    """将自然语言问题解析为结构化意图，问题中的条件优先于请求参数"""
+    text = query.lower()
+    metric = resolve_metric(text) or DEFAULT_METRICS.get(data_type or "", "deployment_frequency")
+
+    # 聚合方式
+    aggregation = "mean"
+    for name, keywords in AGGREGATION_KEYWORDS:
+        if any(_find_keyword(text, keyword) >= 0 for keyword in keywords):
+            aggregation = name
+            break
+
+    # 时间范围
+    if any(keyword in text for keyword in _ALL_TIME_KEYWORDS):
+        days = None
+    else:
+        days = parse_time_range(text) or parse_time_range(time_range or "")
+
+    # 团队
+    match = _TEAM_PATTERN.search(text)
+    if match:
+        team_id = int(match.group(1) or match.group(2))
+
+    return QueryIntent(
+        metric=metric,
+        table=METRIC_CATALOG[metric].table,
+        aggregation=aggregation,
+        days=days,
+        team_id=team_id,
+        project_id=project_id
+    )
+
+
+class MetricQueryEngine:
+    """指标分析引擎
+
+    按意图从指标表中读取数据，用 pandas/NumPy 做向量化聚合。
+    结果按 (意图, 数据版本) 缓存，数据表未变化时重复分析直接返回缓存。
+    """
+
+    def __init__(self, max_size: int = settings.ANALYSIS_CACHE_MAX_SIZE):
+        self.max_size = max_size
+        self._cache: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def data_version(self, table: str) -> Tuple[int, Optional[int]]:
+        """指标表的数据版本(记录数, 最大ID)"""
+        model = METRIC_TABLES[table]
+        with engine.connect() as connection:
+            count, max_id = connection.execute(select(func.count(model.id), func.max(model.id))).one()
+        return count, max_id
+
+    def cache_key(self, intent: QueryIntent, version: Tuple, fallback_data: Optional[Dict[str, Any]] = None) -> Tuple:
+        """缓存键"""
+        payload = json.dumps(fallback_data or {}, sort_keys=True, ensure_ascii=False, default=str)
+        return intent, version, hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def get_cached(self, key: Tuple) -> Optional[Dict[str, Any]]:
+        """读取缓存"""
+        result = self._cache.get(key)
+        if result is None:
+            self.stats["misses"] += 1
+            return None
+        self._cache.move_to_end(key)
+        self.stats["hits"] += 1
+        return result
+
+    def set_cached(self, key: Tuple, result: Dict[str, Any]):
+        """写入缓存"""
+        self._cache[key] = result
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+
+    def load_frame(self, intent: QueryIntent) -> "pd.DataFrame":
+        """读取意图对应的指标数据(team_id, measured_at, value)"""
+        model = METRIC_TABLES[intent.table]
+        column = getattr(model, intent.metric)
+
+        statement = select(model.team_id, model.measured_at, column.label("value")).where(column.isnot(None))
+        if intent.days is not None:
+            statement = statement.where(model.measured_at >= datetime.now() - timedelta(days=intent.days))
+        if intent.team_id is not None:
+            statement = statement.where(model.team_id == intent.team_id)
+        if intent.project_id is not None and hasattr(model, "project_id"):
+            statement = statement.where(model.project_id == intent.project_id)
+
+        with engine.connect() as connection:
+            frame = pd.read_sql(statement, connection)
+        frame["measured_at"] = pd.to_datetime(frame["measured_at"])
+        return frame.sort_values("measured_at", kind="stable")
+
+    def execute(self, intent: QueryIntent, fallback_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """执行分析；指标表中没有数据时使用调用方提供的采集数据"""
+        frame = self.load_frame(intent)
+        if frame.empty:
+            return self._from_fallback(intent, fallback_data or {})
+
+        values = frame["value"].to_numpy(dtype=np.float64)
+        result: Dict[str, Any] = {
+            "source": "database",
+            "count": int(values.size),
+            "summary": {
+                "mean": float(values.mean()),
+                "min": float(values.min()),
+                "max": float(values.max()),
+                "latest": float(values[-1])
+            }
+        }
+
+        if intent.aggregation == "trend":
+            result.update(self._trend(frame))
+            result["value"] = result["summary"]["latest"]
+        else:
+            result["value"] = float(self._aggregate(values, intent.aggregation))
+
+        # 未指定团队时给出各团队对比
+        if intent.team_id is None and frame["team_id"].notna().any():
+            grouped = frame.dropna(subset=["team_id"]).groupby("team_id")["value"]
+            breakdown_aggregation = {"trend": "mean", "latest": "last"}.get(intent.aggregation, intent.aggregation)
+            breakdown = grouped.agg(breakdown_aggregation).sort_values(ascending=False).head(10)
+            result["by_team"] = [
+                {"team_id": int(team_id), "value": float(value)} for team_id, value in breakdown.items()
+            ]
+
+        return result
+
+    @staticmethod
+    def _aggregate(values: "np.ndarray", aggregation: str) -> float:
+        """数值聚合"""
+        if aggregation == "latest":
+            return values[-1]
+        return {"mean": np.mean, "max": np.max, "min": np.min, "sum": np.sum}[aggregation](values)
+
+    @staticmethod
+    def _trend(frame: "pd.DataFrame") -> Dict[str, Any]:
+        """线性拟合趋势"""
+        values = frame["value"].to_numpy(dtype=np.float64)
+        elapsed_days = (frame["measured_at"] - frame["measured_at"].iloc[0]).dt.total_seconds().to_numpy() / 86400
+
+        slope = 0.0
+        if np.unique(elapsed_days).size >= 2:
+            slope = float(np.polyfit(elapsed_days, values, 1)[0])
+
+        first, last = float(values[0]), float(values[-1])
+        change_rate = (last - first) / abs(first) * 100 if first else 0.0
+
+        # 整个区间内的拟合变化量小于均值的5%视为平稳
+        span = float(elapsed_days[-1]) if elapsed_days.size else 0.0
+        mean = float(np.abs(values).mean()) or 1.0
+        if abs(slope * span) / mean < 0.05:
+            direction = "stable"
+        else:
+            direction = "up" if slope > 0 else "down"
+
+        return {
+            "trend": {
+                "direction": direction,
+                "slope_per_day": slope,
+                "first": first,
+                "last": last,
+                "change_rate": change_rate
+            }
+        }
+
+    @staticmethod
+    def _from_fallback(intent: QueryIntent, data: Dict[str, Any]) -> Dict[str, Any]:
+        """从调用方提供的快照数据(全组织的单个最新值)中取值
+
+        快照不区分团队和项目，也没有历史，指定了团队或项目时不使用。
+        """
+        if intent.team_id is not None or intent.project_id is not None:
+            return {"source": "none", "count": 0, "value": None}
+        definition = METRIC_CATALOG[intent.metric]
+        for key in (intent.metric,) + definition.aliases:
+            value = data.get(key)
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                return {"source": "snapshot", "count": 0, "value": float(value), "as_of": data.get("generated_at")}
+        return {"source": "none", "count": 0, "value": None}
+
+
+def describe_result(intent: QueryIntent, result: Dict[str, Any]) -> str:
+    """生成分析结论文本"""
+    definition = METRIC_CATALOG[intent.metric]
+    period = f"最近{intent.days}天" if intent.days else "全部时间内"
+    scope = f"团队{intent.team_id}" if intent.team_id is not None else ""
+    subject = f"{scope}{period}{definition.label}"
+
+    if result["source"] == "none":
+        return f"暂无{scope}{definition.label}数据，请先配置数据源并完成采集。"
+    if result["source"] == "snapshot":
+        # 快照只有一个全组织的最新值，无法按时间范围聚合
+        as_of = f"({result['as_of'][:16].replace('T', ' ')})" if result.get("as_of") else ""
+        return (
+            f"{period}暂无{definition.label}历史记录，无法计算{AGGREGATION_LABELS[intent.aggregation]}；"
+            f"最新仪表盘快照{as_of}中全组织的{definition.label}为{result['value']:.2f}{definition.unit}。"
+        )
+
+    if intent.aggregation == "trend":
+        trend = result["trend"]
+        direction = {"up": "上升", "down": "下降", "stable": "平稳"}[trend["direction"]]
+        text = (
+            f"{subject}呈{direction}趋势，从{trend['first']:.2f}{definition.unit}变化到"
+            f"{trend['last']:.2f}{definition.unit}（{trend['change_rate']:+.1f}%）"
+        )
+    else:
+        text = f"{subject}的{AGGREGATION_LABELS[intent.aggregation]}为{result['value']:.2f}{definition.unit}"
+    text += f"，基于{result['count']}条记录。"
+
+    if result.get("by_team"):
+        best = result["by_team"][0]
+        label = AGGREGATION_LABELS["mean" if intent.aggregation == "trend" else intent.aggregation]
+        text += f"各团队{label}中团队{best['team_id']}最高，为{best['value']:.2f}{definition.unit}。"
+    return text
+
+
+# 创建全局指标分析引擎实例
+metric_query_engine = MetricQueryEngine()
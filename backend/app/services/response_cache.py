@@ -0,0 +1,240 @@
+import hashlib
+import json
+import re
+import time
+import unicodedata
+import zlib
+from collections import OrderedDict
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Any, Optional, List, Tuple
+
+from app.core.config import settings
+from app.core.lazy import LazyModule
+
+if TYPE_CHECKING:
+    import numpy as np
+else:
+    np = LazyModule("numpy")
+
+
+# 归一化时去除的字符: 标点、空白和符号(数字之间的小数点保留，避免 1.5 与 15 归一化为同一文本)
+_STRIP_PATTERN = re.compile(r"(?:(?!(?<=\d)\.(?=\d))[\W_])+", re.UNICODE)
+
+# 同义说法统一为一种写法，使换种问法的相同问题得到相同的归一化文本
+_SYNONYMS = {
+    "如何": ("怎么样才能", "怎样才能", "怎么才能", "如何才能", "怎么样", "怎样", "怎么"),
+    "提高": ("提升", "改善", "改进"),
+    "降低": ("减少", "缩短"),
+    "本周": ("这周", "这一周"),
+    "本月": ("这个月",),
+    "上月": ("上个月",),
+    "": ("请问", "麻烦", "一下", "呢", "吗", "呀", "啊", "吧")
+}
+_SYNONYM_MAP = {variant: canonical for canonical, variants in _SYNONYMS.items() for variant in variants}
+_SYNONYM_PATTERN = re.compile("|".join(sorted(map(re.escape, _SYNONYM_MAP), key=len, reverse=True)))
+
+# 问题中的实体: 团队/项目名称、数字和日期、相对时间。实体不同的问题答案不同，不能按相似度命中
+_ENTITY_SUFFIX = r"(?:团队|项目|小组|部门|team|project)"
+_ENTITY_PATTERNS = (
+    re.compile(rf"([\u4e00-\u9fff]+){_ENTITY_SUFFIX}"),
+    re.compile(rf"([a-z][a-z0-9_-]*)\s*{_ENTITY_SUFFIX}"),
+    re.compile(r"(\d+(?:\.\d+)?)"),
+    re.compile(r"(今天|昨天|前天|本周|上周|本月|上月|今年|去年|本季度|上季度)")
+)
+# 中文名称前可能连带的虚词，取最后一个虚词之后的部分作为名称
+_NAME_SPLIT_PATTERN = re.compile(r"[的和与及跟同在是对把给]")
+
+
+class _CacheEntry:
+    """缓存条目"""
+
+    __slots__ = ("value", "context_hash", "entities", "vector", "buckets", "expires_at")
+
+    def __init__(
+        self,
+        value: Any,
+        context_hash: str,
+        entities: Tuple[str, ...],
+        vector: "np.ndarray",
+        buckets: List[int],
+        expires_at: float
+    ):
+        self.value = value
+        self.context_hash = context_hash
+        self.entities = entities
+        self.vector = vector
+        self.buckets = buckets
+        self.expires_at = expires_at
+
+
+class SemanticResponseCache:
+    """聊天回复语义缓存
+
+    两层查找:
+    1. 精确层: 归一化文本 + 上下文哈希
+    2. 相似层: 字符n-gram哈希向量 + 随机超平面LSH近邻索引，余弦相似度超过阈值且问题中的
+       实体(团队/项目名称、数字、日期等)完全相同才命中
+
+    条目带TTL，超出容量时按LRU淘汰。完全本地计算，无需网络。
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1000,
+        ttl: int = 3600,
+        similarity_threshold: float = 0.75,
+        dimensions: int = 1024,
+        ngram_range: Tuple[int, int] = (1, 2),
+        hash_tables: int = 16,
+        hash_bits: int = 8,
+        seed: int = 42
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.dimensions = dimensions
+        self.ngram_range = ngram_range
+        self.hash_bits = hash_bits
+
+        rng = np.random.default_rng(seed)
+        self._planes = rng.standard_normal((hash_tables * hash_bits, dimensions)).astype(np.float32)
+        self._bit_weights = (1 << np.arange(hash_bits)).astype(np.int64)
+
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._tables: List[Dict[int, set]] = [{} for _ in range(hash_tables)]
+
+        self.stats = {"exact_hits": 0, "similar_hits": 0, "misses": 0}
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """归一化文本: 全半角统一、小写、同义说法统一、去除语气词、标点(小数点除外)和空白"""
+        text = unicodedata.normalize("NFKC", text).lower()
+        text = _SYNONYM_PATTERN.sub(lambda match: _SYNONYM_MAP[match.group(0)], text)
+        return _STRIP_PATTERN.sub("", text)
+
+    @staticmethod
+    def entities(text: str) -> Tuple[str, ...]:
+        """提取问题中的实体"""
+        text = unicodedata.normalize("NFKC", text).lower()
+        entities = set()
+        for pattern in _ENTITY_PATTERNS:
+            for name in pattern.findall(text):
+                entities.add(_NAME_SPLIT_PATTERN.split(name)[-1] or name)
+        return tuple(sorted(entities))
+
+    @staticmethod
+    def context_hash(context: Optional[Dict[str, Any]]) -> str:
+        """计算上下文哈希"""
+        if not context:
+            return ""
+        payload = json.dumps(context, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def embed(self, normalized: str) -> "np.ndarray":
+        """字符n-gram特征哈希向量(L2归一化)"""
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        low, high = self.ngram_range
+        for n in range(low, high + 1):
+            for i in range(len(normalized) - n + 1):
+                h = zlib.crc32(normalized[i:i + n].encode("utf-8"))
+                vector[h % self.dimensions] += 1.0 if (h >> 31) & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _buckets(self, vector: "np.ndarray") -> List[int]:
+        """计算向量在各个LSH表中的桶编号"""
+        bits = (self._planes @ vector > 0).reshape(len(self._tables), self.hash_bits)
+        return (bits @ self._bit_weights).tolist()
+
+    def get(self, text: str, context: Optional[Dict[str, Any]] = None) -> Optional[Any]:
+        """查找缓存，未命中返回None"""
+        normalized = self.normalize(text)
+        context_hash = self.context_hash(context)
+        key = f"{context_hash}:{normalized}"
+        now = time.monotonic()
+
+        # 精确层
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.expires_at > now:
+                self._entries.move_to_end(key)
+                self.stats["exact_hits"] += 1
+                return entry.value
+            self._remove(key)
+
+        # 相似层
+        if normalized and self.similarity_threshold < 1:
+            entities = self.entities(text)
+            vector = self.embed(normalized)
+            candidates = set()
+            for table, bucket in zip(self._tables, self._buckets(vector)):
+                candidates |= table.get(bucket, set())
+
+            best_key, best_score = None, self.similarity_threshold
+            for candidate in candidates:
+                entry = self._entries[candidate]
+                if entry.context_hash != context_hash or entry.entities != entities:
+                    continue
+                if entry.expires_at <= now:
+                    continue
+                score = float(entry.vector @ vector)
+                if score >= best_score:
+                    best_key, best_score = candidate, score
+
+            if best_key is not None:
+                self._entries.move_to_end(best_key)
+                self.stats["similar_hits"] += 1
+                return self._entries[best_key].value
+
+        self.stats["misses"] += 1
+        return None
+
+    def set(self, text: str, value: Any, context: Optional[Dict[str, Any]] = None):
+        """写入缓存"""
+        normalized = self.normalize(text)
+        context_hash = self.context_hash(context)
+        key = f"{context_hash}:{normalized}"
+
+        if key in self._entries:
+            self._remove(key)
+
+        vector = self.embed(normalized)
+        buckets = self._buckets(vector)
+        self._entries[key] = _CacheEntry(
+            value, context_hash, self.entities(text), vector, buckets, time.monotonic() + self.ttl
+        )
+        for table, bucket in zip(self._tables, buckets):
+            table.setdefault(bucket, set()).add(key)
+
+        # LRU淘汰
+        while len(self._entries) > self.max_size:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str):
+        """删除条目及其索引"""
+        entry = self._entries.pop(key)
+        for table, bucket in zip(self._tables, entry.buckets):
+            keys = table.get(bucket)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del table[bucket]
+
+    def clear(self):
+        """清空缓存"""
+        self._entries.clear()
+        for table in self._tables:
+            table.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+@lru_cache(maxsize=None)
+def get_chat_response_cache() -> SemanticResponseCache:
+    """获取进程内共享的聊天回复缓存"""
+    return SemanticResponseCache(
+        max_size=settings.CHAT_CACHE_MAX_SIZE,
+        ttl=settings.CHAT_CACHE_TTL,
+        similarity_threshold=settings.CHAT_CACHE_SIMILARITY_THRESHOLD
+    )
@@ -0,0 +1,180 @@
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Tuple
+from loguru import logger
+
+from app.core.config import settings
+from app.core.lazy import LazyModule
+
+from app.schemas.schemas import InsightCreate, InsightType, SeverityLevel
+
+if TYPE_CHECKING:
+    import numpy as np
+else:
+    np = LazyModule("numpy")
+
+
+# 默认规则文件
+DEFAULT_RULES_PATH = Path(__file__).resolve().parent.parent / "rules" / "insight_rules.json"
+
+# 支持的比较运算符及对应的NumPy比较函数名
+COMPARATORS = {
+    "<": "less",
+    "<=": "less_equal",
+    ">": "greater",
+    ">=": "greater_equal",
+    "==": "equal",
+    "!=": "not_equal"
+}
+
+# 规则必填字段
+REQUIRED_FIELDS = ("category", "metric", "comparator", "threshold", "title", "template", "type", "severity")
+
+
+class InsightRule:
+    """单条洞察规则"""
+
+    def __init__(self, definition: Dict[str, Any]):
+        missing = [field for field in REQUIRED_FIELDS if field not in definition]
+        if missing:
+            raise ValueError(f"规则缺少字段: {', '.join(missing)}")
+        if definition["comparator"] not in COMPARATORS:
+            raise ValueError(f"不支持的比较运算符: {definition['comparator']}")
+
+        self.category: str = definition["category"]
+        self.metric: str = definition["metric"]
+        self.id: str = definition.get("id", f"{self.category}.{self.metric}")
+        self.comparator: str = definition["comparator"]
+        self.threshold: float = float(definition["threshold"])
+        self.title: str = definition["title"]
+        self.template: str = definition["template"]
+        self.type = InsightType(definition["type"])
+        self.severity = SeverityLevel(definition["severity"])
+        self.confidence: float = float(definition.get("confidence", settings.INSIGHT_CONFIDENCE_THRESHOLD))
+        self.recommendations: List[str] = list(definition.get("recommendations", []))
+
+    @property
+    def column(self) -> str:
+        """规则对应的指标列名"""
+        return f"{self.category}.{self.metric}"
+
+    def render(self, value: float, team_id: Optional[int] = None, project_id: Optional[int] = None) -> InsightCreate:
+        """根据命中的指标值生成洞察"""
+        return InsightCreate(
+            title=self.title,
+            # 指标名可能恰好为 value/threshold，合并为一个字典后再格式化(value/threshold 保持原含义)
+            description=self.template.format(**{self.metric: value, "value": value, "threshold": self.threshold}),
+            type=self.type,
+            severity=self.severity,
+            confidence=self.confidence,
+            team_id=team_id,
+            project_id=project_id,
+            metrics={self.metric: value},
+            recommendations=list(self.recommendations)
+        )
+
+
+class InsightRuleEngine:
+    """洞察规则引擎
+
+    启动时将声明式规则编译为按运算符分组的阈值数组，
+    评估时对所有团队的指标矩阵(团队 × 指标)做一次NumPy广播比较。
+    """
+
+    def __init__(self, rules: List[InsightRule], missing_value: float = 0.0):
+        self.rules = rules
+        self.missing_value = float(missing_value)
+
+        # 指标列: 按 "分类.指标" 去重
+        self.columns: List[str] = list(dict.fromkeys(rule.column for rule in rules))
+        self.column_index: Dict[str, int] = {column: i for i, column in enumerate(self.columns)}
+        self._category_metrics: Dict[str, List[Tuple[int, str]]] = {}
+        for column, index in self.column_index.items():
+            category, metric = column.split(".", 1)
+            self._category_metrics.setdefault(category, []).append((index, metric))
+
+        # 每条规则对应的指标列和阈值
+        self._rule_columns = np.array([self.column_index[rule.column] for rule in rules], dtype=np.intp)
+        self._thresholds = np.array([rule.threshold for rule in rules], dtype=np.float64)
+
+        # 同一运算符的规则合并为一组，评估时每组只做一次比较
+        self._op_groups: List[Tuple["np.ufunc", "np.ndarray"]] = []
+        for comparator, ufunc_name in COMPARATORS.items():
+            indices = np.array(
+                [i for i, rule in enumerate(rules) if rule.comparator == comparator],
+                dtype=np.intp
+            )
+            if indices.size:
+                self._op_groups.append((getattr(np, ufunc_name), indices))
+
+        logger.info(f"洞察规则编译完成: {len(rules)} 条规则, {len(self.columns)} 个指标")
+
+    @classmethod
+    def from_definitions(cls, definitions: Dict[str, Any]) -> "InsightRuleEngine":
+        """从规则定义字典编译规则引擎"""
+        rules = [InsightRule(item) for item in definitions.get("rules", [])]
+        return cls(rules, missing_value=definitions.get("missing_value", 0.0))
+
+    @classmethod
+    def from_file(cls, path: Path) -> "InsightRuleEngine":
+        """从JSON规则文件编译规则引擎"""
+        with open(path, "r", encoding="utf-8") as f:
+            definitions = json.load(f)
+        return cls.from_definitions(definitions)
+
+    def build_matrix(self, metrics_rows: List[Dict[str, Any]]) -> "np.ndarray":
+        """将各团队的指标数据转换为指标矩阵(团队 × 指标)"""
+        matrix = np.full((len(metrics_rows), len(self.columns)), self.missing_value, dtype=np.float64)
+
+        for row_index, metrics_data in enumerate(metrics_rows):
+            for category, metrics in self._category_metrics.items():
+                category_data = metrics_data.get(category) or {}
+                for column_index, metric in metrics:
+                    value = category_data.get(metric)
+                    if value is not None:
+                        matrix[row_index, column_index] = value
+
+        return matrix
+
+    def evaluate(self, matrix: "np.ndarray") -> "np.ndarray":
+        """评估所有规则，返回命中矩阵(团队 × 规则)"""
+        values = matrix[:, self._rule_columns]
+        hits = np.zeros(values.shape, dtype=bool)
+
+        for ufunc, indices in self._op_groups:
+            hits[:, indices] = ufunc(values[:, indices], self._thresholds[indices])
+
+        return hits
+
+    def generate_insights(self, metrics_rows: List[Dict[str, Any]]) -> List[InsightCreate]:
+        """对多个团队的指标数据批量生成洞察"""
+        if not self.rules or not metrics_rows:
+            return []
+
+        matrix = self.build_matrix(metrics_rows)
+        hits = self.evaluate(matrix)
+
+        insights = []
+        for row_index, rule_index in zip(*np.nonzero(hits)):
+            rule = self.rules[rule_index]
+            metrics_data = metrics_rows[row_index]
+            value = float(matrix[row_index, self._rule_columns[rule_index]])
+            insights.append(rule.render(
+                value,
+                team_id=metrics_data.get("team_id"),
+                project_id=metrics_data.get("project_id")
+            ))
+
+        return insights
+
+
+@lru_cache(maxsize=None)
+def load_insight_rule_engine(path: Optional[str] = None) -> InsightRuleEngine:
+    """加载并编译洞察规则，同一规则文件只编译一次"""
+    rules_path = Path(path or settings.INSIGHT_RULES_PATH or DEFAULT_RULES_PATH)
+    try:
+        return InsightRuleEngine.from_file(rules_path)
+    except Exception as e:
+        logger.error(f"加载洞察规则失败({rules_path}): {e}")
+        raise
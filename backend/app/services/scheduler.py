@@ -0,0 +1,99 @@
+import asyncio
+import os
+import random
+from typing import Callable, Awaitable, List, Optional
+from loguru import logger
+
+from app.core.config import settings
+from app.core.locks import FileLock
+
+
+class ScheduledJob:
+    """定时任务"""
+
+    def __init__(self, name: str, func: Callable[[], Awaitable[object]], interval: float, jitter: float, deadline: float):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter
+        self.deadline = deadline
+        self.task: Optional[asyncio.Task] = None
+        self.stats = {"runs": 0, "skipped": 0, "failures": 0, "timeouts": 0}
+
+
+class PeriodicScheduler:
+    """定时调度器
+
+    - 固定频率: 按 start + k × interval 的时间网格触发，执行耗时不会造成周期漂移
+    - 抖动: 每次触发随机延后 0~jitter 秒，避免多个数据源同时请求
+    - 防重叠: 上一次执行尚未结束时跳过本次触发
+    - 截止时间: 单次执行超过 deadline 秒即取消
+    - 主进程锁: 多个工作进程中只有持有锁的进程执行任务
+    """
+
+    def __init__(self, lock: Optional[FileLock] = None):
+        self.lock = lock
+        self.jobs: List[ScheduledJob] = []
+
+    def add_job(
+        self,
+        name: str,
+        func: Callable[[], Awaitable[object]],
+        interval: float,
+        jitter: float = settings.DATA_COLLECTION_JITTER,
+        deadline: Optional[float] = None
+    ) -> ScheduledJob:
+        """添加定时任务"""
+        job = ScheduledJob(name, func, interval, jitter, deadline or min(interval, settings.DATA_COLLECTION_TIMEOUT))
+        self.jobs.append(job)
+        return job
+
+    async def run(self):
+        """成为主进程后运行所有定时任务，直到被取消"""
+        if self.lock is not None:
+            while not self.lock.acquire():
+                await asyncio.sleep(settings.SCHEDULER_LEADER_RETRY_INTERVAL)
+            logger.info(f"已获取调度主进程锁 (pid={os.getpid()})")
+
+        try:
+            await asyncio.gather(*(self._run_job(job) for job in self.jobs))
+        finally:
+            for job in self.jobs:
+                if job.task and not job.task.done():
+                    job.task.cancel()
+            if self.lock is not None:
+                self.lock.release()
+
+    async def _run_job(self, job: ScheduledJob):
+        """按固定频率触发单个任务"""
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+
+        while True:
+            delay = next_tick - loop.time() + random.uniform(0, job.jitter)
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            if job.task and not job.task.done():
+                job.stats["skipped"] += 1
+                logger.warning(f"定时任务 {job.name} 上一次执行尚未结束，跳过本次触发")
+            else:
+                job.task = asyncio.create_task(self._execute(job))
+
+            # 对齐到下一个时间网格，落后超过一个周期时直接跳到最近的未来时刻
+            next_tick += job.interval
+            now = loop.time()
+            if next_tick < now:
+                next_tick += ((now - next_tick) // job.interval + 1) * job.interval
+
+    async def _execute(self, job: ScheduledJob):
+        """执行任务(带截止时间)"""
+        job.stats["runs"] += 1
+        try:
+            await asyncio.wait_for(job.func(), timeout=job.deadline)
+        except asyncio.TimeoutError:
+            job.stats["timeouts"] += 1
+            logger.error(f"定时任务 {job.name} 超过截止时间 {job.deadline} 秒，已取消")
+        except Exception as e:
+            job.stats["failures"] += 1
+            logger.error(f"定时任务 {job.name} 执行失败: {e}")
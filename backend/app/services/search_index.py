@@ -0,0 +1,215 @@
+import re
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from loguru import logger
+from sqlalchemy import delete, event, false, func, inspect, insert, literal_column, select
+from sqlalchemy.sql import Subquery, column, table
+
+from app.core.database import SessionLocal
+from app.models.models import Insight, Project, Recommendation, SearchDocument, Team
+
+
+# 中日韩统一表意文字(含扩展A和兼容区)
+_CJK = "\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+_TOKEN_PATTERN = re.compile(f"([{_CJK}]+)|([^\\W_{_CJK}]+)")
+
+# SQLite FTS5 外部内容表
+_FTS_TABLE = table("search_documents_fts", column("rowid"))
+
+
+def _text_tokens(value: Any) -> List[Tuple[List[str], bool]]:
+    """把文本切分为词组: 中文连续片段按相邻两字切分，其他文字按单词小写
+
+    返回 [(词元列表, 是否为单个可前缀匹配的词)]
+    """
+    groups = []
+    for cjk, word in _TOKEN_PATTERN.findall(str(value or "")):
+        if cjk:
+            if len(cjk) == 1:
+                groups.append(([cjk], True))
+            else:
+                groups.append(([cjk[i:i + 2] for i in range(len(cjk) - 1)], False))
+        else:
+            groups.append(([word.lower()], True))
+    return groups
+
+
+def document_tokens(*values: Any) -> str:
+    """生成写入索引的词元串
+
+    中文片段末尾的单字也作为词元写入，这样单字查询用前缀匹配即可命中片段中任意位置的字。
+    """
+    tokens = []
+    for value in values:
+        for cjk, word in _TOKEN_PATTERN.findall(str(value or "")):
+            if cjk:
+                tokens.extend(cjk[i:i + 2] for i in range(len(cjk) - 1))
+                tokens.append(cjk[-1])
+            else:
+                tokens.append(word.lower())
+    return " ".join(tokens)
+
+
+def fts5_query(query: str) -> str:
+    """搜索词转换为 FTS5 查询: 中文片段为短语(相邻两字词元需连续出现)，单词做前缀匹配，各部分为AND"""
+    parts = []
+    for tokens, prefix in _text_tokens(query):
+        phrase = '"' + " ".join(tokens) + '"'
+        parts.append(phrase + "*" if prefix else phrase)
+    return " ".join(parts)
+
+
+def tsquery(query: str) -> str:
+    """搜索词转换为 PostgreSQL to_tsquery 表达式，语义与 fts5_query 一致"""
+    parts = []
+    for tokens, prefix in _text_tokens(query):
+        parts.append(tokens[0] + ":*" if prefix else " <-> ".join(tokens))
+    return " & ".join(f"({part})" for part in parts)
+
+
+# 各类实体的检索字段: (模型, 标题字段, 正文字段)
+SEARCH_ENTITIES: Dict[str, Tuple[Any, Tuple[str, ...], Tuple[str, ...]]] = {
+    "team": (Team, ("name",), ("description",)),
+    "project": (Project, ("name",), ("description",)),
+    "insight": (Insight, ("title",), ("description", "recommendations")),
+    "recommendation": (Recommendation, ("title",), ("description",))
+}
+
+
+def _field_values(target: Any, fields: Tuple[str, ...]) -> List[Any]:
+    values = []
+    for field in fields:
+        value = getattr(target, field)
+        values.extend(value if isinstance(value, list) else [value])
+    return values
+
+
+class SearchIndex:
+    """团队、项目、洞察、改进建议的全文检索
+
+    search_documents 由ORM写入钩子在同一事务中维护(中文切分在Python中完成)，
+    SQLite 的 FTS5 表由触发器同步，PostgreSQL 使用 tsvector 生成列。
+    列表接口通过 match() 得到 (entity_id, score) 子查询，按相关度排序分页。
+    """
+
+    def document(self, entity_type: str, target: Any) -> Dict[str, Any]:
+        _, title_fields, body_fields = SEARCH_ENTITIES[entity_type]
+        return {
+            "entity_type": entity_type,
+            "entity_id": target.id,
+            "title_tokens": document_tokens(*_field_values(target, title_fields)),
+            "body_tokens": document_tokens(*_field_values(target, body_fields)),
+            "updated_at": datetime.now()
+        }
+
+    def index(self, connection, entity_type: str, target: Any):
+        """写入或替换一个实体的检索文档"""
+        self.remove(connection, entity_type, target.id)
+        connection.execute(insert(SearchDocument), [self.document(entity_type, target)])
+
+    def remove(self, connection, entity_type: str, entity_id: int):
+        connection.execute(
+            delete(SearchDocument)
+            .where(SearchDocument.entity_type == entity_type)
+            .where(SearchDocument.entity_id == entity_id)
+        )
+
+    def match(self, entity_type: str, query: str, dialect: str) -> Subquery:
+        """匹配 query 的实体子查询，列为 entity_id 和 score(越大越相关)"""
+        if dialect == "postgresql":
+            expression = tsquery(query)
+            vector = literal_column("search_documents.search_vector")
+            ts_query = func.to_tsquery("simple", expression)
+            statement = select(
+                SearchDocument.entity_id.label("entity_id"),
+                func.ts_rank(vector, ts_query).label("score")
+            ).where(vector.op("@@")(ts_query))
+        else:
+            expression = fts5_query(query)
+            fts = literal_column("search_documents_fts")
+            statement = (
+                select(
+                    SearchDocument.entity_id.label("entity_id"),
+                    # bm25 越小越相关，取负数后统一为越大越相关；标题权重为正文的2倍
+                    (-func.bm25(fts, 2.0, 1.0)).label("score")
+                )
+                .select_from(_FTS_TABLE)
+                .join(SearchDocument, SearchDocument.id == _FTS_TABLE.c.rowid)
+                .where(fts.op("MATCH")(expression))
+            )
+
+        statement = statement.where(SearchDocument.entity_type == entity_type)
+        if not expression:
+            statement = statement.where(false())
+        return statement.subquery("search_match")
+
+    def rebuild(self, entity_types: Optional[Iterable[str]] = None) -> int:
+        """重建检索文档(默认全部类型)，返回文档数"""
+        entity_types = list(entity_types or SEARCH_ENTITIES)
+        db = SessionLocal()
+        try:
+            db.execute(delete(SearchDocument).where(SearchDocument.entity_type.in_(entity_types)))
+            total = 0
+            for entity_type in entity_types:
+                model = SEARCH_ENTITIES[entity_type][0]
+                documents = []
+                for target in db.query(model).yield_per(1000):
+                    documents.append(self.document(entity_type, target))
+                    if len(documents) == 1000:
+                        db.execute(insert(SearchDocument), documents)
+                        total += len(documents)
+                        documents = []
+                if documents:
+                    db.execute(insert(SearchDocument), documents)
+                    total += len(documents)
+            db.commit()
+            logger.info(f"检索索引重建完成: {total} 个文档")
+            return total
+        except Exception as e:
+            db.rollback()
+            logger.error(f"重建检索索引失败: {e}")
+            raise
+        finally:
+            db.close()
+
+    def backfill(self):
+        """为尚无检索文档的实体类型(新建或升级后的数据库、新增的检索类型)根据现有数据建立索引"""
+        db = SessionLocal()
+        try:
+            indexed = {row[0] for row in db.query(SearchDocument.entity_type).distinct()}
+        finally:
+            db.close()
+        missing = [entity_type for entity_type in SEARCH_ENTITIES if entity_type not in indexed]
+        if missing:
+            self.rebuild(missing)
+
+
+# 创建全局检索索引实例
+search_index = SearchIndex()
+
+
+def _after_insert_hook(entity_type: str) -> Callable:
+    def after_insert(mapper, connection, target):
+        search_index.index(connection, entity_type, target)
+    return after_insert
+
+
+def _after_update_hook(entity_type: str, fields: Tuple[str, ...]) -> Callable:
+    def after_update(mapper, connection, target):
+        state = inspect(target)
+        if any(state.attrs[field].history.has_changes() for field in fields):
+            search_index.index(connection, entity_type, target)
+    return after_update
+
+
+def _after_delete_hook(entity_type: str) -> Callable:
+    def after_delete(mapper, connection, target):
+        search_index.remove(connection, entity_type, target.id)
+    return after_delete
+
+
+# 注册写入钩子: 实体新增、检索字段变化或删除时在同一事务中更新检索文档
+for _entity_type, (_model, _title_fields, _body_fields) in SEARCH_ENTITIES.items():
+    event.listen(_model, "after_insert", _after_insert_hook(_entity_type))
+    event.listen(_model, "after_update", _after_update_hook(_entity_type, _title_fields + _body_fields))
+    event.listen(_model, "after_delete", _after_delete_hook(_entity_type))
@@ -0,0 +1,57 @@
+import asyncio
+import time
+from typing import Dict, Any, Callable, Awaitable, Hashable, Tuple
+
+
+class SingleFlight:
+    """并发请求合并
+
+    相同键的并发调用共享同一个进行中的任务，只执行一次；
+    可选的结果TTL让紧随其后的突发请求直接复用刚完成的结果，结果在TTL到期时移除。
+    调用方被取消不会影响共享任务。
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._results: Dict[Hashable, Tuple[float, Any]] = {}
+        self.stats = {"calls": 0, "executions": 0, "shared": 0, "cached": 0}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]], ttl: float = 0) -> Any:
+        """执行或加入键对应的调用"""
+        self.stats["calls"] += 1
+
+        cached = self._results.get(key)
+        if cached is not None:
+            if cached[0] > time.monotonic():
+                self.stats["cached"] += 1
+                return cached[1]
+            del self._results[key]
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.stats["executions"] += 1
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._on_done(key, done, ttl))
+        else:
+            self.stats["shared"] += 1
+
+        return await asyncio.shield(task)
+
+    def _on_done(self, key: Hashable, task: asyncio.Task, ttl: float):
+        """任务结束: 移出进行中列表，成功时按TTL缓存结果并在到期时移除"""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if ttl > 0 and not task.cancelled() and task.exception() is None:
+            entry = (time.monotonic() + ttl, task.result())
+            self._results[key] = entry
+            asyncio.get_running_loop().call_later(ttl, self._expire, key, entry)
+
+    def _expire(self, key: Hashable, entry: Tuple[float, Any]):
+        """移除到期的缓存结果(期间已被新结果替换时保留)"""
+        if self._results.get(key) is entry:
+            del self._results[key]
+
+    def forget(self, key: Hashable):
+        """丢弃键对应的缓存结果"""
+        self._results.pop(key, None)
@@ -0,0 +1,239 @@
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import datetime
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from loguru import logger
+from sqlalchemy import func
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.models import Team, TeamMember, TeamMetric
+
+
+# 参与排行的团队指标(TeamMetric 的列)
+RANKING_METRICS = ("overall_score", "efficiency", "velocity", "satisfaction", "collaboration")
+
+# 分数变化小于该值视为持平
+TREND_THRESHOLD = 0.5
+
+
+class SortedIndex:
+    """单个指标按分数倒序的有序索引
+
+    键为 (-分数, team_id) 的有序列表，用二分查找定位: 排名、Top-K 查询为 O(log n + k)，
+    更新一个团队的分数为一次二分查找加列表内移动。同时维护分数总和，平均分为 O(1)。
+    """
+
+    def __init__(self):
+        self._keys: List[Tuple[float, int]] = []
+        self._scores: Dict[int, float] = {}
+        self._total = 0.0
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def update(self, team_id: int, score: Optional[float]):
+        """设置团队分数，score 为空时从索引中移除"""
+        old = self._scores.pop(team_id, None)
+        if old is not None:
+            del self._keys[bisect_left(self._keys, (-old, team_id))]
+            self._total -= old
+        if score is not None:
+            insort(self._keys, (-score, team_id))
+            self._scores[team_id] = score
+            self._total += score
+
+    def score(self, team_id: int) -> Optional[float]:
+        return self._scores.get(team_id)
+
+    def rank(self, team_id: int) -> Optional[int]:
+        """团队排名(从1开始，同分并列)"""
+        score = self._scores.get(team_id)
+        if score is None:
+            return None
+        return bisect_left(self._keys, (-score,)) + 1
+
+    def top(self, limit: int, offset: int = 0) -> List[Tuple[int, float]]:
+        """按分数倒序的 [(team_id, 分数)]"""
+        return [(team_id, -negative) for negative, team_id in self._keys[offset:offset + limit]]
+
+    def average(self) -> Optional[float]:
+        return self._total / len(self._keys) if self._keys else None
+
+
+class TeamRankingIndex:
+    """团队效能排行索引
+
+    每个指标维护一个 SortedIndex，保存各团队最新一次 TeamMetric 的分数。新的 TeamMetric 行按ID增量
+    读取(包括其他工作进程写入的)，每次读取前最多每 TEAM_RANKING_REFRESH_INTERVAL 秒检查一次，
+    只应用新行，不重新排序全部团队。
+
+    并发写入时ID较小的事务可能晚于ID较大的事务提交，因此增量读取会重读最近
+    TEAM_RANKING_ID_OVERLAP 个已读ID(重复应用同一行无影响)，并每 TEAM_RANKING_REBUILD_INTERVAL
+    秒在后台全量重建一次，兜底超出窗口的情况。
+    """
+
+    def __init__(
+        self,
+        refresh_interval: float = settings.TEAM_RANKING_REFRESH_INTERVAL,
+        id_overlap: int = settings.TEAM_RANKING_ID_OVERLAP,
+        rebuild_interval: float = settings.TEAM_RANKING_REBUILD_INTERVAL
+    ):
+        self.refresh_interval = refresh_interval
+        self.id_overlap = id_overlap
+        self.rebuild_interval = rebuild_interval
+        self._indexes = {metric: SortedIndex() for metric in RANKING_METRICS}
+        self._latest: Dict[int, Tuple[datetime, int]] = {}  # team_id -> 最新记录的 (measured_at, id)
+        self._previous: Dict[int, Dict[str, Optional[float]]] = {}  # team_id -> 上一次记录的分数
+        self._last_id = 0
+        self._last_refresh = 0.0
+        self._last_rebuild = time.monotonic()  # 首次刷新从头读取，等同于一次重建
+        self._lock = threading.Lock()
+
+    def apply(self, row: TeamMetric):
+        """应用一条 TeamMetric 记录，比当前记录旧的忽略"""
+        measured_at = row.measured_at or row.created_at or datetime.min
+        if measured_at.tzinfo is not None:
+            measured_at = measured_at.astimezone().replace(tzinfo=None)
+        key = (measured_at, row.id)
+        current = self._latest.get(row.team_id)
+        if current is not None and key <= current:
+            return
+
+        if current is not None:
+            self._previous[row.team_id] = {
+                metric: self._indexes[metric].score(row.team_id) for metric in RANKING_METRICS
+            }
+        self._latest[row.team_id] = key
+        for metric in RANKING_METRICS:
+            self._indexes[metric].update(row.team_id, getattr(row, metric))
+
+    def _read(self, after_id: int):
+        """应用ID大于 after_id 的 TeamMetric 记录；从头读取时按测量时间排序，使上一次分数准确"""
+        db = SessionLocal()
+        try:
+            order = (TeamMetric.id,) if after_id else (TeamMetric.measured_at, TeamMetric.id)
+            rows = (
+                db.query(TeamMetric)
+                .filter(TeamMetric.id > after_id)
+                .order_by(*order)
+                .yield_per(1000)
+            )
+            for row in rows:
+                self.apply(row)
+                self._last_id = max(self._last_id, row.id)
+        finally:
+            db.close()
+
+    def refresh(self, force: bool = False):
+        """读取上次之后新增的 TeamMetric 记录，到重建间隔时全量重建"""
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._last_refresh < self.refresh_interval:
+                return
+            self._last_refresh = now
+
+            rebuild = now - self._last_rebuild >= self.rebuild_interval
+            if not rebuild:
+                try:
+                    self._read(max(self._last_id - self.id_overlap, 0))
+                except Exception as e:
+                    logger.error(f"刷新团队排行索引失败: {e}")
+                return
+            self._last_rebuild = now
+
+        # 全量重建在新实例上进行，完成后替换，重建期间查询仍使用当前索引
+        fresh = TeamRankingIndex(self.refresh_interval, self.id_overlap, self.rebuild_interval)
+        try:
+            fresh._read(0)
+        except Exception as e:
+            logger.error(f"重建团队排行索引失败: {e}")
+            return
+        with self._lock:
+            self._indexes, self._latest, self._previous = fresh._indexes, fresh._latest, fresh._previous
+            self._last_id = fresh._last_id
+
+    def _index(self, metric: str) -> SortedIndex:
+        if metric not in self._indexes:
+            raise ValueError(f"不支持的排行指标: {metric}")
+        return self._indexes[metric]
+
+    def _change(self, team_id: int, metric: str) -> Tuple[Optional[float], str]:
+        """与上一次记录相比的分数变化和趋势"""
+        current = self._indexes[metric].score(team_id)
+        previous = self._previous.get(team_id, {}).get(metric)
+        if current is None or previous is None:
+            return None, "stable"
+        change = round(current - previous, 2)
+        if abs(change) < TREND_THRESHOLD:
+            return change, "stable"
+        return change, "up" if change > 0 else "down"
+
+    def _team_entry(self, team_id: int, metric: str) -> Dict[str, Any]:
+        change, trend = self._change(team_id, metric)
+        return {
+            "id": team_id,
+            "rank": self._indexes[metric].rank(team_id),
+            "score": self._indexes[metric].score(team_id),
+            "change": change,
+            "trend": trend,
+            "metrics": {name: self._indexes[name].score(team_id) for name in RANKING_METRICS}
+        }
+
+    def top(self, metric: str = "overall_score", limit: int = 10, offset: int = 0) -> Dict[str, Any]:
+        """Top-K 排行"""
+        index = self._index(metric)
+        self.refresh()
+        with self._lock:
+            entries = [self._team_entry(team_id, metric) for team_id, _ in index.top(limit, offset)]
+            total, average = len(index), index.average()
+        return {"metric": metric, "rankings": entries, "total_teams": total, "avg_score": average}
+
+    def compare(self, team_ids: Iterable[int], metrics: Iterable[str] = RANKING_METRICS) -> Dict[str, Any]:
+        """任意团队在各指标上的分数和排名(每个团队每个指标一次二分查找)，以及各指标上领先的团队"""
+        team_ids, metrics = list(team_ids), list(metrics)
+        for metric in metrics:
+            self._index(metric)
+        self.refresh()
+        with self._lock:
+            teams = [
+                {
+                    "id": team_id,
+                    "scores": {metric: self._indexes[metric].score(team_id) for metric in metrics},
+                    "ranks": {metric: self._indexes[metric].rank(team_id) for metric in metrics}
+                }
+                for team_id in team_ids
+            ]
+            totals = {metric: len(self._indexes[metric]) for metric in metrics}
+
+        leaders = {}
+        for metric in metrics:
+            ranked = [team for team in teams if team["ranks"][metric] is not None]
+            leaders[metric] = min(ranked, key=lambda team: team["ranks"][metric])["id"] if ranked else None
+        return {"teams": teams, "total_teams": totals, "leaders": leaders}
+
+
+def attach_team_details(entries: List[Dict[str, Any]]):
+    """为排行结果批量补充团队名称和成员数(只查询结果中的团队)"""
+    team_ids = [entry["id"] for entry in entries]
+    if not team_ids:
+        return
+    db = SessionLocal()
+    try:
+        names = dict(db.query(Team.id, Team.name).filter(Team.id.in_(team_ids)).all())
+        members = dict(
+            db.query(TeamMember.team_id, func.count(TeamMember.id))
+            .filter(TeamMember.team_id.in_(team_ids))
+            .group_by(TeamMember.team_id)
+            .all()
+        )
+    finally:
+        db.close()
+    for entry in entries:
+        entry["name"] = names.get(entry["id"])
+        entry["members"] = members.get(entry["id"], 0)
+
+
+# 创建全局团队排行索引实例
+team_rankings = TeamRankingIndex()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+流式聊天基准测试
+
+启动一个本地的 OpenAI 兼容模拟服务器(按固定间隔逐个返回token)和平台后端，对比:
+  - /chat/message      等待完整回复后返回
+  - /chat/stream (SSE) 首字节时间、首个token时间
+  - /chat/ws           首个token时间
+并验证客户端中途断开时上游流被及时关闭。
+
+使用方法:
+    python benchmarks/bench_chat_stream.py
+    python benchmarks/bench_chat_stream.py --tokens 50 --token-delay 0.05
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def create_mock_llm(tokens: int, token_delay: float, stats: dict, failures: list = None):
+    """OpenAI兼容的模拟聊天补全服务
+
+    failures 为依次注入的失败响应 [(状态码, Retry-After)]，用完后正常返回；
+    stats 中记录请求数、同时处理的最大请求数、请求到达时间和客户端连接端口。
+    """
+    from fastapi import FastAPI, Request
+    from fastapi.responses import JSONResponse, StreamingResponse
+
+    app = FastAPI()
+    failures = list(failures or [])
+    for key in ("requests", "in_flight", "max_in_flight", "streams", "aborted"):
+        stats.setdefault(key, 0)
+    for key in ("request_times", "peers", "aborted_after"):
+        stats.setdefault(key, [])
+
+    def usage() -> dict:
+        return {"prompt_tokens": 10, "completion_tokens": tokens, "total_tokens": tokens + 10}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats["requests"] += 1
+        stats["request_times"].append(time.monotonic())
+        stats["peers"].append(request.client.port)
+        if failures:
+            status, retry_after = failures.pop(0)
+            headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+            return JSONResponse({"error": {"message": "mock failure", "type": "mock"}}, status_code=status, headers=headers)
+
+        pieces = [f"片段{i} " for i in range(tokens)]
+        stats["in_flight"] += 1
+        stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+
+        if not body.get("stream"):
+            try:
+                await asyncio.sleep(tokens * token_delay)
+            finally:
+                stats["in_flight"] -= 1
+            return JSONResponse({
+                "id": "mock", "object": "chat.completion", "created": int(time.time()), "model": body["model"],
+                "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "".join(pieces)}}],
+                "usage": usage()
+            })
+
+        include_usage = (body.get("stream_options") or {}).get("include_usage")
+
+        async def events():
+            sent = 0
+            try:
+                for piece in pieces:
+                    await asyncio.sleep(token_delay)
+                    chunk = {
+                        "id": "mock", "object": "chat.completion.chunk", "created": int(time.time()), "model": body["model"],
+                        "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]
+                    }
+                    yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+                    sent += 1
+                if include_usage:
+                    chunk = {
+                        "id": "mock", "object": "chat.completion.chunk", "created": int(time.time()), "model": body["model"],
+                        "choices": [], "usage": usage()
+                    }
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                yield "data: [DONE]\n\n"
+            finally:
+                stats["in_flight"] -= 1
+                stats["streams"] += 1
+                if sent < len(pieces):
+                    stats["aborted"] += 1
+                    stats["aborted_after"].append(sent)
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def serve(app, port: int):
+    """在后台线程中运行uvicorn"""
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="on"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def bench_message(base: str):
+    import httpx
+
+    async with httpx.AsyncClient(timeout=60) as client:
+        start = time.perf_counter()
+        response = await client.post(f"{base}/api/v1/chat/message", json={"message": "如何提升部署频率？"})
+        elapsed = time.perf_counter() - start
+        response.raise_for_status()
+    return {"ttfb": elapsed, "total": elapsed}
+
+
+async def bench_sse(base: str, disconnect_after: int = 0):
+    import httpx
+
+    result = {"ttfb": None, "first_token": None, "total": None, "tokens": 0}
+    async with httpx.AsyncClient(timeout=60) as client:
+        start = time.perf_counter()
+        async with client.stream("POST", f"{base}/api/v1/chat/stream", json={"message": "如何提升部署频率？"}) as response:
+            async for line in response.aiter_lines():
+                if result["ttfb"] is None:
+                    result["ttfb"] = time.perf_counter() - start
+                if line.startswith("event: token"):
+                    result["tokens"] += 1
+                    if result["first_token"] is None:
+                        result["first_token"] = time.perf_counter() - start
+                    if disconnect_after and result["tokens"] >= disconnect_after:
+                        break
+        result["total"] = time.perf_counter() - start
+    return result
+
+
+async def bench_websocket(base: str):
+    import websockets
+
+    result = {"first_token": None, "total": None, "tokens": 0}
+    async with websockets.connect(base.replace("http", "ws") + "/api/v1/chat/ws") as ws:
+        start = time.perf_counter()
+        await ws.send(json.dumps({"message": "如何提升部署频率？"}))
+        while True:
+            event = json.loads(await ws.recv())
+            if event["type"] == "token":
+                result["tokens"] += 1
+                if result["first_token"] is None:
+                    result["first_token"] = time.perf_counter() - start
+            elif event["type"] in ("done", "error"):
+                break
+        result["total"] = time.perf_counter() - start
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="流式聊天基准测试")
+    parser.add_argument("--tokens", type=int, default=40, help="模拟回复的token数 (默认: 40)")
+    parser.add_argument("--token-delay", type=float, default=0.05, help="模拟每个token的生成间隔(秒) (默认: 0.05)")
+    args = parser.parse_args()
+
+    stats = {"streams": 0, "aborted": 0, "aborted_after": []}
+    llm_port, app_port = free_port(), free_port()
+
+    # main.py 挂载 static 目录并写入 logs，在临时目录中运行
+    workdir = tempfile.mkdtemp()
+    os.makedirs(os.path.join(workdir, "static"))
+    os.makedirs(os.path.join(workdir, "logs"))
+    os.chdir(workdir)
+    os.environ.update({
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        "OPENAI_API_KEY": "mock-key",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{llm_port}/v1",
+        "CHAT_CACHE_ENABLED": "false",
+        "DATA_COLLECTION_ENABLED": "false"
+    })
+
+    from loguru import logger
+    logger.remove()
+
+    serve(create_mock_llm(args.tokens, args.token_delay, stats), llm_port)
+    from main import app
+    serve(app, app_port)
+    base = f"http://127.0.0.1:{app_port}"
+
+    async def run():
+        message = await bench_message(base)
+        sse = await bench_sse(base)
+        ws = await bench_websocket(base)
+        aborted = await bench_sse(base, disconnect_after=3)
+        await asyncio.sleep(args.token_delay * 4)
+        return message, sse, ws, aborted
+
+    message, sse, ws, aborted = asyncio.run(run())
+
+    print(f"模拟LLM: {args.tokens} 个token，每个间隔 {args.token_delay * 1000:.0f} ms")
+    print(f"{'接口':<20}{'首字节':>12}{'首个token':>12}{'完成':>12}")
+    print(f"{'/chat/message':<20}{message['ttfb'] * 1000:>10.1f}ms{'-':>12}{message['total'] * 1000:>10.1f}ms")
+    print(f"{'/chat/stream (SSE)':<20}{sse['ttfb'] * 1000:>10.1f}ms{sse['first_token'] * 1000:>10.1f}ms{sse['total'] * 1000:>10.1f}ms")
+    print(f"{'/chat/ws':<20}{'-':>12}{ws['first_token'] * 1000:>10.1f}ms{ws['total'] * 1000:>10.1f}ms")
+    print(f"\n客户端收到3个token后断开: 上游中止流 {stats['aborted']} 个，"
+          f"中止前已发送 {stats['aborted_after']} 个token(共{args.tokens}个)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+时间序列传输格式基准测试
+
+以 /metrics/dora 的四个指标、一年按天粒度的时间序列为例，对比:
+  - rows      [{date, value, team_id, project_id}, ...] (默认格式)
+  - columnar  {filters, series: {metric: {dates, values}}} (?format=columnar)
+  - arrow     Arrow IPC 流 (Accept: application/vnd.apache.arrow.stream，需要 pyarrow)
+输出响应体大小(原始/gzip)以及客户端解析耗时的中位数。
+客户端解析指把响应体解析为可按指标取出日期和数值列的结构。
+
+使用方法:
+    python benchmarks/bench_columnar.py
+    python benchmarks/bench_columnar.py --days 730 --runs 50
+"""
+
+import argparse
+import gzip
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from app.core.columnar import arrow_available, arrow_time_series, columnar_time_series  # noqa: E402
+
+METRICS = ("deployment_frequency", "lead_time", "change_failure_rate", "recovery_time")
+
+
+def build_time_series(days: int, team_id: int = 1, project_id: int = 1) -> dict:
+    """生成 days 天的按天时间序列，格式与 /metrics/dora 一致"""
+    start = date(2024, 1, 1)
+    return {
+        metric: [
+            {
+                "date": (start + timedelta(days=i)).isoformat(),
+                "value": round(1 + index + (i % 30) / 10, 2),
+                "team_id": team_id,
+                "project_id": project_id
+            }
+            for i in range(days)
+        ]
+        for index, metric in enumerate(METRICS)
+    }
+
+
+def parse_rows(body: bytes) -> dict:
+    series = json.loads(body)
+    return {
+        metric: ([point["date"] for point in points], [point["value"] for point in points])
+        for metric, points in series.items()
+    }
+
+
+def parse_columnar(body: bytes) -> dict:
+    series = json.loads(body)["series"]
+    return {metric: (columns["dates"], columns["values"]) for metric, columns in series.items()}
+
+
+def parse_arrow(body: bytes) -> dict:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    table = pa.ipc.open_stream(body).read_all()
+    metrics = table.column("metric").combine_chunks()
+    result = {}
+    for index, metric in enumerate(metrics.dictionary.to_pylist()):
+        rows = table.filter(pc.equal(metrics.indices, index))
+        result[metric] = (rows.column("date").to_numpy(), rows.column("value").to_numpy())
+    return result
+
+
+def median_ms(func, body: bytes, runs: int) -> float:
+    func(body)
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func(body)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="时间序列传输格式基准测试")
+    parser.add_argument("--days", type=int, default=365, help="时间序列天数 (默认: 365)")
+    parser.add_argument("--runs", type=int, default=30, help="解析次数 (默认: 30)")
+    args = parser.parse_args()
+
+    time_series = build_time_series(args.days)
+    formats = {
+        "rows": (json.dumps(time_series, ensure_ascii=False).encode("utf-8"), parse_rows),
+        "columnar": (json.dumps(columnar_time_series(time_series), ensure_ascii=False).encode("utf-8"), parse_columnar)
+    }
+    if arrow_available():
+        formats["arrow"] = (arrow_time_series(time_series), parse_arrow)
+
+    baseline_size = len(formats["rows"][0])
+    baseline_ms = None
+    print(f"时间序列: {len(METRICS)} 个指标 x {args.days} 天，解析 {args.runs} 次")
+    print(f"{'格式':<10}{'大小':>10}{'gzip':>10}{'缩小':>8}{'解析耗时':>12}{'加速':>8}")
+    for name, (body, parse) in formats.items():
+        parse_ms = median_ms(parse, body, args.runs)
+        baseline_ms = baseline_ms or parse_ms
+        print(f"{name:<10}{len(body) / 1024:>8.1f}KB{len(gzip.compress(body)) / 1024:>8.1f}KB"
+              f"{baseline_size / len(body):>7.1f}x{parse_ms:>10.2f}ms{baseline_ms / parse_ms:>7.1f}x")
+
+    if not arrow_available():
+        print("\n未安装 pyarrow，跳过 Arrow 格式")
+
+
+if __name__ == "__main__":
+    main()
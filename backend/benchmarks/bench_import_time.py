@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+应用导入耗时基准测试
+
+在子进程中用 python -X importtime 导入 main 模块(即 main:app)，统计总耗时、最慢的模块，
+并检查 numpy、scikit-learn、openai 等延迟加载的依赖没有在启动时被导入。
+可用于CI跟踪: --json 输出结果，--max-ms 超出预算或延迟加载失效时以非零状态退出。
+
+使用方法:
+    python benchmarks/bench_import_time.py                 # 运行5次取中位数
+    python benchmarks/bench_import_time.py --runs 10 --top 20
+    python benchmarks/bench_import_time.py --max-ms 2000 --json
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 启动时不应导入的模块
+LAZY_MODULES = ("numpy", "sklearn", "openai")
+
+_LINE_PATTERN = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def measure_once(workdir: str):
+    """导入一次main，返回 [(模块名, 自身耗时us, 累计耗时us, 层级)]"""
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=workdir,
+        env=env,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"导入main失败:\n{result.stderr[-2000:]}")
+
+    records = []
+    for line in result.stderr.splitlines():
+        match = _LINE_PATTERN.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            records.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="应用导入耗时基准测试")
+    parser.add_argument("--runs", type=int, default=5, help="运行次数，取中位数 (默认: 5)")
+    parser.add_argument("--top", type=int, default=15, help="显示累计耗时最高的模块数 (默认: 15)")
+    parser.add_argument("--max-ms", type=float, default=None, help="main导入耗时预算(毫秒)，超出时退出码为1")
+    parser.add_argument("--json", action="store_true", help="以JSON格式输出结果")
+    args = parser.parse_args()
+
+    # main.py 挂载 static 目录并写入 logs，在临时目录中运行
+    with tempfile.TemporaryDirectory() as workdir:
+        os.makedirs(os.path.join(workdir, "static"))
+        os.makedirs(os.path.join(workdir, "logs"))
+
+        # 预热一次，生成字节码缓存
+        measure_once(workdir)
+        runs = [measure_once(workdir) for _ in range(args.runs)]
+
+    totals = [next(cumulative for name, _, cumulative, _ in run if name == "main") for run in runs]
+    median_ms = statistics.median(totals) / 1000
+
+    last_run = runs[-1]
+    slowest = sorted(
+        ((name, cumulative) for name, _, cumulative, _ in last_run if name != "main"),
+        key=lambda item: item[1],
+        reverse=True
+    )[:args.top]
+
+    imported = {name.split(".")[0] for name, _, _, _ in last_run}
+    eager = [module for module in LAZY_MODULES if module in imported]
+
+    over_budget = args.max_ms is not None and median_ms > args.max_ms
+
+    if args.json:
+        print(json.dumps({
+            "runs": args.runs,
+            "median_ms": round(median_ms, 1),
+            "min_ms": round(min(totals) / 1000, 1),
+            "max_ms": round(max(totals) / 1000, 1),
+            "budget_ms": args.max_ms,
+            "eager_heavy_modules": eager,
+            "slowest": [{"module": name, "cumulative_ms": round(us / 1000, 1)} for name, us in slowest]
+        }, ensure_ascii=False, indent=2))
+    else:
+        print(f"main 导入耗时: 中位数 {median_ms:.1f} ms "
+              f"(最小 {min(totals) / 1000:.1f} ms, 最大 {max(totals) / 1000:.1f} ms, {args.runs}次)")
+        print(f"\n累计耗时最高的 {len(slowest)} 个模块:")
+        for name, us in slowest:
+            print(f"  {us / 1000:8.1f} ms  {name}")
+        print(f"\n启动时导入的重量级依赖: {', '.join(eager) if eager else '无'}")
+        if args.max_ms is not None:
+            print(f"耗时预算: {args.max_ms:.0f} ms ({'超出' if over_budget else '通过'})")
+
+    if eager or over_budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+AI洞察列表查询基准测试
+
+在临时 SQLite 数据库中写入大量历史洞察(默认20万条，约90%已解决)，对比:
+  - python   加载全部洞察后在内存中筛选、排序、截取 (原实现方式)
+  - sql      listing_service.list_insights: 筛选、排序、分页全部下推到SQL
+场景包括待处理收件箱首页、收件箱第N页(沿游标翻页)、按严重程度和按团队+类型筛选，
+输出每个场景查询耗时的中位数以及 SQLite 的查询计划(确认命中的索引)。
+
+使用方法:
+    python benchmarks/bench_insight_queries.py
+    python benchmarks/bench_insight_queries.py --rows 500000 --runs 20
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="bench_insights_"), "insights.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+from sqlalchemy import insert, text  # noqa: E402
+
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+from app.models.models import Insight  # noqa: E402
+from app.services.listings import OPEN_INSIGHT_STATUSES, listing_service  # noqa: E402
+
+TYPES = ("performance", "quality", "risk", "opportunity")
+SEVERITIES = ("low", "medium", "high", "critical")
+
+
+def seed(rows: int, teams: int = 20):
+    """写入 rows 条洞察，按时间均匀分布在过去两年内"""
+    Base.metadata.create_all(bind=engine, tables=[Insight.__table__])
+    rng = random.Random(42)
+    start = datetime(2023, 1, 1)
+    batch = []
+    with engine.begin() as connection:
+        for i in range(rows):
+            batch.append({
+                "title": f"洞察 {i}",
+                "description": "基准测试数据",
+                "type": rng.choice(TYPES),
+                "severity": rng.choice(SEVERITIES),
+                "confidence": round(rng.random(), 2),
+                "status": rng.choice(OPEN_INSIGHT_STATUSES) if rng.random() < 0.1 else "resolved",
+                "team_id": rng.randint(1, teams),
+                "created_by": "ai",
+                "created_at": start + timedelta(minutes=5 * i)
+            })
+            if len(batch) == 10000:
+                connection.execute(insert(Insight), batch)
+                batch = []
+        if batch:
+            connection.execute(insert(Insight), batch)
+        connection.execute(text("ANALYZE"))
+
+
+def python_filter(limit: int, **filters) -> list:
+    """原实现方式: 取出全部洞察再在内存中筛选"""
+    db = SessionLocal()
+    try:
+        insights = [
+            {"id": i.id, "status": i.status, "severity": i.severity, "team_id": i.team_id,
+             "type": i.type, "created_at": i.created_at}
+            for i in db.query(Insight).all()
+        ]
+    finally:
+        db.close()
+    if filters.get("status") == "open":
+        insights = [i for i in insights if i["status"] in OPEN_INSIGHT_STATUSES]
+    for key in ("severity", "team_id", "type"):
+        if key in filters:
+            insights = [i for i in insights if i[key] == filters[key]]
+    insights.sort(key=lambda i: (i["created_at"], i["id"]), reverse=True)
+    return insights[:limit]
+
+
+def cursor_at_page(page: int, limit: int, **filters) -> str:
+    cursor = None
+    for _ in range(page - 1):
+        cursor = listing_service.list_insights(limit, cursor, **filters).next_cursor
+    return cursor
+
+
+def query_plan(**filters) -> str:
+    """list_insights 实际执行的查询计划"""
+    db = SessionLocal()
+    try:
+        query = db.query(Insight.id)
+        if filters.get("status") == "open":
+            query = query.filter(Insight.status.in_(OPEN_INSIGHT_STATUSES))
+        if "severity" in filters:
+            query = query.filter(Insight.severity == filters["severity"])
+        if "team_id" in filters:
+            query = query.filter(Insight.team_id == filters["team_id"])
+        if "insight_type" in filters:
+            query = query.filter(Insight.type == filters["insight_type"])
+        statement = query.order_by(Insight.created_at.desc(), Insight.id.desc()).limit(21).statement
+        compiled = statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True})
+        rows = db.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+        return "; ".join(row[-1] for row in rows)
+    finally:
+        db.close()
+
+
+def median_ms(func, runs: int) -> float:
+    func()
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI洞察列表查询基准测试")
+    parser.add_argument("--rows", type=int, default=200000, help="历史洞察数量 (默认: 200000)")
+    parser.add_argument("--runs", type=int, default=10, help="每个场景的查询次数 (默认: 10)")
+    parser.add_argument("--limit", type=int, default=20, help="每页条数 (默认: 20)")
+    parser.add_argument("--deep-page", type=int, default=200, help="深翻页的页码 (默认: 200)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    seed(args.rows)
+    print(f"写入 {args.rows} 条洞察: {time.perf_counter() - start:.1f}s ({DB_PATH})")
+
+    scenarios = {
+        "收件箱首页": ({"status": "open"}, {"status": "open"}, None),
+        "高严重度待处理": ({"status": "open", "severity": "high"}, {"status": "open", "severity": "high"}, None),
+        "团队+类型": ({"team_id": 3, "insight_type": "risk"}, {"team_id": 3, "type": "risk"}, None),
+        f"收件箱第{args.deep_page}页": (
+            {"status": "open"}, None, cursor_at_page(args.deep_page, args.limit, status="open")
+        )
+    }
+
+    python_runs = max(1, args.runs // 5)
+    print(f"{'场景':<14}{'python':>12}{'sql':>12}{'加速':>10}")
+    for name, (sql_filters, python_filters, cursor) in scenarios.items():
+        sql_ms = median_ms(lambda: listing_service.list_insights(args.limit, cursor, **sql_filters), args.runs)
+        if python_filters is not None:
+            python_ms = median_ms(lambda: python_filter(args.limit, **python_filters), python_runs)
+            print(f"{name:<14}{python_ms:>10.1f}ms{sql_ms:>10.2f}ms{python_ms / sql_ms:>9.0f}x")
+        else:
+            print(f"{name:<14}{'-':>12}{sql_ms:>10.2f}ms{'-':>10}")
+
+    print("\n查询计划:")
+    for name, (sql_filters, _, _) in list(scenarios.items())[:3]:
+        print(f"  {name}: {query_plan(**sql_filters)}")
+
+
+if __name__ == "__main__":
+    main()
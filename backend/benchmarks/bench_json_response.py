@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+JSON响应序列化基准测试
+
+对比 /analytics/benchmarks 和 /metrics/dora 在一年按天粒度数据量下的三种序列化路径:
+  - default    response_model 校验 + jsonable_encoder + 标准库 json (FastAPI默认流程)
+  - orjson     response_model 校验 + jsonable_encoder + orjson (仅替换 default_response_class)
+  - fast       api_response: 跳过校验，orjson 直接序列化
+输出每次序列化的耗时中位数和 tracemalloc 统计的内存峰值。
+
+端点目前返回少量模拟数据，测试时把 time_series 扩展为365个按天的数据点；
+/analytics/benchmarks 没有时间序列，为每个对比指标附加一年的按天趋势。
+
+使用方法:
+    python benchmarks/bench_json_response.py
+    python benchmarks/bench_json_response.py --days 730 --runs 50
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def daily_series(template: list, days: int, start: date = date(2024, 1, 1)) -> list:
+    """按模板数据点生成连续 days 天的时间序列"""
+    series = []
+    for i in range(days):
+        point = dict(template[i % len(template)])
+        point["date"] = (start + timedelta(days=i)).isoformat()
+        point["value"] = round(point.get("value", 0) * (1 + (i % 30) / 100), 3)
+        series.append(point)
+    return series
+
+
+async def load_payloads(days: int) -> dict:
+    """请求端点获取模拟数据并扩展到指定天数"""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from app.api.v1.api import api_router
+
+    app = FastAPI()
+    app.include_router(api_router, prefix="/api/v1")
+    with TestClient(app) as client:
+        dora = client.get(
+            "/api/v1/metrics/dora", params={"team_id": 1, "project_id": 1, "granularity": "daily"}
+        ).json()["data"]
+        benchmarks = client.get("/api/v1/analytics/benchmarks").json()["data"]
+
+    dora["time_series"] = {
+        metric: daily_series(points, days) for metric, points in dora["time_series"].items()
+    }
+    benchmarks["time_series"] = {
+        metric: daily_series([{"value": values["our_value"], "industry_avg": values["industry_avg"]}], days)
+        for category in benchmarks["benchmark_comparison"].values()
+        for metric, values in category.items()
+    }
+    return {"/analytics/benchmarks": benchmarks, "/metrics/dora": dora}
+
+
+def serializers(route_path: str):
+    """三种序列化路径，均返回响应体字节"""
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from app.core.responses import FastJSONResponse, api_response
+    from app.api.v1.api import api_router
+    from app.schemas.schemas import APIResponse
+
+    route = next(route for route in api_router.routes if getattr(route, "path", None) == route_path)
+    field = route.secure_cloned_response_field
+
+    async def default(data):
+        content = await serialize_response(field=field, response_content=APIResponse(message="ok", data=data))
+        return JSONResponse(content).body
+
+    async def validated_orjson(data):
+        content = await serialize_response(field=field, response_content=APIResponse(message="ok", data=data))
+        return FastJSONResponse(content).body
+
+    async def fast(data):
+        return api_response(data=data, message="ok").body
+
+    return {"default": default, "orjson": validated_orjson, "fast": fast}
+
+
+async def measure(serialize, data, runs: int) -> dict:
+    """耗时中位数(ms)、内存峰值(KB)和响应体大小"""
+    body = await serialize(data)  # 预热
+
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await serialize(data)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    await serialize(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"ms": statistics.median(timings), "peak_kb": peak / 1024, "bytes": len(body)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON响应序列化基准测试")
+    parser.add_argument("--days", type=int, default=365, help="时间序列天数 (默认: 365)")
+    parser.add_argument("--runs", type=int, default=30, help="每种路径的序列化次数 (默认: 30)")
+    args = parser.parse_args()
+
+    from loguru import logger
+    logger.remove()
+
+    async def run():
+        payloads = await load_payloads(args.days)
+        results = {}
+        for route_path, data in payloads.items():
+            results[route_path] = {
+                name: await measure(serialize, data, args.runs)
+                for name, serialize in serializers(route_path).items()
+            }
+        return results
+
+    results = asyncio.run(run())
+
+    print(f"时间序列: {args.days} 天，每种路径 {args.runs} 次")
+    print(f"{'接口':<24}{'路径':<10}{'耗时(中位数)':>14}{'内存峰值':>12}{'响应体':>12}{'加速':>8}")
+    for route_path, paths in results.items():
+        baseline = paths["default"]["ms"]
+        for name, stats in paths.items():
+            print(f"{route_path:<24}{name:<10}{stats['ms']:>12.2f}ms{stats['peak_kb']:>10.0f}KB"
+                  f"{stats['bytes'] / 1024:>10.1f}KB{baseline / stats['ms']:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+洞察规则引擎基准测试
+
+使用方法:
+    python benchmarks/bench_rule_engine.py                       # 500条规则 × 1000个团队
+    python benchmarks/bench_rule_engine.py --rules 2000 --teams 5000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.rule_engine import InsightRuleEngine, COMPARATORS
+
+
+def build_definitions(n_rules: int, n_metrics: int, rng: np.random.Generator) -> dict:
+    """生成随机规则定义"""
+    comparators = list(COMPARATORS)
+    rules = []
+    for i in range(n_rules):
+        metric = f"metric_{rng.integers(n_metrics)}"
+        rules.append({
+            "id": f"bench.{i}",
+            "category": "team",
+            "metric": metric,
+            "comparator": comparators[rng.integers(len(comparators))],
+            "threshold": float(rng.uniform(0, 100)),
+            "title": f"规则{i}",
+            "template": "当前值为 {value:.1f}，阈值为 {threshold:.1f}",
+            "type": "performance",
+            "severity": "medium"
+        })
+    return {"rules": rules}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="洞察规则引擎基准测试")
+    parser.add_argument("--rules", type=int, default=500, help="规则数量 (默认: 500)")
+    parser.add_argument("--teams", type=int, default=1000, help="团队数量 (默认: 1000)")
+    parser.add_argument("--metrics", type=int, default=50, help="指标数量 (默认: 50)")
+    parser.add_argument("--repeat", type=int, default=20, help="重复次数 (默认: 20)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+
+    start = time.perf_counter()
+    engine = InsightRuleEngine.from_definitions(build_definitions(args.rules, args.metrics, rng))
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    matrix = rng.uniform(0, 100, size=(args.teams, len(engine.columns)))
+
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        hits = engine.evaluate(matrix)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    print(f"规则数: {args.rules}, 团队数: {args.teams}, 指标数: {len(engine.columns)}")
+    print(f"编译耗时: {compile_ms:.2f} ms")
+    print(f"评估耗时: 中位数 {np.median(timings):.2f} ms, 最小 {min(timings):.2f} ms")
+    print(f"命中数: {int(hits.sum())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,21 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 import uvicorn
 from loguru import logger
 
 from app.core.config import settings
+from app.core.compression import CompressionMiddleware
+from app.core.responses import FastJSONResponse
 from app.api.v1.api import api_router
 from app.core.database import init_db
 from app.services.ai_service import AIService
 from app.services.data_collector import DataCollector
+from app.services.event_bus import event_bus
+from app.services.job_queue import job_queue
+from app.services.job_handlers import register_job_handlers
 
 
 @asynccontextmanager
@@ -18,8 +24,14 @@ async def lifespan(app: FastAPI):
     # 启动时执行
     logger.info("启动AI驱动软件开发效能管理平台...")
     
-    # 初始化数据库
-    await init_db()
+    # 初始化数据库(滚动重启时可通过 SKIP_DB_INIT 跳过)
+    if settings.SKIP_DB_INIT:
+        logger.info("已跳过数据库初始化")
+    else:
+        await init_db()
+    
+    # 启动实时推送(Redis pub/sub 或进程内广播)
+    await event_bus.start()
     
     # 初始化AI服务
     ai_service = AIService()
@@ -28,6 +40,12 @@ async def lifespan(app: FastAPI):
     # 初始化数据采集器
     data_collector = DataCollector()
     app.state.data_collector = data_collector
+    if settings.DATA_COLLECTION_ENABLED:
+        await data_collector.start_collection()
+    
+    # 启动后台任务队列
+    register_job_handlers(job_queue, ai_service, data_collector)
+    await job_queue.start()
     
     logger.info("平台启动完成")
     
@@ -36,6 +54,11 @@ async def lifespan(app: FastAPI):
     # 关闭时执行
     logger.info("正在关闭平台...")
     # 清理资源
+    await job_queue.stop()
+    await data_collector.stop_collection()
+    await event_bus.stop()
+    if ai_service.llm_gateway:
+        await ai_service.llm_gateway.close()
     logger.info("平台已关闭")
 
 
@@ -46,6 +69,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=FastJSONResponse if settings.FAST_JSON_RESPONSE else JSONResponse,
     lifespan=lifespan
 )
 
@@ -58,6 +82,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 配置响应压缩中间件(br/gzip)，后添加的中间件位于外层，压缩包括CORS响应头在内的完整响应
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MIN_SIZE)
+
 # 注册API路由
 app.include_router(api_router, prefix="/api/v1")
 
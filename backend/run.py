@@ -7,9 +7,11 @@
     python run.py --prod             # 生产模式
     python run.py --host 0.0.0.0     # 指定主机
     python run.py --port 8080        # 指定端口
+    python run.py --prod --skip-db-init  # 滚动重启，跳过建表/迁移
 """
 
 import argparse
+import os
 import uvicorn
 from loguru import logger
 
@@ -56,6 +58,12 @@ def parse_args():
         help="工作进程数量 (默认: 1)"
     )
     
+    parser.add_argument(
+        "--skip-db-init",
+        action="store_true",
+        help="跳过数据库初始化，用于数据库结构未变化的滚动重启"
+    )
+    
     parser.add_argument(
         "--log-level",
         type=str,
@@ -109,8 +117,14 @@ def main():
     logger.info(f"📊 日志级别: {args.log_level.upper()}")
     logger.info(f"⚙️  自动重载: {'开启' if args.reload and not args.prod else '关闭'}")
     logger.info(f"👥 工作进程: {args.workers}")
+    logger.info(f"🗄️  数据库初始化: {'跳过' if args.skip_db_init else '开启'}")
     logger.info("=" * 60)
     
+    # 当前进程直接修改配置，多工作进程/重载子进程通过环境变量继承
+    if args.skip_db_init:
+        settings.SKIP_DB_INIT = True
+        os.environ["SKIP_DB_INIT"] = "true"
+    
     # 配置uvicorn参数
     uvicorn_config = {
         "app": "main:app",
@@ -0,0 +1,34 @@
+"""
+列式时间序列响应测试
+
+运行方法:
+    cd backend && python -m pytest tests/test_columnar.py
+"""
+
+import pytest
+from starlette.requests import Request
+
+from app.core.columnar import accepts_arrow
+
+ARROW = "application/vnd.apache.arrow.stream"
+
+
+def request(accept=None) -> Request:
+    headers = [(b"accept", accept.encode())] if accept is not None else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+@pytest.mark.parametrize("accept, expected", [
+    (None, False),
+    ("*/*", False),
+    ("application/json", False),
+    (ARROW, True),
+    (f"{ARROW}, application/json;q=0.9", True),
+    (f"{ARROW};q=0.5, */*;q=0.1", True),
+    (f"{ARROW};q=0", False),
+    (f"{ARROW}; q=0.0, application/json", False),
+    (f"application/json, {ARROW};q=0.5", False),
+    (f"{ARROW};q=invalid", False)
+])
+def test_accepts_arrow(accept, expected):
+    assert accepts_arrow(request(accept)) is expected
@@ -0,0 +1,180 @@
+"""
+LLM网关测试
+
+使用 benchmarks/bench_chat_stream.py 中的 OpenAI 兼容模拟服务器，验证重试(429/5xx 与 Retry-After)、
+并发上限、Token用量统计和客户端复用。
+
+运行方法:
+    cd backend && python -m pytest tests/test_llm_gateway.py
+"""
+
+import asyncio
+import time
+
+import openai
+import pytest
+
+from app.core.config import settings
+from app.services import llm_gateway as gateway_module
+from app.services.llm_gateway import LLMGateway
+from benchmarks.bench_chat_stream import create_mock_llm, free_port, serve
+
+TOKENS = 5
+MESSAGES = [{"role": "user", "content": "如何提升部署频率？"}]
+
+
+@pytest.fixture
+def mock_llm():
+    """启动模拟LLM服务，返回 (base_url, stats)"""
+    servers = []
+
+    def start(failures=None, token_delay=0.0):
+        stats = {}
+        port = free_port()
+        servers.append(serve(create_mock_llm(TOKENS, token_delay, stats, failures), port))
+        return f"http://127.0.0.1:{port}/v1", stats
+
+    yield start
+    for server in servers:
+        server.should_exit = True
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    # 没有 Retry-After 时的退避间隔缩短，避免测试变慢
+    monkeypatch.setattr(settings, "OPENAI_RETRY_BASE_DELAY", 0.01)
+
+
+def run(gateway: LLMGateway, call):
+    """在新的事件循环中执行调用，结束后关闭网关的连接池"""
+    async def main():
+        try:
+            return await call(gateway)
+        finally:
+            await gateway.close()
+    return asyncio.run(main())
+
+
+async def stream_text(gateway: LLMGateway) -> str:
+    return "".join([piece async for piece in gateway.stream_chat_completion(MESSAGES)])
+
+
+def test_retry_on_429_honours_retry_after(mock_llm):
+    base_url, stats = mock_llm(failures=[(429, 0.3)])
+    gateway = LLMGateway(api_key="mock-key", base_url=base_url, max_retries=3)
+
+    content = run(gateway, lambda g: g.chat_completion(MESSAGES))
+
+    assert content.startswith("片段0")
+    assert stats["requests"] == 2
+    assert stats["request_times"][1] - stats["request_times"][0] >= 0.3
+    assert gateway.usage["retries"] == 1
+    assert gateway.usage["failures"] == 0
+
+
+def test_retry_after_is_capped(mock_llm, monkeypatch):
+    monkeypatch.setattr(settings, "OPENAI_RETRY_MAX_DELAY", 0.1)
+    base_url, stats = mock_llm(failures=[(429, 30)])
+    gateway = LLMGateway(api_key="mock-key", base_url=base_url)
+
+    start = time.monotonic()
+    run(gateway, lambda g: g.chat_completion(MESSAGES))
+
+    assert stats["requests"] == 2
+    assert time.monotonic() - start < 5
+
+
+def test_stream_retries_on_5xx(mock_llm):
+    base_url, stats = mock_llm(failures=[(503, None), (500, None)])
+    gateway = LLMGateway(api_key="mock-key", base_url=base_url, max_retries=3)
+
+    content = run(gateway, stream_text)
+
+    assert content == "".join(f"片段{i} " for i in range(TOKENS))
+    assert stats["requests"] == 3
+    assert gateway.usage["retries"] == 2
+
+
+def test_gives_up_after_max_retries(mock_llm):
+    base_url, stats = mock_llm(failures=[(500, 0)] * 3)
+    gateway = LLMGateway(api_key="mock-key", base_url=base_url, max_retries=2)
+
+    with pytest.raises(openai.InternalServerError):
+        run(gateway, lambda g: g.chat_completion(MESSAGES))
+
+    assert stats["requests"] == 3
+    assert gateway.usage["retries"] == 2
+    assert gateway.usage["failures"] == 1
+
+
+def test_client_errors_are_not_retried(mock_llm):
+    base_url, stats = mock_llm(failures=[(400, None)])
+    gateway = LLMGateway(api_key="mock-key", base_url=base_url)
+
+    with pytest.raises(openai.BadRequestError):
+        run(gateway, stream_text)
+
+    assert stats["requests"] == 1
+    assert gateway.usage["retries"] == 0
+    assert gateway.usage["failures"] == 1
+
+
+def test_concurrency_cap(mock_llm):
+    base_url, stats = mock_llm(token_delay=0.02)
+    gateway = LLMGateway(api_key="mock-key", base_url=base_url, max_concurrency=2)
+
+    async def call(g):
+        return await asyncio.gather(
+            *(g.chat_completion(MESSAGES) for _ in range(3)),
+            *(stream_text(g) for _ in range(3))
+        )
+
+    results = run(gateway, call)
+
+    assert len(results) == 6
+    assert stats["requests"] == 6
+    assert stats["max_in_flight"] == 2
+
+
+def test_usage_accounting(mock_llm):
+    base_url, _ = mock_llm()
+    gateway = LLMGateway(api_key="mock-key", base_url=base_url)
+
+    async def call(g):
+        await g.chat_completion(MESSAGES)
+        await stream_text(g)
+
+    run(gateway, call)
+
+    assert gateway.usage["requests"] == 2
+    assert gateway.usage["prompt_tokens"] == 20
+    assert gateway.usage["completion_tokens"] == 2 * TOKENS
+    assert gateway.usage["total_tokens"] == 2 * (TOKENS + 10)
+
+
+def test_client_reuse(mock_llm):
+    base_url, stats = mock_llm()
+    gateway = LLMGateway(api_key="mock-key", base_url=base_url)
+
+    async def call(g):
+        client = g.client
+        for _ in range(3):
+            await g.chat_completion(MESSAGES)
+            await stream_text(g)
+        return client
+
+    client = run(gateway, call)
+
+    assert gateway.client is client
+    # 顺序请求复用同一个 keep-alive 连接
+    assert stats["requests"] == 6
+    assert len(set(stats["peers"])) == 1
+
+
+def test_shared_gateway(monkeypatch):
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "mock-key")
+    gateway_module.get_llm_gateway.cache_clear()
+    try:
+        assert gateway_module.get_llm_gateway() is gateway_module.get_llm_gateway()
+    finally:
+        gateway_module.get_llm_gateway.cache_clear()
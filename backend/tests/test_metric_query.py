@@ -0,0 +1,36 @@
+"""
+自然语言指标查询测试
+
+运行方法:
+    cd backend && python -m pytest tests/test_metric_query.py
+"""
+
+from app.services.metric_query import MetricQueryEngine, describe_result, parse_query
+
+SNAPSHOT = {"change_failure_rate": 8.5, "generated_at": "2026-10-01T09:30:00"}
+
+
+def test_parse_query():
+    intent = parse_query("团队2最近两周的变更失败率趋势", data_type="dora")
+    assert intent.metric == "change_failure_rate"
+    assert intent.aggregation == "trend"
+    assert intent.days == 14
+    assert intent.team_id == 2
+
+
+def test_snapshot_fallback_is_organisation_wide():
+    intent = parse_query("最近两周的变更失败率趋势", data_type="dora")
+    result = MetricQueryEngine._from_fallback(intent, SNAPSHOT)
+    assert result["source"] == "snapshot"
+    assert result["value"] == 8.5
+
+    answer = describe_result(intent, result)
+    assert "全组织" in answer and "2026-10-01 09:30" in answer
+    assert "当前采集值" not in answer
+
+
+def test_snapshot_fallback_not_used_for_team():
+    intent = parse_query("团队2的变更失败率", data_type="dora")
+    result = MetricQueryEngine._from_fallback(intent, SNAPSHOT)
+    assert result["source"] == "none"
+    assert "8.5" not in describe_result(intent, result)
@@ -0,0 +1,49 @@
+"""
+聊天回复语义缓存测试
+
+运行方法:
+    cd backend && python -m pytest tests/test_response_cache.py
+"""
+
+from app.services.response_cache import SemanticResponseCache
+
+
+def test_normalize_keeps_decimal_point():
+    normalize = SemanticResponseCache.normalize
+    assert normalize("变更失败率1.5%正常吗") != normalize("变更失败率15%正常吗")
+    assert normalize("变更失败率 1.5% 正常吗？") == normalize("变更失败率1.5%正常吗")
+    # 句末的句点仍然去除
+    assert normalize("部署频率是3.") == normalize("部署频率是3")
+
+
+def test_different_numbers_do_not_hit():
+    cache = SemanticResponseCache()
+    cache.set("变更失败率1.5%正常吗", "1.5%的回复")
+
+    assert cache.get("变更失败率15%正常吗") is None
+    assert cache.get("变更失败率1.5%正常吗") == "1.5%的回复"
+    assert cache.stats["exact_hits"] == 1
+
+
+def test_synonyms_hit_exact_layer():
+    cache = SemanticResponseCache()
+    cache.set("如何提高部署频率？", "回复")
+
+    assert cache.get("请问怎么提升部署频率呢") == "回复"
+    assert cache.stats["exact_hits"] == 1
+
+
+def test_different_entities_do_not_hit():
+    cache = SemanticResponseCache()
+    cache.set("前端团队本周的部署频率怎么样", "前端团队的回复")
+
+    assert cache.get("后端团队本周的部署频率怎么样") is None
+    assert cache.get("前端团队上周的部署频率怎么样") is None
+
+
+def test_context_is_part_of_key():
+    cache = SemanticResponseCache()
+    cache.set("部署频率怎么样", "团队1的回复", context={"team_id": 1})
+
+    assert cache.get("部署频率怎么样", context={"team_id": 2}) is None
+    assert cache.get("部署频率怎么样", context={"team_id": 1}) == "团队1的回复"
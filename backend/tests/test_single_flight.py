@@ -0,0 +1,63 @@
+"""
+并发请求合并测试
+
+运行方法:
+    cd backend && python -m pytest tests/test_single_flight.py
+"""
+
+import asyncio
+
+from app.services.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "结果"
+
+    async def main():
+        return await asyncio.gather(*(flight.do("key", work) for _ in range(5)))
+
+    assert asyncio.run(main()) == ["结果"] * 5
+    assert len(calls) == 1
+    assert flight.stats["shared"] == 4
+    assert not flight._inflight and not flight._results
+
+
+def test_results_are_evicted_when_ttl_expires():
+    flight = SingleFlight()
+
+    async def work():
+        return "结果"
+
+    async def main():
+        await flight.do("key", work, ttl=0.05)
+        assert "key" in flight._results
+        assert await flight.do("key", work, ttl=0.05) == "结果"
+        await asyncio.sleep(0.1)
+        # 到期后无需再次调用同一个键也会移除
+        return dict(flight._results)
+
+    assert asyncio.run(main()) == {}
+    assert flight.stats["cached"] == 1
+    assert flight.stats["executions"] == 1
+
+
+def test_failures_are_not_cached():
+    flight = SingleFlight()
+
+    async def work():
+        raise ValueError("失败")
+
+    async def main():
+        try:
+            await flight.do("key", work, ttl=10)
+        except ValueError:
+            pass
+        return dict(flight._results)
+
+    assert asyncio.run(main()) == {}